@@ -0,0 +1,263 @@
+"""Offline agent-loop benchmark.
+
+Drives `CodingAgent.run` against the local stub server through synthetic
+multi-turn sessions and records where each turn's wall time went.
+
+    uv run python -m benchmarks.bench_agent --turns 20 --history 500 --output bench.json
+    uv run python -m benchmarks.bench_agent --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from min_cc.agent import CodingAgent
+from min_cc.compaction import CompactionService
+from min_cc.models import Message, ToolCall
+
+from .stub_server import ScriptedSession, StubLLMServer
+
+METRICS = ["total", "llm", "tools", "compaction", "serialization", "python_overhead"]
+
+
+class Timers:
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+
+    def reset(self):
+        self.totals = {}
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.totals[name] = self.totals.get(name, 0.0) + (
+                    time.perf_counter() - start
+                )
+
+        return wrapper
+
+
+def seed_history(agent: CodingAgent, n_messages: int, payload_chars: int):
+    """Grow the history to roughly `n_messages` with user/assistant/tool triples."""
+    filler = "x" * payload_chars
+    i = 0
+    while len(agent.state.messages) < n_messages:
+        call_id = f"seed_{i}"
+        agent.state.messages.extend(
+            [
+                Message(role="user", content=f"Seed request {i}"),
+                Message(
+                    role="assistant",
+                    tool_calls=[
+                        ToolCall(
+                            id=call_id,
+                            name="read_file",
+                            arguments=json.dumps({"path": f"file_{i}.py"}),
+                        )
+                    ],
+                ),
+                Message(role="tool", content=filler, tool_call_id=call_id),
+            ]
+        )
+        i += 1
+
+
+def make_workspace(path: str, n_files: int, payload_chars: int) -> List[str]:
+    names = []
+    for i in range(n_files):
+        name = f"module_{i}.py"
+        with open(os.path.join(path, name), "w") as f:
+            f.write(f"# module {i}\n" + "value = 1\n" * (payload_chars // 10))
+        names.append(name)
+    return names
+
+
+@contextmanager
+def _chdir(path: str):
+    orig = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(orig)
+
+
+def run_benchmark(
+    turns: int = 10,
+    history: int = 0,
+    tool_calls: int = 4,
+    rounds: int = 1,
+    latency: float = 0.0,
+    chunk_latency: float = 0.0,
+    payload_chars: int = 2000,
+    token_limit: int = 10_000_000,
+) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as workspace, _chdir(workspace):
+        files = make_workspace(workspace, max(tool_calls, 1), payload_chars)
+        responder = ScriptedSession(
+            rounds=rounds,
+            calls_per_round=tool_calls,
+            tool_args=[{"path": name} for name in files],
+        )
+
+        with StubLLMServer(
+            responder=responder,
+            latency=latency,
+            chunk_latency=chunk_latency,
+            record=0,
+        ) as server:
+            agent = CodingAgent(
+                api_key="stub",
+                model="stub-model",
+                base_url=server.base_url,
+                compaction_service=CompactionService(token_limit=token_limit),
+            )
+            seed_history(agent, history, payload_chars)
+
+            timers = Timers()
+            agent.compaction_service.compact = timers.wrap(
+                "compaction", agent.compaction_service.compact
+            )
+            agent._prepare_messages = timers.wrap(
+                "serialization", agent._prepare_messages
+            )
+            # Tool time is what the loop waits for; speculative runs that finish
+            # while the response streams cost nothing here
+            agent._execute_tool_call = timers.wrap("tools", agent._execute_tool_call)
+            agent._call_llm = timers.wrap("llm", agent._call_llm)
+
+            results = []
+            for turn in range(turns):
+                timers.reset()
+                start = time.perf_counter()
+                agent.run(f"Benchmark turn {turn}")
+                total = time.perf_counter() - start
+
+                row = {"turn": turn, "messages": len(agent.state.messages)}
+                row["total"] = total
+                for name in ["llm", "tools", "compaction", "serialization"]:
+                    row[name] = timers.totals.get(name, 0.0)
+                # The rest of the loop, so the timed parts add up to `total`
+                row["python_overhead"] = total - sum(
+                    row[name] for name in ["llm", "tools", "compaction", "serialization"]
+                )
+                results.append(row)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.time(),
+            "params": {
+                "turns": turns,
+                "history": history,
+                "tool_calls": tool_calls,
+                "rounds": rounds,
+                "latency": latency,
+                "chunk_latency": chunk_latency,
+                "payload_chars": payload_chars,
+                "token_limit": token_limit,
+            },
+        },
+        "turns": results,
+        "summary": summarize(results),
+    }
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for metric in METRICS:
+        values = sorted(r[metric] for r in rows)
+        if not values:
+            continue
+        summary[metric] = {
+            "mean": statistics.mean(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "max": values[-1],
+        }
+    return summary
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def print_summary(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    print(f"{'metric':<16}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}", end="")
+    print(f"{'Δ p50':>10}" if baseline else "")
+    for metric, stats in result["summary"].items():
+        line = (
+            f"{metric:<16}{stats['mean'] * 1000:>10.2f}"
+            f"{stats['p50'] * 1000:>10.2f}{stats['p95'] * 1000:>10.2f}"
+        )
+        if baseline and metric in baseline.get("summary", {}):
+            base = baseline["summary"][metric]["p50"]
+            delta = (stats["p50"] - base) / base * 100 if base else 0.0
+            line += f"{delta:>+9.1f}%"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--history", type=int, default=0, help="seed history size")
+    parser.add_argument("--tool-calls", type=int, default=4, help="tool calls per round")
+    parser.add_argument("--rounds", type=int, default=1, help="tool rounds per turn")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to first byte")
+    parser.add_argument("--chunk-latency", type=float, default=0.0)
+    parser.add_argument("--payload-chars", type=int, default=2000)
+    parser.add_argument("--token-limit", type=int, default=10_000_000)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline results file to diff against")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(
+        turns=args.turns,
+        history=args.history,
+        tool_calls=args.tool_calls,
+        rounds=args.rounds,
+        latency=args.latency,
+        chunk_latency=args.chunk_latency,
+        payload_chars=args.payload_chars,
+        token_limit=args.token_limit,
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print_summary(result, baseline)
+    print(f"\nResults written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
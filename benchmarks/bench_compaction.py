@@ -0,0 +1,337 @@
+"""Offline compaction benchmark.
+
+Replays a long session through `CompactionService` once per strategy and
+configuration, compacting before every assistant message as the agent loop
+does, with a local stub server as the summarizer. Reports the cost of
+compaction and how much of the session it forgets.
+
+    uv run python -m benchmarks.bench_compaction --turns 80 --output compaction.json
+    uv run python -m benchmarks.bench_compaction --keep 6,10,20 --preserve 3,8 \\
+        --limit-pct 0.2,0.4 --session saved_state.json
+
+A recorded session is a JSON file with the `messages` of AgentState.model_dump()
+and, optionally, `probes`: [{"question": ..., "answer": ...}].
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from openai import OpenAI
+
+from min_cc.compaction import CompactionService, CompactionStrategy
+from min_cc.constants import (
+    SUMMARIZE_PRESERVE_COUNT,
+    TOKEN_LIMIT_PERCENTAGE,
+    TRUNCATE_KEEP_COUNT,
+)
+from min_cc.models import Message, ToolCall
+
+from .bench_agent import _git_commit
+from .stub_server import StubLLMServer
+
+
+class Probe(NamedTuple):
+    """A fact from the session: `answer` is what a model would need to see to
+    answer `question` after compaction."""
+
+    question: str
+    answer: str
+
+
+class Config(NamedTuple):
+    strategy: CompactionStrategy
+    keep_count: int
+    preserve_count: int
+    limit_pct: float
+
+
+def synthetic_session(
+    turns: int, payload_chars: int = 2000, seed: int = 0
+) -> Tuple[List[Message], List[Probe]]:
+    """A coding session where each turn states a fact in the user message and
+    reads a file whose content holds another, with a probe for each."""
+    rng = random.Random(seed)
+    messages = [Message(role="system", content="You are a coding agent.")]
+    probes = []
+    for turn in range(turns):
+        port = rng.randrange(1000, 10000)
+        messages.append(
+            Message(
+                role="user",
+                content=f"Turn {turn}: service svc{turn} must listen on port {port}.",
+            )
+        )
+        probes.append(Probe(f"port of service svc{turn}", str(port)))
+
+        path = f"pkg/mod_{turn}.py"
+        call = ToolCall(
+            id=f"call_{turn}", name="read_file", arguments=json.dumps({"path": path})
+        )
+        messages.append(Message(role="assistant", tool_calls=[call]))
+        timeout = rng.randrange(10000, 100000)
+        lines = [
+            f"def handler_{turn}_{i}(request):\n    return request\n"
+            for i in range(max(1, payload_chars // 50))
+        ]
+        lines.insert(rng.randrange(len(lines) + 1), f"TIMEOUT_{turn} = {timeout}\n")
+        messages.append(
+            Message(role="tool", content="".join(lines), tool_call_id=call.id)
+        )
+        probes.append(Probe(f"TIMEOUT_{turn} in {path}", str(timeout)))
+
+        messages.append(
+            Message(role="assistant", content=f"Configured svc{turn} in {path}.")
+        )
+    return messages, probes
+
+
+def load_session(path: str) -> Tuple[List[Message], List[Probe]]:
+    with open(path) as f:
+        data = json.load(f)
+    messages = [Message.model_validate(m) for m in data["messages"]]
+    probes = [Probe(p["question"], p["answer"]) for p in data.get("probes", [])]
+    return messages, probes
+
+
+def stub_summary(body: Dict[str, Any], max_chars: int) -> Dict[str, Any]:
+    """Stands in for the summarizer: keeps the user and assistant lines of the
+    history (not tool output), most recent first, within `max_chars`."""
+    history = body["messages"][-1]["content"]
+    kept = [
+        line
+        for line in history.splitlines()
+        if line.startswith(("user: ", "assistant: "))
+        and not line.endswith("Tool calls...")
+    ]
+    summary: List[str] = []
+    size = 0
+    for line in reversed(kept):
+        if size + len(line) > max_chars:
+            break
+        summary.append(line)
+        size += len(line) + 3
+    return {"content": " | ".join(reversed(summary))}
+
+
+def broken_pairs(messages: Sequence[Message]) -> int:
+    """Tool results without their call, plus calls without their result."""
+    called = set()
+    answered = set()
+    orphans = 0
+    for message in messages:
+        for tool_call in message.tool_calls or ():
+            called.add(tool_call.id)
+        if message.role == "tool":
+            if message.tool_call_id in called:
+                answered.add(message.tool_call_id)
+            else:
+                orphans += 1
+    return orphans + len(called - answered)
+
+
+def replay(
+    messages: List[Message],
+    probes: List[Probe],
+    service: CompactionService,
+    client=None,
+    model: str = "stub-model",
+) -> Dict[str, Any]:
+    history = [messages[0]]
+    fire_times: List[float] = []
+    before: List[float] = []
+    after: List[float] = []
+    summary_tokens = 0
+    broken = 0
+    peak = 0.0
+
+    def on_usage(call_type: str, usage: Any, model: str = None):
+        nonlocal summary_tokens
+        summary_tokens += getattr(usage, "total_tokens", 0) or 0
+
+    for message in messages[1:]:
+        if message.role == "assistant":  # the agent compacts before each LLM call
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                compacted = service.compact(
+                    history, llm_client=client, model=model, on_usage=on_usage
+                )
+            elapsed = time.perf_counter() - start
+            if compacted is not history:
+                fire_times.append(elapsed)
+                before.append(service.last_estimate[0])
+                after.append(service.last_estimate[1])
+                broken += broken_pairs(compacted)
+                history = list(compacted)
+            peak = max(peak, service._estimate_tokens(history))
+        history.append(message)
+
+    context = "\n".join(m.content or "" for m in history)
+    in_context = [p for p in probes if p.answer in context]
+    recalled = [
+        p
+        for p in probes
+        if p.answer in context or p.answer in (service.archive.recall(p.question) or "")
+    ]
+    fires = len(fire_times)
+    return {
+        "fires": fires,
+        "compaction_ms": sum(fire_times) * 1000,
+        "ms_per_fire": sum(fire_times) * 1000 / fires if fires else 0.0,
+        "tokens_before": sum(before) / fires if fires else 0.0,
+        "tokens_after": sum(after) / fires if fires else 0.0,
+        "peak_tokens": peak,
+        "final_tokens": service._estimate_tokens(history),
+        "summary_tokens": summary_tokens,
+        "broken_pairs": broken,
+        "fidelity": len(in_context) / len(probes) if probes else None,
+        "recall": len(recalled) / len(probes) if probes else None,
+    }
+
+
+def configurations(
+    strategies: Sequence[str],
+    keep_counts: Sequence[int],
+    preserve_counts: Sequence[int],
+    limit_pcts: Sequence[float],
+) -> List[Config]:
+    configs = []
+    for name in strategies:
+        strategy = CompactionStrategy(name)
+        for pct in limit_pcts:
+            if strategy == CompactionStrategy.TRUNCATE:
+                configs += [
+                    Config(strategy, k, SUMMARIZE_PRESERVE_COUNT, pct)
+                    for k in keep_counts
+                ]
+            else:
+                configs += [
+                    Config(strategy, TRUNCATE_KEEP_COUNT, p, pct)
+                    for p in preserve_counts
+                ]
+    return configs
+
+
+def run_benchmark(
+    configs: Sequence[Config],
+    messages: List[Message],
+    probes: List[Probe],
+    context_window: int = 32000,
+    summary_chars: int = 1500,
+    latency: float = 0.0,
+) -> Dict[str, Any]:
+    rows = []
+    with StubLLMServer(
+        responder=lambda body: stub_summary(body, summary_chars),
+        latency=latency,
+        record=0,
+    ) as server:
+        client = OpenAI(api_key="stub", base_url=server.base_url, max_retries=0)
+        for config in configs:
+            service = CompactionService(
+                token_limit=int(context_window * config.limit_pct),
+                strategy=config.strategy,
+                keep_count=config.keep_count,
+                preserve_count=config.preserve_count,
+            )
+            row = {
+                "strategy": config.strategy.value,
+                "keep_count": config.keep_count,
+                "preserve_count": config.preserve_count,
+                "limit_pct": config.limit_pct,
+                "token_limit": service.token_limit,
+            }
+            row.update(replay(messages, probes, service, client))
+            rows.append(row)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.time(),
+            "params": {
+                "messages": len(messages),
+                "probes": len(probes),
+                "context_window": context_window,
+                "summary_chars": summary_chars,
+                "latency": latency,
+            },
+        },
+        "rows": rows,
+    }
+
+
+def _percent(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value * 100:.0f}%"
+
+
+def print_table(result: Dict[str, Any]):
+    header = (
+        f"{'strategy':<10}{'keep':>5}{'pres':>5}{'limit':>7}{'fires':>6}"
+        f"{'ms/fire':>9}{'before':>8}{'after':>7}{'peak':>7}{'summ tok':>9}"
+        f"{'broken':>7}{'fidelity':>9}{'recall':>7}"
+    )
+    print(header)
+    for row in result["rows"]:
+        truncate = row["strategy"] == CompactionStrategy.TRUNCATE.value
+        print(
+            f"{row['strategy']:<10}"
+            f"{row['keep_count'] if truncate else '-':>5}"
+            f"{'-' if truncate else row['preserve_count']:>5}"
+            f"{row['limit_pct']:>7.2f}{row['fires']:>6}"
+            f"{row['ms_per_fire']:>9.2f}{row['tokens_before']:>8.0f}"
+            f"{row['tokens_after']:>7.0f}{row['peak_tokens']:>7.0f}"
+            f"{row['summary_tokens']:>9}{row['broken_pairs']:>7}"
+            f"{_percent(row['fidelity']):>9}{_percent(row['recall']):>7}"
+        )
+
+
+def _list(kind):
+    return lambda text: [kind(item) for item in text.split(",") if item]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--session", help="recorded session JSON (default: synthetic)")
+    parser.add_argument("--turns", type=int, default=80, help="synthetic session turns")
+    parser.add_argument("--payload-chars", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strategies", type=_list(str), default=["truncate", "summarize"])
+    parser.add_argument("--keep", type=_list(int), default=[TRUNCATE_KEEP_COUNT])
+    parser.add_argument("--preserve", type=_list(int), default=[SUMMARIZE_PRESERVE_COUNT])
+    parser.add_argument("--limit-pct", type=_list(float), default=[TOKEN_LIMIT_PERCENTAGE])
+    parser.add_argument("--context-window", type=int, default=32000)
+    parser.add_argument("--summary-chars", type=int, default=1500)
+    parser.add_argument("--latency", type=float, default=0.0, help="summarizer latency")
+    parser.add_argument("--output", default="compaction_results.json")
+    args = parser.parse_args(argv)
+
+    if args.session:
+        messages, probes = load_session(args.session)
+    else:
+        messages, probes = synthetic_session(args.turns, args.payload_chars, args.seed)
+    configs = configurations(args.strategies, args.keep, args.preserve, args.limit_pct)
+    result = run_benchmark(
+        configs,
+        messages,
+        probes,
+        context_window=args.context_window,
+        summary_chars=args.summary_chars,
+        latency=args.latency,
+    )
+
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print_table(result)
+    print(f"\nResults written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""A local OpenAI-compatible `/chat/completions` stub with scripted latency.
+
+The stub is stateless: each response is derived from the request body alone, so
+it can serve many concurrent agents without coordination.
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# A responder maps a request body to either {"content": str} or
+# {"tool_calls": [{"name": str, "arguments": str}, ...]}.
+Responder = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+CHUNK_CHARS = 16
+
+
+def _estimate_tokens(payload: Any) -> int:
+    return max(1, len(json.dumps(payload)) // 4)
+
+
+class ScriptedSession:
+    """Answers each user turn with `rounds` rounds of `calls_per_round` tool calls
+    followed by a final text answer."""
+
+    def __init__(
+        self,
+        rounds: int = 1,
+        calls_per_round: int = 2,
+        tool_name: str = "read_file",
+        tool_args: Optional[List[Dict[str, Any]]] = None,
+        final_text: str = "Done.",
+    ):
+        self.rounds = rounds
+        self.calls_per_round = calls_per_round
+        self.tool_name = tool_name
+        self.tool_args = tool_args or [{"path": "README.md"}]
+        self.final_text = final_text
+
+    def __call__(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        messages = body.get("messages", [])
+        # Count assistant tool rounds since the last user message
+        rounds_done = 0
+        for m in reversed(messages):
+            if m["role"] == "user":
+                break
+            if m["role"] == "assistant" and m.get("tool_calls"):
+                rounds_done += 1
+
+        if rounds_done >= self.rounds or not body.get("tools"):
+            return {"content": self.final_text}
+
+        return {
+            "tool_calls": [
+                {
+                    "name": self.tool_name,
+                    "arguments": json.dumps(
+                        self.tool_args[(rounds_done + i) % len(self.tool_args)]
+                    ),
+                }
+                for i in range(self.calls_per_round)
+            ]
+        }
+
+
+class StubLLMServer:
+    """Serves `POST .../chat/completions` (plain and streamed) and `GET .../models`.
+
+    `latency` is the delay before a non-streamed response or before the first
+    streamed chunk; `chunk_latency` is the delay between streamed chunks.
+    `requests` holds the last `record` request bodies for tests to inspect
+    (benchmarks pass 0 so the stub's memory stays flat); `request_count`
+    counts all of them.
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Responder] = None,
+        latency: float = 0.0,
+        chunk_latency: float = 0.0,
+        models: Optional[List[Dict[str, Any]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        record: int = 100,
+    ):
+        self.responder = responder or ScriptedSession()
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.models = models or [{"id": "stub-model", "context_length": 128000}]
+        self.requests: Deque[Dict[str, Any]] = deque(maxlen=record)
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this Nagle's
+            # algorithm adds ~40ms per response on loopback.
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict[str, Any]):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"data": server.models})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                with server._lock:
+                    server.request_count += 1
+                    server.requests.append(body)
+                reply = server.responder(body)
+                if body.get("stream"):
+                    self._stream(body, reply)
+                else:
+                    time.sleep(server.latency)
+                    self._send_json(200, server._completion(body, reply))
+
+            def _stream(self, body: Dict[str, Any], reply: Dict[str, Any]):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                time.sleep(server.latency)
+                chunks = server._chunks(body, reply)
+                for i, chunk in enumerate(chunks):
+                    if i and server.chunk_latency:
+                        time.sleep(server.chunk_latency)
+                    self._write_event(json.dumps(chunk))
+                self._write_event("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_event(self, data: str):
+                payload = f"data: {data}\n\n".encode()
+                self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def _usage(self, body: Dict[str, Any], reply: Dict[str, Any]) -> Dict[str, int]:
+        prompt_tokens = _estimate_tokens(body.get("messages", []))
+        completion_tokens = _estimate_tokens(reply)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _completion(self, body: Dict[str, Any], reply: Dict[str, Any]) -> Dict[str, Any]:
+        message: Dict[str, Any] = {"role": "assistant", "content": reply.get("content")}
+        finish_reason = "stop"
+        if reply.get("tool_calls"):
+            finish_reason = "tool_calls"
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": tc["name"], "arguments": tc["arguments"]},
+                }
+                for tc in reply["tool_calls"]
+            ]
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub-model"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": self._usage(body, reply),
+        }
+
+    def _chunks(self, body: Dict[str, Any], reply: Dict[str, Any]) -> List[Dict[str, Any]]:
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub-model"),
+        }
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None):
+            return {
+                **base,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        chunks = [chunk({"role": "assistant", "content": ""})]
+        content = reply.get("content") or ""
+        for i in range(0, len(content), CHUNK_CHARS):
+            chunks.append(chunk({"content": content[i : i + CHUNK_CHARS]}))
+
+        for index, tc in enumerate(reply.get("tool_calls") or []):
+            chunks.append(
+                chunk(
+                    {
+                        "tool_calls": [
+                            {
+                                "index": index,
+                                "id": f"call_{uuid.uuid4().hex[:12]}",
+                                "type": "function",
+                                "function": {"name": tc["name"], "arguments": ""},
+                            }
+                        ]
+                    }
+                )
+            )
+            args = tc["arguments"]
+            for i in range(0, len(args), CHUNK_CHARS):
+                chunks.append(
+                    chunk(
+                        {
+                            "tool_calls": [
+                                {
+                                    "index": index,
+                                    "function": {"arguments": args[i : i + CHUNK_CHARS]},
+                                }
+                            ]
+                        }
+                    )
+                )
+
+        chunks.append(chunk({}, "tool_calls" if reply.get("tool_calls") else "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunks.append({**base, "choices": [], "usage": self._usage(body, reply)})
+        return chunks
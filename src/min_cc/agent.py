@@ -1,15 +1,100 @@
-import json
-from typing import Any, Callable, Dict, List, Optional
+import copy
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
 from openai import OpenAI
 
+from .blobs import BlobRef, BlobStore, get_blob_store
+from .cancellation import CancelToken, Cancelled, get_current_token, use_token
+from .checkpoints import CheckpointStore
 from .compaction import CompactionService
-from .constants import DEFAULT_BASE_URL, DEFAULT_MODEL
-from .models import AgentState, Message, ToolCall
+from .constants import BLOB_MIN_CHARS, DEFAULT_BASE_URL, DEFAULT_MODEL
+from .dedup import ResultIndex, dedupe_latest_result
+from .events import (
+    Backpressure,
+    Compacted,
+    EventBus,
+    LLMRequest,
+    LLMResponse,
+    ToolFinished,
+    ToolStarted,
+    TurnEnded,
+    TurnStarted,
+    callback_handler,
+)
+from .models import AgentState, Message, ToolCall, ToolResult
+from .routing import ModelRouter
+from .streaming import Speculator, StreamedResponse
 from .tools import ToolRegistry, get_default_registry
+from .tracing import Tracer
+from .transport import abort_response, llm_client_kwargs
+from .usage import (
+    record_dedup,
+    record_tool_result,
+    record_usage,
+    start_turn,
+    usage_summary,
+)
 from .utils import get_full_system_prompt
 
 
+class BudgetExceeded(Exception):
+    pass
+
+
+# Result recorded for tool calls a cancelled turn never ran
+CANCELLED_RESULT = "Error: cancelled by the user before this tool call ran."
+
+
+# The agent whose turn is running in this context, for tools that act on it
+_current_agent: ContextVar[Optional["CodingAgent"]] = ContextVar(
+    "current_agent", default=None
+)
+
+
+def get_current_agent() -> Optional["CodingAgent"]:
+    return _current_agent.get()
+
+
+def _close_stream(stream):
+    try:
+        response = getattr(stream, "response", None)  # an SDK Stream over httpx
+        if response is not None:
+            abort_response(response)
+        stream.close()
+    except Exception:
+        pass  # e.g. a wrapping generator already executing in another thread
+
+
+def _serialize_message(msg: Message) -> Dict[str, Any]:
+    """Blob-backed content is left as its BlobRef; see _resolve_blob."""
+    m = {"role": msg.role}
+    if msg.blob is not None:
+        m["content"] = msg.blob
+    elif msg.content:
+        m["content"] = msg.content
+    if msg.tool_calls:
+        m["tool_calls"] = [
+            {
+                "id": tc.id,
+                "type": "function",
+                "function": {"name": tc.name, "arguments": tc.arguments},
+            }
+            for tc in msg.tool_calls
+        ]
+    if msg.tool_call_id:
+        m["tool_call_id"] = msg.tool_call_id
+    return m
+
+
+def _resolve_blob(m: Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(m.get("content"), BlobRef):
+        return dict(m, content=m["content"].read())
+    return m
+
+
 class CodingAgent:
     def __init__(
         self,
@@ -17,16 +102,53 @@ class CodingAgent:
         model: str = DEFAULT_MODEL,
         registry: ToolRegistry = None,
         compaction_service: CompactionService = None,
+        base_url: str = DEFAULT_BASE_URL,
+        client=None,
+        tracer: Tracer = None,
+        pricing_lookup: Optional[Callable[[str], Optional[Dict[str, float]]]] = None,
+        root: Optional[str] = None,
+        token_budget: Optional[int] = None,
+        blob_store: Optional[BlobStore] = None,
+        router: Optional[ModelRouter] = None,
     ):
-        self.client = OpenAI(api_key=api_key, base_url=DEFAULT_BASE_URL)
+        self.client = client or OpenAI(
+            api_key=api_key, base_url=base_url, **llm_client_kwargs()
+        )
         self.model = model
-        self.registry = registry or get_default_registry()
+        # Workspace directory for tools and Min-CC.md; None means the process cwd
+        self.root = root
+        self.registry = registry or get_default_registry(root=root)
         self.compaction_service = compaction_service or CompactionService()
+        self.tracer = tracer or Tracer()
+        # e.g. utils.get_model_pricing; without it usage is recorded at zero cost
+        self.pricing_lookup = pricing_lookup
+        # Max prompt + completion tokens per session before run() stops
+        self.token_budget = token_budget
+        # Sends auxiliary calls (summaries, sub-agents) to cheaper models if configured
+        self.router = router or ModelRouter()
+        # Large tool outputs are stored here (deduplicated, compressed) by reference
+        self.blob_store = blob_store or get_blob_store()
+        # Replace earlier copies of repeated tool results with back-references
+        self.dedupe_results = True
+        self._results = ResultIndex()  # the history's tool results, for dedup
+        # Per-turn snapshots of files edited by tools, for rewind()
+        self.checkpoints = CheckpointStore(root)
+        # Absolute paths of files write tools have modified this session
+        self.changed_files: Set[str] = set()
+        # Turn, LLM, tool and compaction events, dispatched off the agent loop
+        self.events = EventBus()
+        # (history, its serialization) of the last _prepare_messages call
+        self._serialized: Tuple[List[Message], List[Dict[str, Any]]] = ([], [])
 
         self.state = AgentState(
-            messages=[Message(role="system", content=get_full_system_prompt())]
+            messages=[Message(role="system", content=self._system_prompt())]
         )
 
+    def _system_prompt(self) -> str:
+        # A RemoteToolRegistry serves the worker's Min-CC.md and repository map
+        remote = getattr(self.registry, "system_prompt", None)
+        return remote() if remote else get_full_system_prompt(self.root)
+
     def add_message(
         self,
         role: str,
@@ -34,6 +156,8 @@ class CodingAgent:
         tool_calls: List[ToolCall] = None,
         tool_call_id: str = None,
     ):
+        if role == "tool" and content and len(content) >= BLOB_MIN_CHARS:
+            content = self.blob_store.put(content)
         self.state.messages.append(
             Message(
                 role=role,
@@ -43,86 +167,351 @@ class CodingAgent:
             )
         )
 
+    def _record_usage(self, call_type: str, usage: Any, model: str = None):
+        model = model or self.model
+        pricing = self.pricing_lookup(model) if self.pricing_lookup else None
+        return record_usage(
+            self.state.metadata, call_type, usage, pricing=pricing, model=model
+        )
+
+    def _check_budget(self):
+        if not self.token_budget:
+            return
+        total = usage_summary(self.state.metadata)["total"]
+        used = total["prompt_tokens"] + total["completion_tokens"]
+        if used >= self.token_budget:
+            raise BudgetExceeded(
+                f"Token budget exhausted ({used} of {self.token_budget} tokens used)."
+            )
+
+    def _prepare_messages(self) -> List[Dict[str, Any]]:
+        """Serialize the internal history into OpenAI chat message dicts.
+
+        Messages are replaced rather than edited, so the serialized prefix from
+        the previous call is reused up to the first message that changed. The
+        cache keeps blob-backed content as its BlobRef, read again per call.
+        """
+        history = list(self.state.messages)
+        previous, serialized = self._serialized
+        reused = 0
+        for old, new in zip(previous, history):
+            if old is not new:
+                break
+            reused += 1
+        serialized = serialized[:reused] + [
+            _serialize_message(msg) for msg in history[reused:]
+        ]
+        self._serialized = (history, serialized)
+        return [_resolve_blob(m) for m in serialized]
+
+    def spawn_subagent(
+        self,
+        tool_names: Sequence[str],
+        instructions: str = "",
+        token_budget: Optional[int] = None,
+    ) -> "CodingAgent":
+        """A child agent with a fresh history and a subset of this agent's tools,
+        sharing its client, workspace, tracer and pricing."""
+        child = CodingAgent(
+            api_key="",
+            model=self.router.model_for("subagent", self.model),
+            client=self.client,
+            registry=self.registry.subset(tool_names),
+            compaction_service=CompactionService(
+                token_limit=self.router.token_limit_for(
+                    "subagent", self.compaction_service.token_limit
+                )
+            ),
+            tracer=self.tracer,
+            pricing_lookup=self.pricing_lookup,
+            root=self.root,
+            token_budget=token_budget,
+            blob_store=self.blob_store,
+            router=self.router,
+        )
+        if instructions:
+            child.state.messages[0].content += f"\n\n{instructions}"
+        return child
+
     def run(
         self,
         user_input: str,
         on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        cancel: Optional[CancelToken] = None,
     ):
-        self.add_message("user", user_input)
+        """Run one turn. Cancelling `cancel` (from another thread) aborts the LLM
+        stream and running commands, then raises Cancelled with the history
+        left consistent.
 
-        while True:
-            # 1. Compact if necessary
+        `on_event(type, data)`, if given, is subscribed to `events` for this turn;
+        all of the turn's events have been delivered to it when run returns.
+        """
+        subscription = None
+        if on_event:
+            subscription = self.events.subscribe(
+                callback_handler(on_event), policy=Backpressure.BLOCK
+            )
+        context_token = _current_agent.set(self)
+        try:
+            with use_token(cancel or CancelToken()):
+                return self._run_turn(user_input)
+        finally:
+            _current_agent.reset(context_token)
+            if subscription:
+                self.events.unsubscribe(subscription)
+
+    def _run_turn(self, user_input: str):
+        with self.tracer.span("agent.turn", model=self.model) as turn_span:
+            self.checkpoints.begin_turn(self.state.messages)
+            self.add_message("user", user_input)
+            start_turn(self.state.metadata)
+            self.events.publish(TurnStarted(user_input, self.model))
+            start = time.perf_counter()
+            counts = {"llm_calls": 0, "tool_calls": 0}
+            outcome = "error"
+            try:
+                content = self._turn_loop(counts)
+                outcome = "done"
+                return content
+            except (Cancelled, KeyboardInterrupt):
+                self._answer_pending_tool_calls()
+                turn_span.set_attributes(cancelled=True)
+                outcome = "cancelled"
+                raise
+            finally:
+                turn_span.set_attributes(**counts)
+                self.events.publish(
+                    TurnEnded(outcome, **counts, duration_s=time.perf_counter() - start)
+                )
+
+    def compact(self):
+        """Compact the history if it is over the compaction service's limit."""
+        with self.tracer.span("agent.compaction") as span:
+            messages = self.state.messages
             self.state.messages = self.compaction_service.compact(
-                self.state.messages, llm_client=self.client, model=self.model
+                messages,
+                llm_client=self.client,
+                model=self.router.model_for("summarization", self.model),
+                on_usage=self._record_usage,
+                summary_token_limit=self.router.token_limit_for(
+                    "summarization", default=None
+                ),
+            )
+            before, after = getattr(
+                self.compaction_service, "last_estimate", (None, None)
+            )
+            span.set_attributes(
+                tokens_before=before,
+                tokens_after=after,
+                messages=len(self.state.messages),
+            )
+        if self.state.messages is not messages:
+            strategy = getattr(self.compaction_service, "strategy", "")
+            self.events.publish(
+                Compacted(str(strategy), before, after, len(self.state.messages))
             )
 
+    def _turn_loop(self, counts: Dict[str, int]):
+        cancel = get_current_token()
+        while True:
+            cancel.check()
+            self._check_budget()
+
+            # 1. Compact if necessary
+            self.compact()
+
             # 2. Prepare messages
-            messages = []
-            for msg in self.state.messages:
-                m = {"role": msg.role}
-                if msg.content:
-                    m["content"] = msg.content
-                if msg.tool_calls:
-                    m["tool_calls"] = [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {"name": tc.name, "arguments": tc.arguments},
-                        }
-                        for tc in msg.tool_calls
-                    ]
-                if msg.tool_call_id:
-                    m["tool_call_id"] = msg.tool_call_id
-                messages.append(m)
-
-            # 3. Call LLM
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=self.registry.get_tool_definitions(),
-                tool_choice="auto",
-            )
+            with self.tracer.span("agent.serialize") as span:
+                messages = self._prepare_messages()
+                span.set_attributes(messages=len(messages))
 
-            assistant_msg = response.choices[0].message
+            # 3. Stream the LLM response, starting read-only tools early
+            speculator = Speculator(self.registry)
+            try:
+                with self.tracer.span("llm.call", model=self.model) as span:
+                    start = time.perf_counter()
+                    response = self._call_llm(messages, speculator)
+                    span.set_attributes(
+                        ttft_s=response.ttft, speculated=speculator.dispatched
+                    )
+                    tokens = self._record_usage("main", response.usage)
+                    span.set_attributes(**tokens)
+                counts["llm_calls"] += 1
 
-            # Format tool calls for our internal model
-            internal_tool_calls = None
-            if assistant_msg.tool_calls:
-                internal_tool_calls = [
-                    ToolCall(
-                        id=tc.id, name=tc.function.name, arguments=tc.function.arguments
+                internal_tool_calls = response.tool_calls()
+                self.events.publish(
+                    LLMResponse(
+                        self.model,
+                        response.ttft,
+                        time.perf_counter() - start,
+                        tokens["prompt_tokens"],
+                        tokens["completion_tokens"],
+                        len(internal_tool_calls),
                     )
-                    for tc in assistant_msg.tool_calls
-                ]
+                )
+                self.add_message(
+                    role="assistant",
+                    content=response.content,
+                    tool_calls=internal_tool_calls or None,
+                )
 
-            self.add_message(
-                role="assistant",
-                content=assistant_msg.content,
-                tool_calls=internal_tool_calls,
-            )
+                if not internal_tool_calls:
+                    # Agent is finished with this turn
+                    return response.content
 
-            if not assistant_msg.tool_calls:
-                # Agent is finished with this turn
-                return assistant_msg.content
-
-            # 4. Handle tool calls
-            for tool_call in assistant_msg.tool_calls:
-                if on_event:
-                    on_event(
-                        "tool_call",
-                        {
-                            "name": tool_call.function.name,
-                            "arguments": tool_call.function.arguments,
-                        },
+                # 4. Handle tool calls
+                for tool_call in internal_tool_calls:
+                    cancel.check()
+                    self.events.publish(
+                        ToolStarted(tool_call.id, tool_call.name, tool_call.arguments)
                     )
 
-                args = json.loads(tool_call.function.arguments)
-                result_content = self.registry.call_tool(tool_call.function.name, args)
+                    result = self._execute_tool_call(
+                        tool_call, speculator.take(tool_call)
+                    )
+                    counts["tool_calls"] += 1
+                    record_tool_result(
+                        self.state.metadata, tool_call.name, result.content
+                    )
 
+                    self.add_message(
+                        role="tool", content=result.content, tool_call_id=tool_call.id
+                    )
+                    if self.dedupe_results:
+                        record_dedup(
+                            self.state.metadata,
+                            *dedupe_latest_result(self.state.messages, self._results),
+                        )
+            finally:
+                speculator.discard()
+
+    def _call_llm(
+        self, messages: List[Dict[str, Any]], speculator: Optional[Speculator] = None
+    ) -> StreamedResponse:
+        start = time.perf_counter()
+        tools = self.registry.get_tool_definitions()
+        self.events.publish(LLMRequest(self.model, len(messages), len(tools)))
+        cancel = get_current_token()
+        # Until headers arrive (and between retries) the transport watches the
+        # token; the SDK wraps the Cancelled it raises in its own error
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                tools=tools,
+                tool_choice="auto",
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        except Exception:
+            if cancel and cancel.cancelled:
+                raise Cancelled("Turn cancelled.") from None
+            raise
+        response = StreamedResponse()
+        # Closing the stream from the cancelling thread aborts the HTTP read
+        unregister = cancel.on_cancel(lambda: _close_stream(stream)) if cancel else None
+        try:
+            for chunk in stream:
+                if cancel:
+                    cancel.check()
+                if response.add_chunk(chunk) and response.ttft is None:
+                    response.ttft = time.perf_counter() - start
+                if speculator:
+                    speculator.update(response)
+        except Exception:
+            if cancel and cancel.cancelled:
+                _close_stream(stream)
+                raise Cancelled("Turn cancelled.") from None
+            raise
+        finally:
+            if unregister:
+                unregister()
+        return response
+
+    def _execute_tool_call(self, tool_call: ToolCall, speculative=None) -> ToolResult:
+        """Run `tool_call`, or wait for the matching speculative run if there is one."""
+        with self.tracer.span("tool.execute", tool=tool_call.name) as span:
+            if speculative is not None:
+                result, elapsed = speculative.result()
+                span.set_attributes(speculative=True, exec_s=elapsed)
+            else:
+                start = time.perf_counter()
+                result = self.registry.execute(
+                    tool_call.id,
+                    tool_call.name,
+                    tool_call.arguments,
+                    on_write=self._on_write,
+                )
+                elapsed = time.perf_counter() - start
+            size = len(result.content.encode())
+            span.set_attributes(bytes=size, is_error=result.is_error)
+        self.events.publish(
+            ToolFinished(
+                tool_call.id,
+                tool_call.name,
+                elapsed,
+                result.is_error,
+                size,
+                speculative is not None,
+            )
+        )
+        return result
+
+    def _on_write(self, paths: List[str]):
+        self.checkpoints.snapshot(paths)
+        self.changed_files.update(os.path.abspath(p) for p in paths)
+
+    def _answer_pending_tool_calls(self):
+        """Give each unanswered tool call of the last assistant message a
+        cancelled result, so an interrupted turn leaves a valid history."""
+        messages = self.state.messages
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].role == "assistant":
+                break
+        else:
+            return
+        answered = {m.tool_call_id for m in messages[i + 1 :] if m.role == "tool"}
+        for tool_call in messages[i].tool_calls or ():
+            if tool_call.id not in answered:
                 self.add_message(
-                    role="tool", content=result_content, tool_call_id=tool_call.id
+                    role="tool", content=CANCELLED_RESULT, tool_call_id=tool_call.id
                 )
 
+    def rewind(self, turns: int = 1) -> List[Tuple[str, str]]:
+        """Undo the last `turns` turns: restore the files they edited and the
+        history from before them. Returns (action, path) per file."""
+        messages, changes = self.checkpoints.rewind(turns)
+        self.state.messages = messages
+        return changes
+
+    def close(self):
+        """Release resources held on disk (checkpoint snapshots)."""
+        self.checkpoints.close()
+
+    def fork(self, root: Optional[str] = None) -> "CodingAgent":
+        """A copy of this agent that continues from the current history. The
+        history is shared rather than copied, so forking is O(1) in its length.
+
+        With `root`, the fork's tools work in that directory instead (see
+        ForkManager for isolated workspaces). The fork starts with its own
+        usage accounting, checkpoints, set of changed files and event bus, so
+        concurrent forks' events don't reach each other's subscribers.
+        """
+        fork = copy.copy(self)
+        fork.state = AgentState(messages=self.state.messages.fork())
+        fork.compaction_service = copy.copy(self.compaction_service)
+        fork.compaction_service.archive = self.compaction_service.archive.fork()
+        if root is not None:
+            fork.root = root
+            fork.registry = self.registry.rooted(root)
+        fork.checkpoints = CheckpointStore(fork.root)
+        fork.changed_files = set()
+        fork.events = EventBus()
+        fork._results = ResultIndex()
+        return fork
+
     def clear_history(self):
         """Reset the conversation history, keeping only the system prompt."""
-        self.state.messages = [Message(role="system", content=get_full_system_prompt())]
+        self.state.messages = [
+            Message(role="system", content=self._system_prompt())
+        ]
@@ -0,0 +1,183 @@
+import json
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .constants import (
+    ARCHIVE_CHUNK_CHARS,
+    CHARS_PER_TOKEN,
+    RECALL_MAX_RESULTS,
+    RECALL_MAX_TOKENS,
+)
+from .models import Message
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL = re.compile(r"[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])")
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words; identifiers also yield their snake_case and camelCase
+    parts, so `parse_file` matches a query for "parse"."""
+    tokens = []
+    for word in _WORD.findall(text):
+        tokens.append(word.lower())
+        parts = [p for piece in word.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts)
+    return tokens
+
+
+def _chunks(text: str, size: int) -> Iterable[str]:
+    """Split on line boundaries into pieces of about `size` characters."""
+    chunk: List[str] = []
+    length = 0
+    for line in text.splitlines(keepends=True):
+        if chunk and length + len(line) > size:
+            yield "".join(chunk)
+            chunk, length = [], 0
+        while len(line) > size:  # one huge line (minified code, JSON)
+            yield line[:size]
+            line = line[size:]
+        chunk.append(line)
+        length += len(line)
+    if chunk:
+        yield "".join(chunk)
+
+
+def _describe_call(name: str, arguments: str) -> str:
+    try:
+        args = json.loads(arguments or "{}")
+    except ValueError:
+        args = {}
+    if not isinstance(args, dict):
+        args = {}
+    shown = ", ".join(
+        f"{k}={v!r}" for k, v in args.items() if isinstance(v, (str, int, bool))
+    )
+    if len(shown) > 120:
+        shown = shown[:117] + "..."
+    return f"{name}({shown})"
+
+
+class HistoryArchive:
+    """Messages removed from the history by compaction, kept in an in-memory
+    BM25 index so the agent can recall them instead of repeating tool calls.
+
+    Each message is split into chunks of about ARCHIVE_CHUNK_CHARS, labelled
+    with its role or, for tool results, the call that produced it.
+    """
+
+    def __init__(self, chunk_chars: int = ARCHIVE_CHUNK_CHARS):
+        self.chunk_chars = chunk_chars
+        self.labels: List[str] = []
+        self.texts: List[str] = []
+        self.lengths: List[int] = []  # in tokens
+        self.postings: Dict[str, Dict[int, int]] = {}  # term -> {chunk: frequency}
+        # Terms whose posting list is this archive's alone; the others may be
+        # shared with forks and are copied before they are changed
+        self._owned: Set[str] = set()
+        self.messages = 0
+        self._total_length = 0
+        # tool_call_id -> description of the call, to label its result
+        self._calls: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, messages: Iterable[Message]):
+        for message in messages:
+            if message.role == "system":
+                continue
+            self.messages += 1
+            for tool_call in message.tool_calls or []:
+                description = _describe_call(tool_call.name, tool_call.arguments)
+                self._calls[tool_call.id] = description
+                self._add_chunk(f"assistant called {description}", description)
+            if message.role == "tool":
+                call = self._calls.pop(message.tool_call_id, None)
+                label = f"result of {call}" if call else "tool result"
+            else:
+                label = f"{message.role} message"
+            for chunk in _chunks(message.content or "", self.chunk_chars):
+                if chunk.strip():
+                    self._add_chunk(label, chunk)
+
+    def _add_chunk(self, label: str, text: str):
+        chunk_id = len(self.texts)
+        terms = tokenize(label) + tokenize(text)
+        self.labels.append(label)
+        self.texts.append(text)
+        self.lengths.append(len(terms))
+        self._total_length += len(terms)
+        for term in terms:
+            if term not in self._owned:
+                self.postings[term] = dict(self.postings.get(term, ()))
+                self._owned.add(term)
+            postings = self.postings[term]
+            postings[chunk_id] = postings.get(chunk_id, 0) + 1
+
+    def search(
+        self, query: str, limit: int = RECALL_MAX_RESULTS
+    ) -> List[Tuple[int, float]]:
+        """(chunk id, BM25 score) of the best matches, best first."""
+        if not self.texts:
+            return []
+        n = len(self.texts)
+        average = self._total_length / n or 1
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings.items():
+                norm = _K1 * (1 - _B + _B * self.lengths[chunk_id] / average)
+                score = idf * frequency * (_K1 + 1) / (frequency + norm)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def recall(
+        self,
+        query: str,
+        max_tokens: int = RECALL_MAX_TOKENS,
+        limit: int = RECALL_MAX_RESULTS,
+    ) -> Optional[str]:
+        """The best-matching archived snippets, in conversation order, within
+        `max_tokens`; None if nothing matches."""
+        budget = max_tokens * CHARS_PER_TOKEN
+        picked = []
+        for chunk_id, _ in self.search(query, limit):
+            text = self.texts[chunk_id]
+            if len(text) > budget:
+                if picked:
+                    continue  # a smaller later match may still fit
+                text = text[:budget] + "\n... (truncated)"
+            picked.append((chunk_id, text))
+            budget -= len(text)
+            if budget <= 0:
+                break
+        if not picked:
+            return None
+        return "\n\n".join(
+            f"[{self.labels[chunk_id]}]\n{text.rstrip()}"
+            for chunk_id, text in sorted(picked)
+        )
+
+    def fork(self) -> "HistoryArchive":
+        """An independent copy; the chunk texts and posting lists are shared,
+        the latter until either archive adds to them."""
+        archive = HistoryArchive(self.chunk_chars)
+        archive.labels = list(self.labels)
+        archive.texts = list(self.texts)
+        archive.lengths = list(self.lengths)
+        archive.postings = dict(self.postings)
+        self._owned = set()
+        archive.messages = self.messages
+        archive._total_length = self._total_length
+        archive._calls = dict(self._calls)
+        return archive
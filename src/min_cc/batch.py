@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .agent import BudgetExceeded, CodingAgent
+from .compaction import CompactionService
+from .constants import DEFAULT_MODEL
+from .recall import RecallTool
+from .routing import ModelRouter
+from .subagent import TaskTool
+from .testselect import RunTestsTool
+from .transport import StreamWrapper
+from .usage import usage_summary
+from .utils import get_model_pricing, get_token_limit
+
+
+class BatchTask(BaseModel):
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex[:8])
+    prompt: str
+    cwd: str = "."
+    model: str = DEFAULT_MODEL
+    budget: Optional[int] = None  # max prompt + completion tokens
+
+
+class TaskResult(BaseModel):
+    id: str
+    status: str  # "ok" | "error" | "budget_exceeded"
+    response: Optional[str] = None
+    error: Optional[str] = None
+    metrics: Dict[str, Any] = Field(default_factory=dict)
+
+
+class LLMGovernor:
+    """Caps concurrent LLM calls and, optionally, their rate across all workers."""
+
+    def __init__(self, max_concurrent: int = 8, requests_per_minute: float = None):
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._semaphore:
+            if self._interval:
+                with self._lock:
+                    now = time.monotonic()
+                    wait = max(0.0, self._next_slot - now)
+                    self._next_slot = max(now, self._next_slot) + self._interval
+                if wait:
+                    time.sleep(wait)
+            yield
+
+
+class GovernedClient:
+    """Routes `chat.completions.create` through an LLMGovernor."""
+
+    def __init__(self, client, governor: LLMGovernor):
+        self.client = client
+        self.governor = governor
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+    def create(self, **kwargs):
+        if kwargs.get("stream"):
+            return self._stream(kwargs)
+        with self.governor.slot():
+            return self.client.chat.completions.create(**kwargs)
+
+    def _stream(self, kwargs: Dict[str, Any]) -> StreamWrapper:
+        # Hold the slot until the stream is consumed or closed, not just until
+        # headers arrive
+        with ExitStack() as slot:
+            slot.enter_context(self.governor.slot())
+            stream = self.client.chat.completions.create(**kwargs)
+            return StreamWrapper(stream, iter(stream), on_close=slot.pop_all().close)
+
+
+def run_task(
+    task: BatchTask,
+    client,
+    token_limit: Optional[int] = None,
+    pricing_lookup: Optional[Callable[[str], Optional[Dict[str, float]]]] = None,
+    router: Optional[ModelRouter] = None,
+) -> TaskResult:
+    """Run one task with an isolated agent rooted at the task's cwd."""
+    start = time.perf_counter()
+    root = os.path.abspath(task.cwd)
+    result = TaskResult(id=task.id, status="ok")
+    agent = None
+    try:
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Working directory {task.cwd} does not exist.")
+        agent = CodingAgent(
+            api_key="",
+            model=task.model,
+            client=client,
+            root=root,
+            compaction_service=CompactionService(
+                token_limit=token_limit or get_token_limit(task.model)
+            ),
+            pricing_lookup=pricing_lookup,
+            token_budget=task.budget,
+            router=router,
+        )
+        agent.registry.register_tool(TaskTool(root=root))
+        agent.registry.register_tool(RunTestsTool(root=root))
+        agent.registry.register_tool(RecallTool())
+        result.response = agent.run(task.prompt)
+    except BudgetExceeded as e:
+        result.status, result.error = "budget_exceeded", str(e)
+    except Exception as e:
+        result.status, result.error = "error", f"{type(e).__name__}: {e}"
+
+    result.metrics["duration_s"] = round(time.perf_counter() - start, 3)
+    if agent is not None:
+        summary = usage_summary(agent.state.metadata)
+        result.metrics.update(
+            llm_calls=summary["total"]["calls"],
+            tool_calls=sum(t["calls"] for t in summary["tools"].values()),
+            prompt_tokens=summary["total"]["prompt_tokens"],
+            completion_tokens=summary["total"]["completion_tokens"],
+            cost=summary["total"]["cost"],
+            messages=len(agent.state.messages),
+        )
+        agent.close()
+    return result
+
+
+def run_batch(
+    tasks: List[BatchTask],
+    client,
+    workers: int = 4,
+    governor: Optional[LLMGovernor] = None,
+    on_result: Optional[Callable[[TaskResult], None]] = None,
+    token_limit: Optional[int] = None,
+    pricing_lookup: Optional[Callable[[str], Optional[Dict[str, float]]]] = get_model_pricing,
+    router: Optional[ModelRouter] = None,
+) -> List[TaskResult]:
+    """Run tasks on a worker pool sharing one (governed) client; results are passed to
+    `on_result` as they complete and returned in task order."""
+    if governor is not None:
+        client = GovernedClient(client, governor)
+
+    def work(task: BatchTask) -> TaskResult:
+        result = run_task(task, client, token_limit, pricing_lookup, router)
+        if on_result:
+            on_result(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(work, tasks))
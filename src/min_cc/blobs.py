@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .constants import BLOB_CACHE_BYTES
+
+
+class BlobRef:
+    """A reference to text held by a BlobStore. The blob is released when the last
+    reference to it is garbage collected."""
+
+    __slots__ = ("store", "key", "length")
+
+    def __init__(self, store: "BlobStore", key: str, length: int):
+        self.store = store
+        self.key = key  # sha256 of the UTF-8 text
+        self.length = length  # in characters
+
+    def read(self) -> str:
+        return self.store.get(self.key)
+
+    def __del__(self):
+        try:
+            self.store.release(self.key)
+        except Exception:
+            pass  # interpreter shutdown
+
+
+class BlobStore:
+    """Content-addressed, reference-counted storage for large strings.
+
+    Identical texts are stored once. Blobs are zlib-compressed and kept in memory,
+    or written to `directory` when one is given; recently read texts are cached
+    decoded, up to `cache_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        compress: bool = True,
+        cache_bytes: int = BLOB_CACHE_BYTES,
+    ):
+        self.directory = directory
+        self.compress = compress
+        self.cache_bytes = cache_bytes
+        self._blobs: Dict[str, bytes] = {}
+        self._sizes: Dict[str, int] = {}  # stored (possibly compressed) bytes
+        self._refs: Dict[str, int] = {}
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cached_chars = 0
+        # Re-entrant: BlobRef.__del__ may run from a GC pass inside a locked section
+        self._lock = threading.RLock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def put(self, text: str) -> BlobRef:
+        data = text.encode()
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._refs[key] = self._refs.get(key, 0) + 1
+            if key not in self._sizes:
+                stored = zlib.compress(data) if self.compress else data
+                if self.directory:
+                    with open(self._path(key), "wb") as f:
+                        f.write(stored)
+                else:
+                    self._blobs[key] = stored
+                self._sizes[key] = len(stored)
+            self._cache_put(key, text)
+        return BlobRef(self, key, len(text))
+
+    def get(self, key: str) -> str:
+        with self._lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+                return text
+            if self.directory:
+                with open(self._path(key), "rb") as f:
+                    stored = f.read()
+            else:
+                stored = self._blobs[key]
+            text = (zlib.decompress(stored) if self.compress else stored).decode()
+            self._cache_put(key, text)
+            return text
+
+    def release(self, key: str):
+        with self._lock:
+            count = self._refs.get(key, 0) - 1
+            if count > 0:
+                self._refs[key] = count
+                return
+            self._refs.pop(key, None)
+            self._sizes.pop(key, None)
+            self._blobs.pop(key, None)
+            text = self._cache.pop(key, None)
+            if text is not None:
+                self._cached_chars -= len(text)
+            if self.directory:
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+
+    def _cache_put(self, key: str, text: str):
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return
+        self._cache[key] = text
+        self._cached_chars += len(text)
+        while self._cached_chars > self.cache_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_chars -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "blobs": len(self._sizes),
+                "references": sum(self._refs.values()),
+                "stored_bytes": sum(self._sizes.values()),
+                "cached_chars": self._cached_chars,
+            }
+
+
+_default_store: Optional[BlobStore] = None
+_default_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """The process-wide store shared by all agents; spills to disk under BLOB_DIR
+    (one subdirectory per process) when that is set."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            base = os.getenv("BLOB_DIR")
+            directory = os.path.join(base, str(os.getpid())) if base else None
+            _default_store = BlobStore(directory=directory)
+        return _default_store
@@ -0,0 +1,85 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+
+class Cancelled(Exception):
+    """Raised inside a turn once its CancelToken has been cancelled."""
+
+
+class CancelToken:
+    """Cooperative cancellation for one agent turn.
+
+    `cancel()` may be called from any thread. Blocking work (an LLM stream, a
+    subprocess) registers a callback with `on_cancel` that aborts it, so it is
+    released immediately rather than at the next `check()`.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_id = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # best effort; the work is abandoned either way
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds, waking early on cancellation. Returns
+        whether the token is cancelled."""
+        return self._event.wait(timeout)
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled("Turn cancelled.")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run `callback` on cancellation (now, if already cancelled). Returns a
+        function that unregisters it once the guarded work is done."""
+        with self._lock:
+            if not self._event.is_set():
+                callback_id = self._next_id
+                self._next_id += 1
+                self._callbacks[callback_id] = callback
+                return lambda: self._unregister(callback_id)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback_id: int):
+        with self._lock:
+            self._callbacks.pop(callback_id, None)
+
+
+# The token of the turn running in this context, for tools that block
+_current_token: ContextVar[Optional[CancelToken]] = ContextVar(
+    "cancel_token", default=None
+)
+
+
+def get_current_token() -> Optional[CancelToken]:
+    return _current_token.get()
+
+
+@contextmanager
+def use_token(token: Optional[CancelToken]) -> Iterator[Optional[CancelToken]]:
+    """Make `token` the current one for the duration of the block."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .constants import CHECKPOINT_DIR, CHECKPOINT_MAX_TURNS
+from .history import MessageLog
+from .models import Message
+
+
+class Checkpoint:
+    __slots__ = ("turn", "messages", "files")
+
+    def __init__(self, turn: int, messages: MessageLog):
+        self.turn = turn
+        self.messages = messages  # history as it was when the turn started
+        # Files first touched during this turn -> object key of their prior
+        # content, or None if they did not exist
+        self.files: Dict[str, Optional[str]] = {}
+
+
+class CheckpointStore:
+    """Per-turn snapshots of the files write tools touch, for rewinding a session.
+
+    Only files about to be modified are captured, the first time each turn
+    touches them, so the cost scales with the files edited rather than the
+    workspace. A snapshot is a hard link to the file's current inode: the write
+    tools replace files by renaming a new one into place, so the linked inode
+    keeps the old content without being copied. Objects are named by content
+    hash, which also lets a restore detect a snapshot modified in place.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_turns: int = CHECKPOINT_MAX_TURNS):
+        self.directory = os.path.join(
+            os.path.abspath(root or "."), CHECKPOINT_DIR, uuid.uuid4().hex[:12]
+        )
+        self.max_turns = max_turns
+        self.checkpoints: List[Checkpoint] = []
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def begin_turn(self, messages: Sequence[Message]):
+        turn = self.checkpoints[-1].turn + 1 if self.checkpoints else 0
+        # O(1) for a MessageLog, which shares its structure with the copy
+        self.checkpoints.append(Checkpoint(turn, MessageLog(messages)))
+        while len(self.checkpoints) > self.max_turns:
+            self._drop(self.checkpoints.pop(0))
+
+    def snapshot(self, paths: Iterable[str]):
+        """Capture the current content of `paths` before a tool modifies them."""
+        if not self.checkpoints:
+            return
+        checkpoint = self.checkpoints[-1]
+        with self._lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                if path in checkpoint.files:
+                    continue
+                key = self._store(path) if os.path.isfile(path) else None
+                checkpoint.files[path] = key
+
+    def _object(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _store(self, path: str) -> str:
+        with open(path, "rb") as f:
+            key = hashlib.sha256(f.read()).hexdigest()
+        if key not in self._refs:
+            os.makedirs(self.directory, exist_ok=True)
+            try:
+                os.link(path, self._object(key))
+            except FileExistsError:
+                pass
+            except OSError:  # no hard links here (other device, FAT, ...)
+                shutil.copy2(path, self._object(key))
+        self._refs[key] = self._refs.get(key, 0) + 1
+        return key
+
+    def _drop(self, checkpoint: Checkpoint):
+        for key in checkpoint.files.values():
+            if key is None:
+                continue
+            self._refs[key] -= 1
+            if not self._refs[key]:
+                del self._refs[key]
+                try:
+                    os.remove(self._object(key))
+                except OSError:
+                    pass
+
+    def rewind(self, turns: int = 1) -> Tuple[MessageLog, List[Tuple[str, str]]]:
+        """Undo the last `turns` turns, restoring every file they touched.
+
+        Returns the history from before those turns and (action, path) pairs
+        where action is "restored", "deleted" or "failed".
+        """
+        if turns < 1 or turns > len(self.checkpoints):
+            raise ValueError(
+                f"Can rewind between 1 and {len(self.checkpoints)} turns, not {turns}."
+            )
+        with self._lock:
+            undone = self.checkpoints[-turns:]
+            del self.checkpoints[-turns:]
+            # The earliest snapshot of each file is its state before the first turn
+            originals: Dict[str, Optional[str]] = {}
+            for checkpoint in undone:
+                for path, key in checkpoint.files.items():
+                    originals.setdefault(path, key)
+
+            changes = [(self._restore(path, key), path) for path, key in originals.items()]
+            for checkpoint in undone:
+                self._drop(checkpoint)
+        return undone[0].messages, changes
+
+    def _restore(self, path: str, key: Optional[str]) -> str:
+        try:
+            if key is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                return "deleted"
+            with open(self._object(key), "rb") as f:
+                data = f.read()
+            if hashlib.sha256(data).hexdigest() != key:
+                return "failed"  # the snapshot inode was modified in place
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            shutil.copymode(self._object(key), tmp)
+            os.replace(tmp, path)
+            return "restored"
+        except OSError:
+            return "failed"
+
+    def close(self):
+        """Remove all snapshots; the session can no longer be rewound."""
+        with self._lock:
+            self.checkpoints.clear()
+            self._refs.clear()
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -1,30 +1,59 @@
+import argparse
 import json
 import os
 import sys
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Dict, Optional
 
 from dotenv import load_dotenv
 from prompt_toolkit import PromptSession
 from prompt_toolkit.formatted_text import HTML
+from prompt_toolkit.patch_stdout import patch_stdout
 from rich.console import Console
 from rich.markdown import Markdown
+from rich.markup import escape
 from rich.panel import Panel
 
 from min_cc.agent import CodingAgent
+from min_cc.cancellation import CancelToken, Cancelled
+from min_cc.cli import batch, serve, worker
 from min_cc.cli.commands import get_command, load_commands
 from min_cc.cli.commands.base import CommandContext
 from min_cc.cli.completer import SlashCommandCompleter
 from min_cc.cli.style import CLI_STYLE, RICH_THEME
 from min_cc.compaction import CompactionService, CompactionStrategy
-from min_cc.constants import MODEL, TOKEN_LIMIT_FALLBACK, TOKEN_LIMIT_PERCENTAGE
-from min_cc.utils import format_number, get_model_context_length, trim_tool_call_args
+from min_cc.constants import (
+    MODEL,
+    TOKEN_LIMIT_FALLBACK,
+    TOKEN_LIMIT_PERCENTAGE,
+    USAGE_LOG,
+)
+from min_cc.events import Backpressure, ToolStarted
+from min_cc.forks import ForkManager
+from min_cc.llm_cache import wrap_client_from_env
+from min_cc.prework import IdleScheduler
+from min_cc.profiling import Profiler
+from min_cc.recall import RecallTool
+from min_cc.remote import RemoteToolRegistry, WorkerClient, WorkerError
+from min_cc.routing import ModelRouter
+from min_cc.subagent import TaskTool
+from min_cc.testselect import RunTestsTool
+from min_cc.tracing import Tracer
+from min_cc.usage import usage_summary
+from min_cc.utils import (
+    format_number,
+    get_model_context_length,
+    get_model_pricing,
+    trim_tool_call_args,
+)
 
 console = Console(theme=RICH_THEME)
 # Rebuild CommandContext now that CodingAgent and Console are available in the namespace
 CommandContext.model_rebuild()
 
 
-def setup_agent():
+def setup_agent(worker_address: Optional[str] = None):
     load_dotenv()
     api_key = os.getenv("OPENROUTER_API_KEY")
     if not api_key:
@@ -47,26 +76,137 @@ def setup_agent():
         else TOKEN_LIMIT_FALLBACK
     )
 
+    registry = None
+    if worker_address:
+        try:
+            registry = RemoteToolRegistry(
+                WorkerClient(worker_address, token=os.getenv("WORKER_TOKEN"))
+            )
+        except (ValueError, WorkerError) as e:
+            console.print(f"[error]Error:[/error] worker {escape(worker_address)}: {escape(str(e))}")
+            sys.exit(1)
+
     service = CompactionService(token_limit=token_limit, strategy=strategy)
-    agent = CodingAgent(api_key=api_key, model=MODEL, compaction_service=service)
+    tracer = Tracer(export_path=os.getenv("TRACE_FILE"))
+    agent = CodingAgent(
+        api_key=api_key,
+        model=MODEL,
+        registry=registry,
+        compaction_service=service,
+        tracer=tracer,
+        pricing_lookup=get_model_pricing,
+        router=ModelRouter.from_env(),
+    )
+    agent.client = wrap_client_from_env(agent.client)
+    agent.registry.register_tool(TaskTool())
+    if not worker_address:  # test selection reads the local workspace
+        agent.registry.register_tool(RunTestsTool())
+    agent.registry.register_tool(RecallTool())
 
     return agent, context_window, token_limit, strategy_name
 
 
-def handle_event(event_type: str, data: Dict[str, Any]):
-    if event_type == "tool_call":
-        console.print(f"[tool]Executing Tool:[/tool] [accent]{data['name']}[/accent]")
+def handle_event(event: ToolStarted):
+    console.print(f"[tool]Executing Tool:[/tool] [accent]{event.name}[/accent]")
+    try:
+        args = json.loads(event.arguments)
+        trimmed_args = trim_tool_call_args(args)
+        console.print(f"   [dim]Args: {json.dumps(trimmed_args)}[/dim]")
+    except Exception:
+        console.print(f"   [dim]Args: {event.arguments}[/dim]")
+
+
+def run_cancellable(agent: CodingAgent, user_input: str, profiler: Profiler):
+    """Run a turn on a worker thread so Ctrl-C cancels it cleanly instead of
+    interrupting the agent mid-update."""
+    cancel = CancelToken()
+    outcome: Dict[str, Any] = {}
+
+    def work():
         try:
-            args = json.loads(data["arguments"])
-            trimmed_args = trim_tool_call_args(args)
-            console.print(f"   [dim]Args: {json.dumps(trimmed_args)}[/dim]")
-        except Exception:
-            console.print(f"   [dim]Args: {data['arguments']}[/dim]")
+            with profiler.capture():
+                outcome["response"] = agent.run(user_input, cancel=cancel)
+        except BaseException as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=work, name="min-cc-turn", daemon=True)
+    worker.start()
+    while worker.is_alive():
+        try:
+            worker.join(0.1)
+        except KeyboardInterrupt:
+            cancel.cancel()
+    agent.events.flush()  # finish rendering the turn's tool calls
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("response")
+
+
+def write_usage_summary(
+    agent: CodingAgent, started_at: float, fork: Optional[str] = None
+):
+    """Append a machine-readable usage summary for this session (or one of its
+    forks) to USAGE_FILE."""
+    path = os.getenv("USAGE_FILE", USAGE_LOG)
+    record = {
+        "session_started": started_at,
+        "session_ended": time.time(),
+        "model": agent.model,
+        "cwd": os.getcwd(),
+        **usage_summary(agent.state.metadata),
+    }
+    if fork:
+        record["fork"] = fork
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        console.print(f"[error]Could not write usage summary: {e}[/error]")
 
 
 def main():
-    agent, context_window, token_limit, strategy_name = setup_agent()
+    parser = argparse.ArgumentParser(
+        prog="min-cc", description="An extremely minimal but capable cli coding agent."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    batch.add_parser(subparsers)
+    serve.add_parser(subparsers)
+    worker.add_parser(subparsers)
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile every turn (cProfile + tracemalloc) into .min-cc/profiles",
+    )
+    parser.add_argument(
+        "--worker",
+        metavar="HOST:PORT",
+        help="Run tools on a `min-cc worker` instead of in the current directory",
+    )
+    args = parser.parse_args()
+
+    if args.command:
+        return args.func(args)
+    run_interactive(profile=args.profile, worker_address=args.worker)
+
+
+def run_interactive(profile: bool = False, worker_address: Optional[str] = None):
+    started_at = time.time()
+    agent, context_window, token_limit, strategy_name = setup_agent(worker_address)
     load_commands()
+    def render_events(agent: CodingAgent):
+        # Rendered off the agent loop; each fork has its own event bus
+        agent.events.subscribe(
+            handle_event, types=(ToolStarted,), policy=Backpressure.BLOCK
+        )
+
+    render_events(agent)
+    forks = ForkManager(agent, on_fork=render_events)
+    # Warms the connection and compacts/serializes history while the prompt waits
+    idle = IdleScheduler()
+    profiler = Profiler()
+    if profile:
+        profiler.start()
 
     ctx_str = (
         format_number(context_window) if isinstance(context_window, int) else "unknown"
@@ -77,6 +217,10 @@ def main():
         f"[dim]Model: {MODEL} ({ctx_str} ctx)[/dim]\n"
         f"[dim]Compaction: {strategy_name} @ {limit_str}[/dim]"
     )
+    for call_type, model in agent.router.routes.items():
+        banner_text += f"\n[dim]{call_type.capitalize()}: {model}[/dim]"
+    if worker_address:
+        banner_text += f"\n[dim]Worker: {worker_address}[/dim]"
 
     console.print(Panel.fit(banner_text, border_style="accent"))
     console.print(
@@ -87,16 +231,21 @@ def main():
     completer = SlashCommandCompleter()
 
     while True:
+        agent = forks.agent  # /fork and /switch change the active conversation
+        label = "" if forks.active == "main" else f" [{forks.active}]"
+        idle.start(agent)
         try:
             if sys.stdin.isatty():
-                user_input = session.prompt(
-                    HTML("<prompt>User</prompt>: "),
-                    completer=completer,
-                    complete_while_typing=True,
-                ).strip()
+                # Background output (e.g. compaction) is printed above the prompt
+                with patch_stdout():
+                    user_input = session.prompt(
+                        HTML(f"<prompt>User</prompt>{label}: "),
+                        completer=completer,
+                        complete_while_typing=True,
+                    ).strip()
             else:
                 # Fallback for non-TTY
-                print("User: ", end="", flush=True)
+                print(f"User{label}: ", end="", flush=True)
                 user_input = sys.stdin.readline().strip()
                 if not user_input:
                     break
@@ -108,6 +257,8 @@ def main():
         except Exception as e:
             console.print(f"[error]Prompt error: {e}[/error]")
             continue
+        finally:
+            idle.stop()
 
         if not user_input:
             continue
@@ -125,6 +276,8 @@ def main():
                     banner_text=banner_text,
                     token_limit=token_limit,
                     strategy_name=strategy_name,
+                    profiler=profiler,
+                    forks=forks,
                 )
                 if command.execute(cmd_args, context) is False:
                     break
@@ -133,16 +286,30 @@ def main():
                 console.print(f"[error]Unknown command: {cmd_name}[/error]")
                 continue
 
+        profiler.begin_turn()
         with console.status(
             "[thinking]Thinking...[/thinking]", spinner_style="thinking"
         ):
             try:
-                response = agent.run(user_input, on_event=handle_event)
-                console.print("\n" + "─" * console.width)
-                console.print(Markdown(response or ""))
-                console.print("─" * console.width + "\n")
+                response = run_cancellable(agent, user_input, profiler)
+                with profiler.capture():
+                    console.print("\n" + "─" * console.width)
+                    console.print(Markdown(response or ""))
+                    console.print("─" * console.width + "\n")
+            except Cancelled:
+                console.print("[warning]Cancelled.[/warning]")
             except Exception as e:
                 console.print(f"[error]Error during execution:[/error] {str(e)}")
+        report = profiler.end_turn()
+        if report:
+            console.print(f"[dim]{escape(report.summary())}[/dim]\n")
+
+    for fork in forks.forks.values():
+        write_usage_summary(
+            fork.agent, started_at, fork=fork.name if len(forks.forks) > 1 else None
+        )
+    profiler.stop()
+    forks.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import threading
+
+from dotenv import load_dotenv
+from openai import OpenAI
+from rich.console import Console
+
+from min_cc.batch import BatchTask, LLMGovernor, TaskResult, run_batch
+from min_cc.cli.style import RICH_THEME
+from min_cc.constants import BATCH_MAX_CONCURRENT_LLM, BATCH_WORKERS, DEFAULT_BASE_URL
+from min_cc.llm_cache import wrap_client_from_env
+from min_cc.routing import ModelRouter
+from min_cc.transport import llm_client_kwargs
+
+console = Console(theme=RICH_THEME, stderr=True)
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "batch", help="Run agent tasks from a JSONL file headlessly"
+    )
+    parser.add_argument(
+        "tasks",
+        help='JSONL file, one task per line: {"prompt", "cwd", "model", "budget", "id"}',
+    )
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument(
+        "--max-concurrent-llm",
+        type=int,
+        default=BATCH_MAX_CONCURRENT_LLM,
+        help="Global cap on in-flight LLM requests",
+    )
+    parser.add_argument(
+        "--rpm", type=float, default=None, help="Global LLM requests per minute"
+    )
+    parser.add_argument("--output", help="Append results here instead of stdout")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.set_defaults(func=run)
+
+
+def run(args: argparse.Namespace):
+    load_dotenv()
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        console.print(
+            "[error]Error:[/error] OPENROUTER_API_KEY not found in environment or .env file."
+        )
+        sys.exit(1)
+
+    with open(args.tasks) as f:
+        tasks = [BatchTask.model_validate_json(line) for line in f if line.strip()]
+
+    client = wrap_client_from_env(
+        OpenAI(api_key=api_key, base_url=args.base_url, **llm_client_kwargs())
+    )
+    governor = LLMGovernor(args.max_concurrent_llm, args.rpm)
+
+    out = open(args.output, "a") if args.output else sys.stdout
+    lock = threading.Lock()
+    counts = {}
+
+    def emit(result: TaskResult):
+        with lock:
+            out.write(result.model_dump_json() + "\n")
+            out.flush()
+            counts[result.status] = counts.get(result.status, 0) + 1
+
+    try:
+        run_batch(
+            tasks,
+            client,
+            workers=args.workers,
+            governor=governor,
+            on_result=emit,
+            router=ModelRouter.from_env(),
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    console.print(f"[dim]Finished {len(tasks)} tasks: {summary or 'none'}[/dim]")
@@ -3,6 +3,9 @@ from typing import TYPE_CHECKING, Optional
 
 from pydantic import BaseModel, ConfigDict
 
+from min_cc.forks import ForkManager
+from min_cc.profiling import Profiler
+
 if TYPE_CHECKING:
     from rich.console import Console
 
@@ -17,6 +20,8 @@ class CommandContext(BaseModel):
     banner_text: str
     token_limit: int
     strategy_name: str
+    profiler: Optional[Profiler] = None
+    forks: Optional[ForkManager] = None
 
 
 class Command(ABC):
@@ -0,0 +1,70 @@
+from typing import Optional
+
+from rich.markup import escape
+
+from min_cc.cli.commands import register_command
+from min_cc.cli.commands.base import Command, CommandContext
+
+USAGE = "Usage: /fork [name] | /fork shared [name] | /fork diff|merge|discard <name>"
+
+
+@register_command
+class ForkCommand(Command):
+    @property
+    def name(self) -> str:
+        return "/fork"
+
+    @property
+    def description(self) -> str:
+        return "Fork the conversation into a copy of the workspace and switch to it"
+
+    def execute(self, args: str, context: CommandContext) -> Optional[bool]:
+        forks = context.forks
+        if forks is None:
+            context.console.print("[error]Forks are not available here.[/error]")
+            return True
+
+        parts = args.split()
+        action = parts[0].lower() if parts else ""
+        try:
+            if action in ("diff", "merge", "discard"):
+                if len(parts) != 2:
+                    context.console.print(f"[error]{escape(USAGE)}[/error]")
+                    return True
+                self._manage(action, parts[1], context)
+                return True
+            isolate = action != "shared"
+            if not isolate:
+                parts = parts[1:]
+            if len(parts) > 1:
+                context.console.print(f"[error]{escape(USAGE)}[/error]")
+                return True
+            fork = forks.fork(parts[0] if parts else None, isolate=isolate)
+        except (ValueError, OSError) as e:
+            context.console.print(f"[error]{e}[/error]")
+            return True
+
+        forks.switch(fork.name)
+        where = fork.agent.root if isolate else "the shared workspace"
+        context.console.print(
+            f"Forked [accent]{fork.name}[/accent] from {fork.parent} "
+            f"({len(fork.agent.state.messages)} messages), working in {where}. "
+            f"Use /switch {fork.parent} to go back."
+        )
+        return True
+
+    def _manage(self, action: str, name: str, context: CommandContext):
+        forks = context.forks
+        if action == "discard":
+            forks.discard(name)
+            context.console.print(f"Discarded fork {name} and its workspace.")
+            return
+        changes = forks.merge(name) if action == "merge" else forks.changes(name)
+        if not changes:
+            context.console.print(f"Fork {name} has no file changes.")
+            return
+        if action == "merge":
+            context.console.print(f"Merged fork {name} into {forks.get(name).parent}:")
+        for status, path in changes:
+            style = "error" if status == "conflict" else "dim"
+            context.console.print(f"[{style}]  {status} {path}[/{style}]")
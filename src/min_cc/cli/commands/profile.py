@@ -0,0 +1,38 @@
+from typing import Optional
+
+from min_cc.cli.commands import register_command
+from min_cc.cli.commands.base import Command, CommandContext
+
+
+@register_command
+class ProfileCommand(Command):
+    @property
+    def name(self) -> str:
+        return "/profile"
+
+    @property
+    def description(self) -> str:
+        return "Profile each turn's CPU time and allocations: /profile start|stop"
+
+    def execute(self, args: str, context: CommandContext) -> Optional[bool]:
+        profiler = context.profiler
+        if profiler is None:
+            context.console.print("[error]Profiling is not available here.[/error]")
+            return True
+
+        action = args.strip().lower()
+        if action == "start":
+            profiler.start()
+            context.console.print(
+                f"Profiling turns into [accent]{profiler.directory}[/accent]"
+            )
+        elif action == "stop":
+            profiler.stop()
+            context.console.print(f"Profiling stopped after {profiler.turns} turn(s).")
+        else:
+            state = "on" if profiler.enabled else "off"
+            context.console.print(
+                f"Profiling is {state} ({profiler.turns} turn(s) profiled). "
+                "Usage: /profile start|stop"
+            )
+        return True
@@ -0,0 +1,29 @@
+from typing import Optional
+
+from min_cc.cli.commands import register_command
+from min_cc.cli.commands.base import Command, CommandContext
+
+
+@register_command
+class RewindCommand(Command):
+    @property
+    def name(self) -> str:
+        return "/rewind"
+
+    @property
+    def description(self) -> str:
+        return "Undo the last n turns (default 1): restore edited files and history"
+
+    def execute(self, args: str, context: CommandContext) -> Optional[bool]:
+        try:
+            turns = int(args.strip() or 1)
+            changes = context.agent.rewind(turns)
+        except ValueError as e:
+            context.console.print(f"[error]{e}[/error]")
+            return True
+
+        context.console.print(f"Rewound {turns} turn(s).")
+        for action, path in changes:
+            style = "error" if action == "failed" else "dim"
+            context.console.print(f"[{style}]  {action}: {path}[/{style}]")
+        return True
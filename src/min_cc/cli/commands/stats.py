@@ -0,0 +1,36 @@
+from typing import Optional
+
+from rich.table import Table
+
+from min_cc.cli.commands import register_command
+from min_cc.cli.commands.base import Command, CommandContext
+
+
+@register_command
+class StatsCommand(Command):
+    @property
+    def name(self) -> str:
+        return "/stats"
+
+    @property
+    def description(self) -> str:
+        return "Show p50/p95 timings for this session"
+
+    def execute(self, args: str, context: CommandContext) -> Optional[bool]:
+        stats = context.agent.tracer.stats()
+        if not stats:
+            context.console.print("[dim]No timings recorded yet.[/dim]")
+            return True
+
+        table = Table(title="Session Timings", border_style="accent")
+        table.add_column("Span")
+        table.add_column("Count", justify="right")
+        table.add_column("p50", justify="right")
+        table.add_column("p95", justify="right")
+        for name, s in sorted(stats.items()):
+            table.add_row(
+                name, str(s["count"]), f"{s['p50'] * 1000:.1f}ms", f"{s['p95'] * 1000:.1f}ms"
+            )
+
+        context.console.print(table)
+        return True
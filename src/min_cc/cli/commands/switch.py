@@ -0,0 +1,43 @@
+from typing import Optional
+
+from min_cc.cli.commands import register_command
+from min_cc.cli.commands.base import Command, CommandContext
+
+
+@register_command
+class SwitchCommand(Command):
+    @property
+    def name(self) -> str:
+        return "/switch"
+
+    @property
+    def description(self) -> str:
+        return "List conversation forks, or switch to one: /switch [name]"
+
+    def execute(self, args: str, context: CommandContext) -> Optional[bool]:
+        forks = context.forks
+        if forks is None:
+            context.console.print("[error]Forks are not available here.[/error]")
+            return True
+
+        name = args.strip()
+        if name:
+            try:
+                forks.switch(name)
+            except ValueError as e:
+                context.console.print(f"[error]{e}[/error]")
+                return True
+            context.console.print(f"Switched to [accent]{name}[/accent].")
+            return True
+
+        for fork in forks.forks.values():
+            marker = "*" if fork.name == forks.active else " "
+            details = f"{len(fork.agent.state.messages)} messages"
+            if fork.parent:
+                details += f", from {fork.parent}"
+            if fork.baseline is not None:
+                details += f", {len(forks.changes(fork.name))} changed file(s)"
+            context.console.print(
+                f"{marker} [accent]{fork.name}[/accent] [dim]({details})[/dim]"
+            )
+        return True
@@ -0,0 +1,61 @@
+from typing import Optional
+
+from rich.table import Table
+
+from min_cc.cli.commands import register_command
+from min_cc.cli.commands.base import Command, CommandContext
+from min_cc.usage import usage_summary
+from min_cc.utils import format_number
+
+
+@register_command
+class UsageCommand(Command):
+    @property
+    def name(self) -> str:
+        return "/usage"
+
+    @property
+    def description(self) -> str:
+        return "Show token usage and cost for this session"
+
+    def execute(self, args: str, context: CommandContext) -> Optional[bool]:
+        summary = usage_summary(context.agent.state.metadata)
+
+        table = Table(title="Token Usage", border_style="accent")
+        table.add_column("Call type")
+        table.add_column("Calls", justify="right")
+        table.add_column("Prompt", justify="right")
+        table.add_column("Cached", justify="right")
+        table.add_column("Completion", justify="right")
+        table.add_column("Cost", justify="right")
+        rows = list(summary["by_call_type"].items()) + [("total", summary["total"])]
+        for name, t in rows:
+            if t.get("models"):
+                name += f" ({', '.join(t['models'])})"
+            table.add_row(
+                name,
+                str(t["calls"]),
+                format_number(t["prompt_tokens"]),
+                format_number(t["cached_tokens"]),
+                format_number(t["completion_tokens"]),
+                f"${t['cost']:.4f}",
+            )
+        context.console.print(table)
+
+        if summary["tools"]:
+            tools = sorted(
+                summary["tools"].items(), key=lambda kv: -kv[1]["result_tokens"]
+            )
+            lines = [
+                f"- {name}: {t['calls']} calls, ~{format_number(t['result_tokens'])} tokens"
+                for name, t in tools
+            ]
+            context.console.print("[bold]Tool results:[/bold]\n" + "\n".join(lines))
+
+        dedup = summary["dedup"]
+        if dedup["results"]:
+            context.console.print(
+                f"Deduplicated {dedup['results']} repeated tool results "
+                f"(~{format_number(dedup['tokens_saved'])} tokens per request)"
+            )
+        return True
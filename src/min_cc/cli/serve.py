@@ -0,0 +1,97 @@
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+from openai import OpenAI
+from rich.console import Console
+
+from min_cc.cli.style import RICH_THEME
+from min_cc.constants import (
+    DEFAULT_BASE_URL,
+    MODEL,
+    SERVER_IDLE_TIMEOUT,
+    SERVER_MAX_SESSIONS,
+)
+from min_cc.llm_cache import wrap_client_from_env
+from min_cc.remote import WorkerClient
+from min_cc.routing import ModelRouter
+from min_cc.server import SessionManager, make_server, start_reaper
+from min_cc.transport import llm_client_kwargs
+from min_cc.utils import get_model_pricing
+
+console = Console(theme=RICH_THEME, stderr=True)
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "serve", help="Host many agent sessions behind a local HTTP API"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--workspace-base",
+        default=".",
+        help="Session workspace roots must live under this directory",
+    )
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--max-sessions", type=int, default=SERVER_MAX_SESSIONS)
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=SERVER_IDLE_TIMEOUT,
+        help="Seconds before an idle session is closed",
+    )
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument(
+        "--worker",
+        action="append",
+        default=[],
+        metavar="NAME=HOST:PORT",
+        help="A `min-cc worker` sessions can run their tools on (repeatable)",
+    )
+    parser.set_defaults(func=run)
+
+
+def run(args: argparse.Namespace):
+    load_dotenv()
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        console.print(
+            "[error]Error:[/error] OPENROUTER_API_KEY not found in environment or .env file."
+        )
+        sys.exit(1)
+
+    workers = {}
+    for spec in args.worker:
+        name, _, address = spec.partition("=")
+        try:
+            workers[name] = WorkerClient(address, token=os.getenv("WORKER_TOKEN"))
+        except ValueError as e:
+            console.print(f"[error]Error:[/error] --worker {spec}: {e}")
+            sys.exit(1)
+
+    client = wrap_client_from_env(
+        OpenAI(api_key=api_key, base_url=args.base_url, **llm_client_kwargs())
+    )
+    manager = SessionManager(
+        client,
+        workspace_base=args.workspace_base,
+        model=args.model,
+        max_sessions=args.max_sessions,
+        idle_timeout=args.idle_timeout,
+        pricing_lookup=get_model_pricing,
+        router=ModelRouter.from_env(),
+        workers=workers,
+    )
+    start_reaper(manager)
+    server = make_server(manager, args.host, args.port)
+    console.print(
+        f"[banner]Min-CC server[/banner] [dim]listening on http://{args.host}:{args.port}[/dim]"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,68 @@
+import argparse
+import ipaddress
+import os
+import sys
+
+from dotenv import load_dotenv
+from rich.console import Console
+
+from min_cc.cli.style import RICH_THEME
+from min_cc.constants import WORKER_PORT, WORKER_THREADS
+from min_cc.remote import WorkerServer
+from min_cc.tools import get_default_registry
+
+console = Console(theme=RICH_THEME, stderr=True)
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser(
+        "worker", help="Run tools for remote agents next to a workspace"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=WORKER_PORT)
+    parser.add_argument("--root", default=".", help="Workspace the tools work in")
+    parser.add_argument("--threads", type=int, default=WORKER_THREADS)
+    parser.add_argument(
+        "--token",
+        help="Shared secret clients must present (default: $WORKER_TOKEN)",
+    )
+    parser.set_defaults(func=run)
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False  # a hostname that may resolve to any interface
+
+
+def run(args: argparse.Namespace):
+    load_dotenv()
+    root = os.path.abspath(args.root)
+    token = args.token or os.getenv("WORKER_TOKEN")
+    if not token and not is_loopback(args.host):
+        # Anyone who can reach the port could run commands in the workspace
+        console.print(
+            f"[error]Error:[/error] refusing to serve on {args.host} without a token; "
+            "set --token or WORKER_TOKEN, or bind to 127.0.0.1."
+        )
+        sys.exit(1)
+    server = WorkerServer(
+        (args.host, args.port),
+        get_default_registry(root=root),
+        root=root,
+        token=token,
+        threads=args.threads,
+    )
+    auth = "token required" if token else "no token"
+    console.print(
+        f"[banner]Min-CC worker[/banner] [dim]serving {root} on {server.address} ({auth})[/dim]"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,7 +1,9 @@
 import json
 from enum import Enum
-from typing import List
+from typing import Any, Callable, List, Optional
 
+from .archive import HistoryArchive
+from .cancellation import Cancelled, get_current_token
 from .constants import (
     CHARS_PER_TOKEN,
     SUMMARIZE_PRESERVE_COUNT,
@@ -21,14 +23,22 @@ class CompactionService:
         self,
         token_limit: int = TOKEN_LIMIT_FALLBACK,
         strategy: CompactionStrategy = CompactionStrategy.TRUNCATE,
+        archive: Optional[HistoryArchive] = None,
+        keep_count: int = TRUNCATE_KEEP_COUNT,
+        preserve_count: int = SUMMARIZE_PRESERVE_COUNT,
     ):
         self.token_limit = token_limit
         self.strategy = strategy
+        # Recent messages kept by truncation, and kept verbatim by summarization
+        self.keep_count = keep_count
+        self.preserve_count = preserve_count
+        # Messages compacted away are moved here rather than discarded
+        self.archive = archive if archive is not None else HistoryArchive()
 
     def _estimate_tokens(self, messages: List[Message]) -> float:
         return (
             sum(
-                len(m.content or "")
+                m.content_length
                 + len(json.dumps([tc.model_dump() for tc in (m.tool_calls or [])]))
                 for m in messages
             )
@@ -36,9 +46,18 @@ class CompactionService:
         )
 
     def compact(
-        self, messages: List[Message], llm_client=None, model: str = None
+        self,
+        messages: List[Message],
+        llm_client=None,
+        model: str = None,
+        on_usage: Optional[Callable[..., Any]] = None,
+        summary_token_limit: Optional[int] = None,
     ) -> List[Message]:
+        """`model` and `summary_token_limit` are those of the summarizer, which may
+        be a smaller model than the agent's."""
         current_tokens = self._estimate_tokens(messages)
+        # (before, after) token estimates of the most recent call
+        self.last_estimate = (current_tokens, current_tokens)
         if current_tokens <= self.token_limit:
             return messages
 
@@ -47,19 +66,31 @@ class CompactionService:
         )
 
         if self.strategy == CompactionStrategy.TRUNCATE:
-            return self._truncate(messages)
+            compacted = self._truncate(messages)
         elif self.strategy == CompactionStrategy.SUMMARIZE:
-            return self._summarize(messages, llm_client, model)
-        return messages
+            compacted = self._summarize(
+                messages, llm_client, model, on_usage, summary_token_limit
+            )
+        else:
+            return messages
+        kept = {id(m) for m in compacted}
+        self.archive.add(m for m in messages if id(m) not in kept)
+        self.last_estimate = (current_tokens, self._estimate_tokens(compacted))
+        return compacted
 
     def _truncate(self, messages: List[Message]) -> List[Message]:
         system_msg = [m for m in messages if m.role == "system"]
         others = [m for m in messages if m.role != "system"]
-        # Keep system message and most recent TRUNCATE_KEEP_COUNT messages
-        return system_msg + others[-TRUNCATE_KEEP_COUNT:]
+        # Keep system message and most recent keep_count messages
+        return system_msg + others[-self.keep_count :]
 
     def _summarize(
-        self, messages: List[Message], llm_client, model: str
+        self,
+        messages: List[Message],
+        llm_client,
+        model: str,
+        on_usage: Optional[Callable[..., Any]] = None,
+        summary_token_limit: Optional[int] = None,
     ) -> List[Message]:
         if not llm_client or not model:
             return self._truncate(messages)
@@ -67,14 +98,19 @@ class CompactionService:
         system_msg = [m for m in messages if m.role == "system"]
         to_summarize = [m for m in messages if m.role != "system"]
 
-        # Keep the last SUMMARIZE_PRESERVE_COUNT messages as intact context, summarize the rest
-        preserved = to_summarize[-SUMMARIZE_PRESERVE_COUNT:]
-        old_history = to_summarize[:-SUMMARIZE_PRESERVE_COUNT]
+        # Keep the last preserve_count messages as intact context, summarize the rest
+        preserved = to_summarize[-self.preserve_count :]
+        old_history = to_summarize[: -self.preserve_count]
 
         history_str = "\n".join(
             [f"{m.role}: {m.content or 'Tool calls...'}" for m in old_history]
         )
+        if summary_token_limit:
+            # Keep the most recent part that fits the summarizer's context
+            history_str = history_str[-summary_token_limit * CHARS_PER_TOKEN :]
 
+        # The transport aborts the call when the current token is cancelled
+        cancel = get_current_token()
         try:
             summary_response = llm_client.chat.completions.create(
                 model=model,
@@ -86,11 +122,17 @@ class CompactionService:
                     {"role": "user", "content": history_str},
                 ],
             )
+            if on_usage:
+                on_usage(
+                    "summarization", getattr(summary_response, "usage", None), model
+                )
             summary_content = summary_response.choices[0].message.content
             summary_msg = Message(
                 role="assistant", content=f"[CONVERSATION SUMMARY]: {summary_content}"
             )
             return system_msg + [summary_msg] + preserved
         except Exception as e:
+            if cancel and cancel.cancelled:
+                raise Cancelled("Compaction cancelled.") from None  # history unchanged
             print(f"Summarization failed: {e}. Falling back to truncation.")
             return self._truncate(messages)
@@ -2,6 +2,79 @@
 MODEL = "x-ai/grok-4.1-fast"  # cheap + fast + pretty good at tool calls
 DEFAULT_MODEL = MODEL
 DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_MODELS_URL = "https://openrouter.ai/api/v1/models"
+
+# HTTP Transport (shared by all LLM and model-metadata requests)
+HTTP_CONNECT_TIMEOUT = 10.0
+HTTP_READ_TIMEOUT = 120.0  # max gap between bytes, so long streams are fine
+HTTP_MAX_RETRIES = 4
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 30.0
+HTTP_BREAKER_THRESHOLD = 5  # consecutive failures before the circuit opens
+HTTP_BREAKER_RESET = 30.0  # seconds before a half-open trial request
+HTTP_MAX_CONNECTIONS = 100
+HTTP_KEEPALIVE_CONNECTIONS = 20
+
+# Local state (caches, indexes, session artifacts) lives under this directory
+STATE_DIR = ".min-cc"
+
+# LLM Response Cache
+LLM_CACHE_DIR = f"{STATE_DIR}/llm-cache"
+LLM_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Usage Accounting
+USAGE_LOG = f"{STATE_DIR}/usage.jsonl"  # one JSON summary appended per session
+
+# Batch Mode
+BATCH_WORKERS = 4
+BATCH_MAX_CONCURRENT_LLM = 8
+
+# Event bus: events queued per subscriber before its backpressure policy applies
+EVENT_QUEUE_SIZE = 1000
+EVENT_WORKERS = 4  # threads shared by all subscribers to run their handlers
+
+# Server Mode
+SERVER_MAX_SESSIONS = 500
+SERVER_IDLE_TIMEOUT = 3600  # seconds before an idle session is closed
+SERVER_EVENT_BUFFER = 200  # recent events kept per session for SSE replay
+SERVER_KEEPALIVE = 15  # seconds between SSE keepalive comments
+
+# Remote tool workers (min-cc worker)
+WORKER_PORT = 8766
+WORKER_THREADS = 8  # tool calls a worker runs at once
+WORKER_COMPRESS_MIN = 4096  # bytes; larger frames are zlib-compressed
+WORKER_MAX_FRAME = 256 * 1024 * 1024  # bytes of a frame's payload, decompressed
+WORKER_HELLO_MAX = 4096  # bytes of the handshake, read before authorization
+WORKER_CALL_TIMEOUT = 900  # seconds to wait for a remote tool result
+
+# Blob Store (large tool outputs are kept compressed, out of line)
+BLOB_MIN_CHARS = 2048
+BLOB_CACHE_BYTES = 8 * 1024 * 1024  # recently read blobs kept decoded
+
+# Tool results shorter than this are never replaced by a back-reference
+DEDUP_MIN_CHARS = 200
+
+# Checkpoints (per-turn snapshots of files edited by write tools)
+CHECKPOINT_DIR = f"{STATE_DIR}/checkpoints"
+CHECKPOINT_MAX_TURNS = 50
+
+# Conversation forks with isolated workspaces (/fork, /switch); outside the
+# workspace, so git run in a fork never finds the parent's repository
+FORK_DIR = f"~/{STATE_DIR}/forks"
+
+# Symbol Index
+SYMBOL_INDEX_FILE = f"{STATE_DIR}/symbols.json"
+SYMBOL_SKIP_DIRS = ("__pycache__", "node_modules", "venv", "build", "dist", "site-packages")
+SYMBOL_MAX_FILE_BYTES = 1024 * 1024  # larger .py files are usually generated
+SYMBOL_MAX_RESULTS = 50
+REPO_MAP_TOKENS = 0  # >0 appends a repo map of this size to the system prompt
+
+# Tracing
+TRACE_STATS_WINDOW = 10000  # most recent durations kept per span name
+
+# Profiling (--profile, /profile)
+PROFILE_DIR = f"{STATE_DIR}/profiles"
+PROFILE_TOP = 10  # functions and allocation sites listed per turn
 
 # Compaction Constants
 TOKEN_LIMIT_FALLBACK = 12800
@@ -10,12 +83,43 @@ CHARS_PER_TOKEN = 4  # for quick token estimation
 TRUNCATE_KEEP_COUNT = 10
 SUMMARIZE_PRESERVE_COUNT = 3
 
+# Archive of compacted messages, searchable with the recall tool
+ARCHIVE_CHUNK_CHARS = 2000
+RECALL_MAX_TOKENS = 2000
+RECALL_MAX_RESULTS = 8
+
+# Sub-agents
+SUBAGENT_TOOLS = (  # read-only: children never edit
+    "read_file",
+    "read_files",
+    "grep",
+    "glob",
+    "find_symbol",
+    "list_symbols",
+)
+SUBAGENT_MAX_PARALLEL = 4
+SUBAGENT_TOKEN_BUDGET = 300_000
+SUBAGENT_PROMPT = (
+    "You are a sub-agent handling one delegated investigation. Your history is not "
+    "shared with the parent agent: only your final message is returned to it. "
+    "When done, reply with a concise, self-contained answer (file paths, line numbers, "
+    "key findings) rather than raw tool output."
+)
+
 # UI Constants
 TRIM_TOOL_CALL_ARGS = 50
 
 # Tool Constants
 BASH_TIMEOUT = 30
+PATCH_MAX_FUZZ = 2  # context lines apply_patch may ignore at each end of a hunk
+SPECULATIVE_WORKERS = 8  # read-only tool calls run while the response streams
 GREP_LINE_CHAR = 50
+READ_FILES_MAX_BYTES = 200_000  # default total budget of one read_files call
+READ_FILES_MAX_FILES = 100
+READ_FILES_WORKERS = 8
+TESTS_TIMEOUT = 600  # run_tests has its own, longer limit than bash
+TESTS_MAX_FAILURES = 10  # failures detailed in a run_tests digest
+TESTS_VENV_DIRS = (".venv", "venv", "env")  # workspace virtualenvs run_tests looks for
 
 
 # Prompts
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .constants import DEDUP_MIN_CHARS
+from .models import Message, ToolCall
+
+
+def _content_hash(message: Message) -> str:
+    blob = message.blob
+    if blob is not None:
+        return blob.key
+    return hashlib.sha256((message.content or "").encode()).hexdigest()
+
+
+def _read_path(tool_call: ToolCall) -> Optional[str]:
+    if tool_call.name != "read_file":
+        return None
+    try:
+        path = json.loads(tool_call.arguments or "{}").get("path")
+    except (ValueError, AttributeError):
+        return None
+    return os.path.normpath(path) if isinstance(path, str) else None
+
+
+def _keys(call: ToolCall, message: Message) -> List[Tuple[str, str]]:
+    """What makes an earlier result redundant: a read of the same path, or the
+    same content."""
+    path = _read_path(call)
+    keys = [("read", path)] if path is not None else []
+    keys.append(("content", _content_hash(message)))
+    return keys
+
+
+class ResultIndex:
+    """The latest tool result per dedup key in a history, kept up to date as
+    messages are appended so each new result is checked in O(1).
+
+    The index remembers the last message it saw; if the history no longer has
+    it at the same position (compaction, rewind, clear), it is rebuilt. Each
+    entry also holds the message itself, and is only acted on while that
+    message is still at its position, so an edited history never has the
+    wrong message replaced.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, ToolCall] = {}  # tool_call_id -> call
+        # key -> (position, message) of the latest result with that key
+        self._latest: Dict[Tuple[str, str], Tuple[int, Message]] = {}
+        self._indexed = 0  # messages indexed so far
+        self._last: Optional[Message] = None  # messages[_indexed - 1]
+
+    def _catch_up(self, messages: List[Message], end: int):
+        if self._indexed > end or (
+            self._indexed and messages[self._indexed - 1] is not self._last
+        ):
+            self.__init__()
+        for i in range(self._indexed, end):
+            self._add(i, messages[i])
+
+    def _add(self, position: int, message: Message):
+        for tc in message.tool_calls or ():
+            self._calls[tc.id] = tc
+        call = self._calls.get(message.tool_call_id) if message.role == "tool" else None
+        if call is not None and message.content_length >= DEDUP_MIN_CHARS:
+            for key in _keys(call, message):
+                self._latest[key] = (position, message)
+        self._indexed = position + 1
+        self._last = message
+
+    def dedupe_latest(self, messages: List[Message]) -> Tuple[int, int]:
+        """See dedupe_latest_result."""
+        if not messages:
+            return 0, 0
+        self._catch_up(messages, len(messages) - 1)
+        latest = messages[-1]
+        call = self._calls.get(latest.tool_call_id) if latest.role == "tool" else None
+        replaced = saved = 0
+        if call is not None and latest.content_length >= DEDUP_MIN_CHARS:
+            earlier = {}
+            for key in _keys(call, latest):
+                entry = self._latest.get(key)
+                if entry is not None and messages[entry[0]] is entry[1]:
+                    earlier.setdefault(entry[0], (key, entry[1]))
+            for position, (key, message) in sorted(earlier.items()):
+                if key[0] == "read":
+                    note = (
+                        f"[Outdated read of {key[1]}; see the later read_file call "
+                        f"{call.id}.]"
+                    )
+                else:
+                    note = (
+                        f"[Same output as the later {call.name} call {call.id}; "
+                        "omitted.]"
+                    )
+                saved += message.content_length - len(note)
+                messages[position] = Message(
+                    role="tool", content=note, tool_call_id=message.tool_call_id
+                )
+                replaced += 1
+        self._add(len(messages) - 1, latest)
+        return replaced, saved
+
+
+def dedupe_latest_result(
+    messages: List[Message], index: Optional[ResultIndex] = None
+) -> Tuple[int, int]:
+    """Replace earlier tool results made redundant by the last message, a tool result.
+
+    An earlier result is redundant if its content is identical, or if it is a
+    `read_file` of the same path (the file has since been read again). It is
+    replaced by a short back-reference, keeping its `tool_call_id` so the
+    assistant/tool pairing stays valid. Returns (results replaced, chars saved).
+
+    Pass the history's ResultIndex to avoid rescanning the history; without
+    one, the index is built from scratch.
+    """
+    return (index or ResultIndex()).dedupe_latest(messages)
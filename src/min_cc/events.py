@@ -0,0 +1,283 @@
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Type,
+    Union,
+)
+
+from .constants import EVENT_QUEUE_SIZE, EVENT_WORKERS
+
+# Each event's `type` is its name on the wire (server SSE, `on_event` callbacks)
+
+
+class TurnStarted(NamedTuple):
+    type = "turn_start"
+    input: str
+    model: str
+
+
+class TurnEnded(NamedTuple):
+    type = "turn_end"
+    outcome: str  # "done" | "cancelled" | "error"
+    llm_calls: int
+    tool_calls: int
+    duration_s: float
+
+
+class LLMRequest(NamedTuple):
+    type = "llm_request"
+    model: str
+    messages: int
+    tools: int
+
+
+class LLMResponse(NamedTuple):
+    type = "llm_response"
+    model: str
+    ttft_s: Optional[float]
+    duration_s: float
+    prompt_tokens: int
+    completion_tokens: int
+    tool_calls: int
+
+
+class ToolStarted(NamedTuple):
+    type = "tool_call"
+    id: str
+    name: str
+    arguments: str
+
+
+class ToolFinished(NamedTuple):
+    type = "tool_result"
+    id: str
+    name: str
+    duration_s: float
+    is_error: bool
+    bytes: int
+    speculative: bool
+
+
+class Compacted(NamedTuple):
+    type = "compaction"
+    strategy: str
+    tokens_before: Optional[float]
+    tokens_after: Optional[float]
+    messages: int
+
+
+Event = Union[
+    TurnStarted,
+    TurnEnded,
+    LLMRequest,
+    LLMResponse,
+    ToolStarted,
+    ToolFinished,
+    Compacted,
+]
+
+
+class Backpressure(str, Enum):
+    """What `publish` does when a subscriber's queue is full."""
+
+    BLOCK = "block"  # wait for room; nothing is lost, the publisher slows down
+    DROP = "drop"  # discard the new event
+    COALESCE = "coalesce"  # replace the oldest queued event of the same type
+
+
+class _Dispatcher:
+    """A small pool of threads shared by every subscription. A subscription with
+    queued events is scheduled once; a worker handles one of its events and
+    reschedules it if more are queued, so each subscriber sees its events in
+    order and subscribers take turns."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._ready: Deque["Subscription"] = deque()
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+        self._cond = threading.Condition()
+
+    def schedule(self, subscription: "Subscription"):
+        with self._cond:
+            self._ready.append(subscription)
+            if not self._idle and len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work, daemon=True, name="min-cc-events"
+                )
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+
+    def is_worker(self) -> bool:
+        return threading.current_thread() in self._threads
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._idle += 1
+                while not self._ready:
+                    self._cond.wait()
+                self._idle -= 1
+                subscription = self._ready.popleft()
+            subscription._handle_next()
+
+
+_dispatcher = _Dispatcher(EVENT_WORKERS)
+
+
+class Subscription:
+    """One subscriber: a bounded queue whose events are handled on the shared
+    dispatcher threads, so a slow handler delays neither the publisher nor,
+    beyond the one thread it occupies, other subscribers."""
+
+    def __init__(
+        self,
+        handler: Callable[[Event], None],
+        types: Optional[Sequence[Type]] = None,
+        policy: Backpressure = Backpressure.DROP,
+        maxsize: int = EVENT_QUEUE_SIZE,
+    ):
+        self.handler = handler
+        self.types = tuple(types) if types else None
+        self.policy = Backpressure(policy)
+        self.maxsize = max(1, maxsize)
+        self.dropped = 0  # events dropped or coalesced away
+        self.errors = 0  # handler exceptions
+        self._queue: Deque[Event] = deque()
+        self._scheduled = False  # waiting for or held by a dispatcher thread
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def accepts(self, event: Event) -> bool:
+        return self.types is None or isinstance(event, self.types)
+
+    def offer(self, event: Event):
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._queue) >= self.maxsize:
+                if self.policy == Backpressure.BLOCK:
+                    while len(self._queue) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+                elif self.policy == Backpressure.COALESCE:
+                    self.dropped += 1
+                    for i, queued in enumerate(self._queue):
+                        if type(queued) is type(event):
+                            del self._queue[i]
+                            break
+                    else:
+                        self._queue.popleft()
+                else:
+                    self.dropped += 1
+                    return
+            self._queue.append(event)
+            self._cond.notify_all()
+            if not self._scheduled:
+                self._scheduled = True
+                _dispatcher.schedule(self)
+
+    def _handle_next(self):
+        with self._cond:
+            if not self._queue:
+                self._scheduled = False
+                self._cond.notify_all()
+                return
+            event = self._queue.popleft()
+            self._busy = True
+            self._cond.notify_all()  # room for a blocked publisher
+        try:
+            self.handler(event)
+        except Exception:
+            self.errors += 1
+        finally:
+            with self._cond:
+                self._busy = False
+                self._scheduled = bool(self._queue)
+                if self._scheduled:
+                    _dispatcher.schedule(self)
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been handled; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop accepting events, then deliver the ones already queued."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if not _dispatcher.is_worker():  # a handler closing its subscription
+            self.flush(timeout)
+
+
+class EventBus:
+    """Typed agent events (see the NamedTuples above) dispatched off the agent
+    loop. `publish` only enqueues; each subscriber has its own queue and
+    Backpressure policy, and handlers run on a small shared thread pool."""
+
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        handler: Callable[[Event], None],
+        types: Optional[Sequence[Type]] = None,
+        policy: Backpressure = Backpressure.DROP,
+        maxsize: int = EVENT_QUEUE_SIZE,
+    ) -> Subscription:
+        """Call `handler` with each event (of `types`, if given), in order, on a
+        dispatcher thread."""
+        subscription = Subscription(handler, types, policy, maxsize)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions = [
+                s for s in self._subscriptions if s is not subscription
+            ]
+        subscription.close()
+
+    def publish(self, event: Event):
+        for subscription in self._subscriptions:  # copy-on-write; no lock needed
+            if subscription.accepts(event):
+                subscription.offer(event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every subscriber has handled the events published so far.
+        Must not be called from a handler."""
+        return all(s.flush(timeout) for s in self._subscriptions)
+
+    def close(self):
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.close()
+
+
+def callback_handler(
+    on_event: Callable[[str, Dict[str, Any]], None]
+) -> Callable[[Event], None]:
+    """Adapt an `on_event(type, data)` callback to an event handler."""
+    return lambda event: on_event(event.type, event._asdict())
@@ -0,0 +1,340 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .agent import CodingAgent
+from .constants import FORK_DIR, SYMBOL_SKIP_DIRS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# relpath -> (mtime_ns, size) of a file in a fork's workspace as it was cloned,
+# which are also those of the file it was cloned from (see shutil.copystat)
+Baseline = Dict[str, Tuple[int, int]]
+
+_FICLONE = 0x40049409  # Linux ioctl sharing a file's extents copy-on-write
+# Devices where FICLONE failed, so their files are copied without trying it
+_no_reflink: Set[int] = set()
+
+
+def _source_files(root: str) -> Iterator[str]:
+    """Relative paths of the workspace files a fork gets a copy of: everything
+    outside hidden directories (.git, .min-cc, ...) and environments/builds."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames if not d.startswith(".") and d not in SYMBOL_SKIP_DIRS
+        )
+        for name in sorted(filenames):
+            if name != ".git":  # a worktree's link to its repository
+                yield os.path.relpath(os.path.join(dirpath, name), root)
+
+
+def _clone_file(source: str, destination: str, device: int):
+    """Copy-on-write clone where the filesystem supports it (btrfs, XFS, ...),
+    otherwise a regular copy. `device` is that of the destination directory."""
+    if fcntl is not None and device not in _no_reflink:
+        try:
+            with open(source, "rb") as src, open(destination, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            shutil.copystat(source, destination)
+            return
+        except OSError:
+            _no_reflink.add(device)
+    shutil.copy2(source, destination)
+
+
+def _git(cwd: str, *args: str) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, timeout=60
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _hash(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _add_worktree(top: str, destination: str) -> bool:
+    """An unpopulated git worktree of the repository at `top`: its own HEAD and
+    index, sharing the object store, so no history is copied."""
+    if _git(top, "worktree", "add", "--detach", "--no-checkout", "-q", destination) is None:
+        return False
+    _git(destination, "reset", "-q")  # index = HEAD, working tree untouched
+    return True
+
+
+def fork_root(source: str, destination: str) -> str:
+    """Where clone_workspace(source, destination) puts the files of `source`:
+    `destination` itself, or the same subdirectory of it that `source` is of
+    its git repository."""
+    prefix = _git(source, "rev-parse", "--show-prefix")
+    return os.path.normpath(os.path.join(destination, prefix)) if prefix else destination
+
+
+def clone_workspace(source: str, destination: str) -> Baseline:
+    """Copy the files of `source` to fork_root(source, destination) and record
+    what was copied. Nothing is hashed; see ForkManager.changes.
+
+    Files are cloned copy-on-write where the filesystem allows. If `source` is
+    in a git repository, `destination` becomes a worktree of it, so git in the
+    fork sees the same commits and uncommitted changes as in `source` but has
+    a HEAD and index of its own.
+    """
+    root = destination
+    top = _git(source, "rev-parse", "--show-toplevel")
+    if top is not None and _add_worktree(top, destination):
+        root = fork_root(source, destination)
+        if root != destination:
+            # The rest of the repository as committed, so it doesn't look deleted
+            subdir = os.path.relpath(root, destination)
+            _git(destination, "checkout", "-q", "HEAD", "--", ".", f":(exclude){subdir}")
+
+    baseline: Baseline = {}
+    os.makedirs(root, exist_ok=True)
+    device = os.stat(root).st_dev
+    for rel in _source_files(source):
+        dst = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        try:
+            _clone_file(os.path.join(source, rel), dst, device)
+            st = os.stat(dst)
+        except OSError:
+            continue  # unreadable or vanished; the fork simply lacks it
+        baseline[rel] = (st.st_mtime_ns, st.st_size)
+    return baseline
+
+
+def _replace_file(source: str, destination: str):
+    directory = os.path.dirname(destination)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(destination)}.")
+    os.close(fd)
+    try:
+        shutil.copy2(source, tmp)
+        os.replace(tmp, destination)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class Fork:
+    __slots__ = ("name", "agent", "parent", "baseline", "workspace")
+
+    def __init__(
+        self,
+        name: str,
+        agent: CodingAgent,
+        parent: Optional[str] = None,
+        baseline: Optional[Baseline] = None,
+        workspace: Optional[str] = None,
+    ):
+        self.name = name
+        self.agent = agent
+        self.parent = parent  # name of the fork this one was forked from
+        # Files of its own workspace at fork time; None if it shares its parent's
+        self.baseline = baseline
+        # Directory holding its own workspace (its root, or the worktree above it)
+        self.workspace = workspace
+
+
+class ForkManager:
+    """The named conversation forks of one session, one of which is active.
+
+    A fork continues from the active conversation without copying it (see
+    CodingAgent.fork). By default it also gets its own copy of the workspace
+    (see clone_workspace) under `fork_dir`, outside the workspace, so forks can
+    try different approaches side by side, even concurrently with `run`, and a
+    fork's file changes can later be merged into the workspace it was forked
+    from.
+
+    Each fork has its own event bus; `on_fork(agent)`, if given, is called with
+    every new fork's agent, e.g. to subscribe to its events.
+    """
+
+    def __init__(
+        self,
+        agent: CodingAgent,
+        name: str = "main",
+        fork_dir: Optional[str] = None,
+        on_fork: Optional[Callable[[CodingAgent], Any]] = None,
+    ):
+        self.on_fork = on_fork
+        self.root = os.path.abspath(agent.root or ".")
+        self.fork_dir = os.path.join(
+            os.path.expanduser(fork_dir or FORK_DIR),
+            f"{os.path.basename(self.root)}-"
+            f"{hashlib.sha256(self.root.encode()).hexdigest()[:8]}",
+        )
+        self.forks: Dict[str, Fork] = {name: Fork(name, agent)}
+        self.active = name
+
+    @property
+    def agent(self) -> CodingAgent:
+        return self.forks[self.active].agent
+
+    def get(self, name: str) -> Fork:
+        fork = self.forks.get(name)
+        if fork is None:
+            raise ValueError(f"No fork named {name!r}.")
+        return fork
+
+    def fork(self, name: Optional[str] = None, isolate: bool = True) -> Fork:
+        """Fork the active conversation (without switching to the fork)."""
+        if name is None:
+            n = len(self.forks)
+            while f"fork-{n}" in self.forks:
+                n += 1
+            name = f"fork-{n}"
+        if not re.fullmatch(r"[\w.-]+", name) or name in self.forks:
+            raise ValueError(f"Invalid or existing fork name {name!r}.")
+
+        parent = self.forks[self.active]
+        if not isolate:
+            return self._add(Fork(name, parent.agent.fork(), parent.name))
+
+        source = os.path.abspath(parent.agent.root or ".")
+        workspace = os.path.join(self.fork_dir, name)
+        # Before cloning, as a registry that can't be rooted (remote) raises
+        agent = parent.agent.fork(root=fork_root(source, workspace))
+        self._remove_workspace(workspace)  # left by an earlier session
+        try:
+            baseline = clone_workspace(source, workspace)
+        except BaseException:
+            self._remove_workspace(workspace)
+            raise
+        return self._add(Fork(name, agent, parent.name, baseline, workspace))
+
+    def _add(self, fork: Fork) -> Fork:
+        if self.on_fork:
+            self.on_fork(fork.agent)
+        self.forks[fork.name] = fork
+        return fork
+
+    def _remove_workspace(self, workspace: str):
+        shutil.rmtree(workspace, ignore_errors=True)
+        _git(self.root, "worktree", "prune")  # no-op outside a git repository
+
+    def switch(self, name: str) -> CodingAgent:
+        self.get(name)
+        self.active = name
+        return self.agent
+
+    def run(self, prompts: Dict[str, str]) -> Dict[str, str]:
+        """Run one turn in each named fork concurrently; returns each fork's answer
+        (or error)."""
+
+        def run_one(name: str) -> str:
+            try:
+                return self.get(name).agent.run(prompts[name]) or ""
+            except Exception as e:
+                return f"Error: {type(e).__name__}: {e}"
+
+        with ThreadPoolExecutor(max_workers=max(1, len(prompts))) as pool:
+            return dict(zip(prompts, pool.map(run_one, prompts)))
+
+    def changes(self, name: str) -> List[Tuple[str, str]]:
+        """("A" | "M" | "D", relpath) for each file the fork changed in its own
+        workspace.
+
+        Unchanged files are recognised by mtime and size alone. A file whose
+        stat changed is compared with the one it was cloned from, if that one
+        is still as it was at fork time; otherwise it counts as modified.
+        """
+        fork = self.get(name)
+        if fork.baseline is None:
+            return []
+        root = fork.agent.root
+        source = os.path.abspath(self.get(fork.parent).agent.root or ".")
+        changes = []
+        seen = set()
+        for rel in _source_files(root):
+            seen.add(rel)
+            before = fork.baseline.get(rel)
+            if before is None:
+                changes.append(("A", rel))
+                continue
+            path = os.path.join(root, rel)
+            stat = _stat(path)
+            if stat is None or stat == before:
+                continue
+            original = os.path.join(source, rel)
+            if _stat(original) != before or _hash(path) != _hash(original):
+                changes.append(("M", rel))
+        changes += [("D", rel) for rel in sorted(set(fork.baseline) - seen)]
+        return sorted(changes, key=lambda change: change[1])
+
+    def merge(self, name: str) -> List[Tuple[str, str]]:
+        """Apply the fork's file changes to the workspace it was forked from.
+
+        Files changed there since the fork (by mtime or size) are left alone
+        and reported as "conflict". The merge is checkpointed like a turn, so
+        `/rewind` in the parent undoes it. The parent's history gets a note
+        listing what was merged.
+        """
+        fork = self.get(name)
+        if fork.parent is None or fork.baseline is None:
+            raise ValueError(f"Fork {name!r} has no workspace of its own to merge.")
+        target = self.get(fork.parent).agent
+        target_root = os.path.abspath(target.root or ".")
+        results = []
+        for status, rel in self.changes(name):
+            destination = os.path.join(target_root, rel)
+            if _stat(destination) != fork.baseline.get(rel):
+                results.append(("conflict", rel))
+            else:
+                results.append((status, rel))
+
+        merged = [(status, rel) for status, rel in results if status != "conflict"]
+        if not merged:
+            return results
+        paths = [os.path.join(target_root, rel) for _, rel in merged]
+        target.checkpoints.begin_turn(target.state.messages)
+        target.checkpoints.snapshot(paths)
+        for (status, rel), destination in zip(merged, paths):
+            if status == "D":
+                os.remove(destination)
+            else:
+                _replace_file(os.path.join(fork.agent.root, rel), destination)
+            target.changed_files.add(destination)
+
+        listing = ", ".join(f"{status} {rel}" for status, rel in merged)
+        target.add_message("user", f"[Merged file changes from fork {name}: {listing}]")
+        return results
+
+    def discard(self, name: str):
+        """Drop a fork and delete its workspace."""
+        fork = self.get(name)
+        if name == self.active:
+            raise ValueError("Cannot discard the active fork; switch away first.")
+        del self.forks[name]
+        fork.agent.close()
+        if fork.workspace is not None:
+            self._remove_workspace(fork.workspace)
+
+    def close(self):
+        """Release every fork's resources. Fork workspaces are kept on disk."""
+        for fork in self.forks.values():
+            fork.agent.close()
@@ -0,0 +1,175 @@
+from collections.abc import MutableSequence, Sequence
+from typing import Any, Iterable, Iterator, List, Tuple, Union
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+
+
+def _new_path(level: int, node: Tuple) -> Tuple:
+    return node if level == 0 else (_new_path(level - _BITS, node),)
+
+
+class PersistentVector:
+    """An immutable sequence where append and set return a new vector sharing
+    all but O(log32 n) nodes with the old one (a 32-way trie plus a tail, as in
+    Clojure's PersistentVector)."""
+
+    __slots__ = ("_count", "_shift", "_root", "_tail")
+
+    def __init__(
+        self, count: int = 0, shift: int = _BITS, root: Tuple = (), tail: Tuple = ()
+    ):
+        self._count = count
+        self._shift = shift
+        self._root = root
+        self._tail = tail
+
+    @classmethod
+    def from_iterable(cls, items: Iterable[Any]) -> "PersistentVector":
+        vector = cls()
+        for item in items:
+            vector = vector.append(item)
+        return vector
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _tail_offset(self) -> int:
+        return 0 if self._count < _WIDTH else ((self._count - 1) >> _BITS) << _BITS
+
+    def _leaf(self, i: int) -> Tuple:
+        if i >= self._tail_offset():
+            return self._tail
+        node = self._root
+        for level in range(self._shift, 0, -_BITS):
+            node = node[(i >> level) & _MASK]
+        return node
+
+    def get(self, i: int) -> Any:
+        return self._leaf(i)[i & _MASK]
+
+    def __iter__(self) -> Iterator[Any]:
+        for start in range(0, self._tail_offset(), _WIDTH):
+            yield from self._leaf(start)
+        yield from self._tail
+
+    def append(self, item: Any) -> "PersistentVector":
+        if self._count - self._tail_offset() < _WIDTH:
+            return PersistentVector(
+                self._count + 1, self._shift, self._root, self._tail + (item,)
+            )
+        shift = self._shift
+        if (self._count >> _BITS) > (1 << shift):  # the root is full
+            root = (self._root, _new_path(shift, self._tail))
+            shift += _BITS
+        else:
+            root = self._push_tail(shift, self._root, self._tail)
+        return PersistentVector(self._count + 1, shift, root, (item,))
+
+    def _push_tail(self, level: int, parent: Tuple, tail: Tuple) -> Tuple:
+        index = ((self._count - 1) >> level) & _MASK
+        if level == _BITS:
+            child = tail
+        elif index < len(parent):
+            child = self._push_tail(level - _BITS, parent[index], tail)
+        else:
+            child = _new_path(level - _BITS, tail)
+        if index < len(parent):
+            return parent[:index] + (child,) + parent[index + 1 :]
+        return parent + (child,)
+
+    def set(self, i: int, item: Any) -> "PersistentVector":
+        if i >= self._tail_offset():
+            j = i & _MASK
+            tail = self._tail[:j] + (item,) + self._tail[j + 1 :]
+            return PersistentVector(self._count, self._shift, self._root, tail)
+        root = self._set(self._shift, self._root, i, item)
+        return PersistentVector(self._count, self._shift, root, self._tail)
+
+    def _set(self, level: int, node: Tuple, i: int, item: Any) -> Tuple:
+        if level == 0:
+            j = i & _MASK
+            return node[:j] + (item,) + node[j + 1 :]
+        j = (i >> level) & _MASK
+        return node[:j] + (self._set(level - _BITS, node[j], i, item),) + node[j + 1 :]
+
+
+class MessageLog(MutableSequence):
+    """The message history as a list backed by a PersistentVector.
+
+    `MessageLog(log)` and `fork()` are O(1): the copies share every message and
+    almost all of the index with the original, and diverge from there as each
+    is appended to or edited. Messages themselves are shared, so they must be
+    replaced rather than modified in place.
+    """
+
+    __slots__ = ("_vector",)
+
+    def __init__(self, messages: Iterable[Any] = ()):
+        if isinstance(messages, MessageLog):
+            self._vector = messages._vector
+        else:
+            self._vector = PersistentVector.from_iterable(messages)
+
+    def fork(self) -> "MessageLog":
+        return MessageLog(self)
+
+    def _index(self, i: int) -> int:
+        n = len(self._vector)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("message index out of range")
+        return i
+
+    def __len__(self) -> int:
+        return len(self._vector)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._vector)
+
+    def __getitem__(self, i: Union[int, slice]) -> Any:
+        if isinstance(i, slice):
+            return list(self)[i]
+        return self._vector.get(self._index(i))
+
+    def __setitem__(self, i: Union[int, slice], message: Any):
+        if isinstance(i, slice):
+            messages = list(self)
+            messages[i] = message
+            self._vector = PersistentVector.from_iterable(messages)
+        else:
+            self._vector = self._vector.set(self._index(i), message)
+
+    def __delitem__(self, i: Union[int, slice]):
+        messages = list(self)
+        del messages[i]
+        self._vector = PersistentVector.from_iterable(messages)
+
+    def insert(self, i: int, message: Any):
+        if i >= len(self):
+            self.append(message)
+            return
+        messages = list(self)
+        messages.insert(i, message)
+        self._vector = PersistentVector.from_iterable(messages)
+
+    def append(self, message: Any):
+        self._vector = self._vector.append(message)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"MessageLog({list(self)!r})"
+
+    def __add__(self, other: Iterable[Any]) -> List[Any]:
+        return list(self) + list(other)
+
+    def __radd__(self, other: Iterable[Any]) -> List[Any]:
+        return list(other) + list(self)
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import tempfile
+from enum import Enum
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from .constants import LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES
+from .transport import StreamWrapper
+
+
+class CacheMode(str, Enum):
+    RECORD = "record"  # serve hits, call through and store on misses
+    REPLAY = "replay"  # serve hits, raise CacheMiss on misses
+    PASSTHROUGH = "passthrough"  # never read or write the cache
+
+
+class CacheMiss(Exception):
+    pass
+
+
+class CachedClient:
+    """Wraps an OpenAI client so `chat.completions.create` is served from an on-disk
+    store keyed by a fingerprint of the canonical request."""
+
+    def __init__(
+        self,
+        client,
+        cache_dir: str = LLM_CACHE_DIR,
+        mode: CacheMode = CacheMode.RECORD,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+    ):
+        self.client = client
+        self.cache_dir = cache_dir
+        self.mode = CacheMode(mode)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+    def fingerprint(self, request: Dict[str, Any]) -> str:
+        canonical = {
+            "base_url": str(getattr(self.client, "base_url", "")),
+            **request,
+        }
+        data = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def create(self, **kwargs):
+        if self.mode == CacheMode.PASSTHROUGH:
+            return self.client.chat.completions.create(**kwargs)
+
+        key = self.fingerprint(kwargs)
+        cached = self._load(key)
+        if cached is not None:
+            self.hits += 1
+            if kwargs.get("stream"):
+                return self._replay_stream(cached["chunks"])
+            return ChatCompletion.model_validate(cached)
+
+        self.misses += 1
+        if self.mode == CacheMode.REPLAY:
+            raise CacheMiss(f"No cached response for request {key[:12]}.")
+
+        response = self.client.chat.completions.create(**kwargs)
+        if kwargs.get("stream"):
+            return StreamWrapper(response, self._record_stream(key, response))
+        self._store(key, response.model_dump(mode="json"))
+        return response
+
+    def _record_stream(self, key: str, stream) -> Iterator[ChatCompletionChunk]:
+        """Pass chunks through, storing them once the stream completes (not if
+        it is closed early)."""
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk.model_dump(mode="json"))
+            yield chunk
+        self._store(key, {"chunks": chunks})
+
+    def _replay_stream(self, chunks: List[Dict[str, Any]]) -> Iterator[ChatCompletionChunk]:
+        for chunk in chunks:
+            yield ChatCompletionChunk.model_validate(chunk)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return data
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, data: Dict[str, Any]):
+        path = self._path(key)
+        size = self._current_size()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+        self._size = size + os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield st.st_mtime, st.st_size, path
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def _evict(self):
+        """Drop least recently used entries until the store is back under 90% of max_bytes."""
+        entries = sorted(self._entries())
+        size = sum(e[1] for e in entries)
+        target = self.max_bytes * 0.9
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= entry_size
+            except OSError:
+                pass
+        self._size = size
+
+
+def wrap_client_from_env(client):
+    """Wrap `client` in a CachedClient when the LLM_CACHE environment variable is set."""
+    mode = os.getenv("LLM_CACHE", "").lower()
+    if not mode:
+        return client
+    return CachedClient(
+        client,
+        cache_dir=os.getenv("LLM_CACHE_DIR", LLM_CACHE_DIR),
+        mode=CacheMode(mode),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", LLM_CACHE_MAX_BYTES)),
+    )
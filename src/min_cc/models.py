@@ -1,22 +1,129 @@
-from typing import List, Optional, Any, Dict, Union
-from pydantic import BaseModel, Field
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from pydantic import BaseModel
+
+from .blobs import BlobRef
+from .history import MessageLog
+
+# Messages and tool calls are the bulk of a long session's memory, so they are
+# plain slotted classes; pydantic is kept for values crossing API boundaries.
+
+
+class _Record:
+    __slots__ = ()
+    __hash__ = None
+
+    def model_dump(self) -> Dict[str, Any]:
+        # Private slots are exposed through a property of the same name
+        fields = (name.lstrip("_") for name in self.__slots__)
+        return {name: getattr(self, name) for name in fields}
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.model_dump() == other.model_dump()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.model_dump().items())
+        return f"{type(self).__name__}({fields})"
+
+
+class ToolCall(_Record):
+    __slots__ = ("id", "name", "arguments")
+
+    def __init__(self, id: str, name: str, arguments: str):
+        self.id = id
+        self.name = name
+        self.arguments = arguments
 
-class ToolCall(BaseModel):
-    id: str
-    name: str
-    arguments: str
 
 class ToolResult(BaseModel):
     tool_call_id: str
     content: str
     is_error: bool = False
 
-class Message(BaseModel):
-    role: str
-    content: Optional[str] = None
-    tool_calls: Optional[List[ToolCall]] = None
-    tool_call_id: Optional[str] = None  # For tool result messages
 
-class AgentState(BaseModel):
-    messages: List[Message] = Field(default_factory=list)
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+class Message(_Record):
+    """A chat message. Content may live in a BlobStore, referenced by `blob`."""
+
+    __slots__ = ("role", "_content", "tool_calls", "tool_call_id")
+
+    def __init__(
+        self,
+        role: str,
+        content: Union[str, BlobRef, None] = None,
+        tool_calls: Optional[List[ToolCall]] = None,
+        tool_call_id: Optional[str] = None,  # For tool result messages
+    ):
+        self.role = role
+        self._content = content
+        self.tool_calls = tool_calls
+        self.tool_call_id = tool_call_id
+
+    @property
+    def content(self) -> Optional[str]:
+        if isinstance(self._content, BlobRef):
+            return self._content.read()
+        return self._content
+
+    @content.setter
+    def content(self, value: Union[str, BlobRef, None]):
+        self._content = value
+
+    @property
+    def blob(self) -> Optional[BlobRef]:
+        return self._content if isinstance(self._content, BlobRef) else None
+
+    @property
+    def content_length(self) -> int:
+        """Length of the content in characters, without loading blobs."""
+        if isinstance(self._content, BlobRef):
+            return self._content.length
+        return len(self._content or "")
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "tool_calls": [tc.model_dump() for tc in self.tool_calls]
+            if self.tool_calls
+            else None,
+            "tool_call_id": self.tool_call_id,
+        }
+
+    @classmethod
+    def model_validate(cls, data: Dict[str, Any]) -> "Message":
+        tool_calls = data.get("tool_calls")
+        return cls(
+            role=data["role"],
+            content=data.get("content"),
+            tool_calls=[ToolCall(**tc) for tc in tool_calls] if tool_calls else None,
+            tool_call_id=data.get("tool_call_id"),
+        )
+
+
+class AgentState:
+    __slots__ = ("_messages", "metadata")
+
+    def __init__(
+        self,
+        messages: Optional[Iterable[Message]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        self.messages = messages if messages is not None else []
+        self.metadata = metadata if metadata is not None else {}
+
+    @property
+    def messages(self) -> MessageLog:
+        return self._messages
+
+    @messages.setter
+    def messages(self, messages: Iterable[Message]):
+        # Lists are copied into a log; a MessageLog is adopted as is
+        if not isinstance(messages, MessageLog):
+            messages = MessageLog(messages)
+        self._messages = messages
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {
+            "messages": [m.model_dump() for m in self.messages],
+            "metadata": self.metadata,
+        }
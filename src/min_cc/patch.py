@@ -0,0 +1,344 @@
+import os
+import re
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .constants import PATCH_MAX_FUZZ
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+DEV_NULL = "/dev/null"
+
+
+class PatchError(Exception):
+    pass
+
+
+class Hunk:
+    __slots__ = ("old_start", "lines", "header", "old_eof_newline", "new_eof_newline")
+
+    def __init__(self, old_start: int, header: str):
+        self.old_start = old_start  # 1-based; 0 when unknown or for new files
+        self.header = header
+        self.lines: List[Tuple[str, str]] = []  # (" " | "-" | "+", text)
+        # None unless a "\ No newline at end of file" marker says otherwise
+        self.old_eof_newline: Optional[bool] = None
+        self.new_eof_newline: Optional[bool] = None
+
+    @property
+    def old(self) -> List[str]:
+        return [text for op, text in self.lines if op != "+"]
+
+    @property
+    def new(self) -> List[str]:
+        return [text for op, text in self.lines if op != "-"]
+
+
+class FilePatch:
+    __slots__ = ("old_path", "new_path", "hunks")
+
+    def __init__(self, old_path: str, new_path: str):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.hunks: List[Hunk] = []
+
+    @property
+    def path(self) -> str:
+        return self.old_path if self.new_path == DEV_NULL else self.new_path
+
+    @property
+    def is_new(self) -> bool:
+        return self.old_path == DEV_NULL
+
+    @property
+    def is_delete(self) -> bool:
+        return self.new_path == DEV_NULL
+
+
+def _header_path(line: str) -> str:
+    path = line[4:].split("\t", 1)[0].strip()
+    return path.strip('"')
+
+
+def parse_patch(text: str) -> List[FilePatch]:
+    """Parse a unified diff (optionally with `diff --git` headers) into file patches.
+
+    A hunk's body is consumed according to the line counts in its `@@` header,
+    so removed `-- x` / added `++ y` lines are not mistaken for a file header.
+    Hunks without counts, or with too few, fall back to reading lines until
+    something that cannot be part of a hunk.
+    """
+    patches: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    hunk: Optional[Hunk] = None
+    old_left = new_left = 0  # body lines the current hunk's header still promises
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        next_line = lines[i + 1] if i + 1 < len(lines) else ""
+        if hunk is not None and (old_left > 0 or new_left > 0) and line[:1] in " -+":
+            op = line[:1] or " "  # a blank context line with its space stripped
+            hunk.lines.append((op, line[1:]))
+            old_left -= op != "+"
+            new_left -= op != "-"
+            i += 1
+            continue
+        if line.startswith("--- ") and next_line.startswith("+++ "):
+            current = FilePatch(_header_path(line), _header_path(next_line))
+            patches.append(current)
+            hunk = None
+            i += 2
+            continue
+        if line.startswith("@@"):
+            if current is None:
+                raise PatchError(f"Hunk before any '---'/'+++' file header: {line}")
+            match = _HUNK_HEADER.match(line)
+            hunk = Hunk(int(match.group(1)) if match else 0, line)
+            current.hunks.append(hunk)
+            if match:
+                old_left = int(match.group(2) or 1)
+                new_left = int(match.group(4) or 1)
+            else:
+                old_left = new_left = 0
+        elif hunk is not None and line.startswith("\\"):
+            # "\ No newline at end of file" refers to the preceding line
+            if hunk.lines:
+                op = hunk.lines[-1][0]
+                if op in " -":
+                    hunk.old_eof_newline = False
+                if op in " +":
+                    hunk.new_eof_newline = False
+        elif hunk is not None and line[:1] in (" ", "-", "+"):
+            hunk.lines.append((line[0], line[1:]))
+        elif hunk is not None and line == "":
+            hunk.lines.append((" ", ""))  # blank context line with its space stripped
+        else:
+            hunk = None  # commit message, `diff --git`, `index ...` and similar noise
+        i += 1
+
+    for patch in patches:
+        for h in patch.hunks:
+            # Trailing blank "context" is usually an artifact of the patch text
+            while h.lines and h.lines[-1] == (" ", ""):
+                h.lines.pop()
+    if not patches:
+        raise PatchError("No file headers ('--- path' / '+++ path') found in patch.")
+    return patches
+
+
+_NORMALIZERS: List[Callable[[str], str]] = [
+    lambda s: s,
+    str.rstrip,
+    lambda s: "".join(s.split()),
+]
+
+
+def _find_block(
+    lines: List[str], block: List[str], hint: int, lower: int
+) -> Optional[int]:
+    """Index where `block` occurs in `lines` at or after `lower`, preferring the
+    position closest to `hint` and falling back to whitespace-insensitive matches."""
+    n = len(block)
+    last = len(lines) - n
+    if last < lower:
+        return None
+    hint = min(max(hint, lower), last)
+    for normalize in _NORMALIZERS:
+        target = [normalize(line) for line in block]
+        normalized = [normalize(line) for line in lines]
+        for distance in range(0, max(hint - lower, last - hint) + 1):
+            for pos in (hint - distance, hint + distance):
+                if lower <= pos <= last and normalized[pos : pos + n] == target:
+                    return pos
+    return None
+
+
+def _locate_hunk(
+    lines: List[str], hunk: Hunk, offset: int, lower: int
+) -> Tuple[int, int, int]:
+    """Locate `hunk` in `lines`; returns (position, old lines to replace, context
+    lines trimmed from the front) without modifying anything."""
+    old = hunk.old
+    if not old:  # pure insertion: "-n,0" means after line n
+        return min(max(hunk.old_start + offset, lower), len(lines)), 0, 0
+
+    hint = hunk.old_start - 1 + offset if hunk.old_start else lower
+    leading = next((i for i, (op, _) in enumerate(hunk.lines) if op != " "), 0)
+    trailing = next(
+        (i for i, (op, _) in enumerate(reversed(hunk.lines)) if op != " "), 0
+    )
+    # Like patch(1): retry with up to PATCH_MAX_FUZZ context lines dropped per side
+    for fuzz in range(PATCH_MAX_FUZZ + 1):
+        front = min(fuzz, leading)
+        back = min(fuzz, trailing)
+        block = old[front : len(old) - back]
+        if not block:
+            break
+        pos = _find_block(lines, block, hint + front, lower)
+        if pos is not None:
+            return pos, len(block), front
+    preview = "\n".join(old[:5])
+    raise PatchError(f"hunk {hunk.header} does not match; expected:\n{preview}")
+
+
+def apply_hunks(content: str, hunks: List[Hunk]) -> str:
+    """Apply `hunks` (in order) to `content`, keeping its line endings."""
+    eol = "\r\n" if "\r\n" in content else "\n"
+    final_newline = content.endswith(("\n", "\r\n")) or not content
+    lines = content.splitlines()
+    offset = 0
+    lower = 0
+    for number, hunk in enumerate(hunks, 1):
+        try:
+            pos, replaced, front = _locate_hunk(lines, hunk, offset, lower)
+        except PatchError as e:
+            raise PatchError(f"hunk {number} of {len(hunks)}: {e}") from None
+        trailing = next(
+            (i for i, (op, _) in enumerate(reversed(hunk.lines)) if op != " "), 0
+        )
+        back = len(hunk.old) - front - replaced
+        # Context lines are kept as they are in the file, which may differ in
+        # whitespace from the patch
+        new: List[str] = []
+        k = pos
+        for op, text in hunk.lines[front : len(hunk.lines) - back]:
+            if op == " ":
+                new.append(lines[k])
+            if op != "+":
+                k += 1
+            else:
+                new.append(text)
+        at_eof = pos + replaced >= len(lines)
+        lines[pos : pos + replaced] = new
+        if at_eof and hunk.new_eof_newline is not None:
+            final_newline = hunk.new_eof_newline
+        elif at_eof and hunk.old_eof_newline is False:
+            final_newline = True
+        offset += len(new) - replaced
+        lower = pos + len(new) - min(trailing, len(new))
+    if not lines:
+        return ""
+    return eol.join(lines) + (eol if final_newline else "")
+
+
+def atomic_write(path: str, content: str):
+    """Write via a temporary file in the same directory and rename it into place,
+    so readers never see a partially written file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            f.write(content)
+        if os.path.exists(path):
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _read(path: str) -> str:
+    with open(path, "r", newline="") as f:
+        return f.read()
+
+
+def _locator(resolve: Callable[[str], str]) -> Callable[[str], str]:
+    def locate(path: str) -> str:
+        # Strip git's a/ and b/ prefixes unless the prefixed path really exists
+        if path[:2] in ("a/", "b/") and not os.path.exists(resolve(path)):
+            return resolve(path[2:])
+        return resolve(path)
+
+    return locate
+
+
+def patch_paths(text: str, resolve: Callable[[str], str] = lambda p: p) -> List[str]:
+    """Every file `text` would create, modify or delete; empty if it does not parse."""
+    try:
+        patches = parse_patch(text)
+    except PatchError:
+        return []
+    locate = _locator(resolve)
+    return [
+        locate(path)
+        for patch in patches
+        for path in (patch.old_path, patch.new_path)
+        if path != DEV_NULL
+    ]
+
+
+def apply_patch(
+    text: str, resolve: Callable[[str], str] = lambda p: p
+) -> List[Tuple[str, str, int, int]]:
+    """Apply a multi-file unified diff all-or-nothing.
+
+    Every hunk of every file is validated in memory before anything is written;
+    if a write then fails, files already written are restored. Returns
+    (status "A" | "M" | "D" | "R", path, lines added, lines removed) per file.
+    """
+    patches = parse_patch(text)
+    locate = _locator(resolve)
+
+    # 1. Compute every resulting file without touching the disk
+    writes: Dict[str, Optional[str]] = {}  # path -> new content, None to delete
+    summary = []
+    for patch in patches:
+        old_path = None if patch.is_new else locate(patch.old_path)
+        new_path = None if patch.is_delete else locate(patch.new_path)
+        label = patch.path[2:] if patch.path[:2] in ("a/", "b/") else patch.path
+        added = sum(op == "+" for h in patch.hunks for op, _ in h.lines)
+        removed = sum(op == "-" for h in patch.hunks for op, _ in h.lines)
+        try:
+            if patch.is_new:
+                if os.path.exists(new_path) and new_path not in writes:
+                    raise PatchError("file already exists")
+                original = ""
+            else:
+                if old_path in writes:
+                    original = writes[old_path] or ""
+                elif os.path.isfile(old_path):
+                    original = _read(old_path)
+                else:
+                    raise PatchError("file not found")
+            result = apply_hunks(original, patch.hunks)
+        except (PatchError, OSError, UnicodeDecodeError) as e:
+            raise PatchError(f"{label}: {e}") from None
+
+        if patch.is_delete:
+            writes[old_path] = None
+            status = "D"
+        else:
+            writes[new_path] = result
+            status = "A" if patch.is_new else "M"
+            if old_path and old_path != new_path:
+                writes[old_path] = None
+                status = "R"
+        summary.append((status, label, added, removed))
+
+    # 2. Commit, keeping originals so a failed write can be rolled back
+    originals: Dict[str, Optional[str]] = {}
+    try:
+        for path, content in writes.items():
+            originals[path] = _read(path) if os.path.exists(path) else None
+            if content is None:
+                os.remove(path)
+            else:
+                atomic_write(path, content)
+    except OSError as e:
+        for path, original in originals.items():
+            try:
+                if original is None:
+                    if os.path.exists(path):
+                        os.remove(path)
+                else:
+                    atomic_write(path, original)
+            except OSError:
+                pass
+        raise PatchError(
+            f"writing {e.filename or 'files'} failed ({e.strerror}); rolled back"
+        ) from None
+    return summary
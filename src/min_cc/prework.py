@@ -0,0 +1,78 @@
+import threading
+from typing import List, Optional
+
+from .agent import CodingAgent
+from .cancellation import CancelToken, use_token
+from .symbols import get_symbol_index
+from .transport import warm_connection
+
+
+class IdleScheduler:
+    """Does the start-of-turn work in the background while the prompt waits.
+
+    `start` runs, in order: warming the HTTP connection to the provider,
+    refreshing the workspace symbol index, compacting the history (with any
+    summarization) and serializing it, so the next turn finds them done. `stop`
+    is called as soon as input is submitted: the remaining steps are skipped.
+    A summarization call in progress is aborted through the token, and `stop`
+    only waits for compaction to unwind, leaving the history as it was.
+    """
+
+    def __init__(self):
+        self.done: List[str] = []  # steps completed in the current idle period
+        self._token: Optional[CancelToken] = None
+        self._thread: Optional[threading.Thread] = None
+        # Held while the history is being changed in the background
+        self._history_lock = threading.Lock()
+
+    def start(self, agent: CodingAgent):
+        self.stop()
+        self.done = []
+        self._token = CancelToken()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(agent, self._token),
+            daemon=True,
+            name="min-cc-idle",
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._token is None:
+            return
+        self._token.cancel()
+        self._token = None
+        with self._history_lock:
+            pass  # wait for a cancelled compaction to unwind
+
+    def _run(self, agent: CodingAgent, token: CancelToken):
+        steps = (
+            ("connection", self._warm_connection),
+            ("index", self._refresh_index),
+            ("history", self._prepare_history),
+        )
+        with use_token(token):
+            for name, step in steps:
+                if token.cancelled:
+                    return
+                try:
+                    step(agent, token)
+                except Exception:
+                    continue  # best effort; the turn does the work itself
+                if not token.cancelled:
+                    self.done.append(name)
+
+    def _warm_connection(self, agent: CodingAgent, token: CancelToken):
+        base_url = getattr(agent.client, "base_url", None)
+        if base_url:
+            warm_connection(str(base_url))
+
+    def _refresh_index(self, agent: CodingAgent, token: CancelToken):
+        get_symbol_index(agent.root)
+
+    def _prepare_history(self, agent: CodingAgent, token: CancelToken):
+        with self._history_lock:
+            if token.cancelled:
+                return  # input was submitted; the turn owns the history now
+            agent.compact()
+            agent._prepare_messages()
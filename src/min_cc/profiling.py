@@ -0,0 +1,154 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from .constants import PROFILE_DIR, PROFILE_TOP
+
+# tracemalloc's own bookkeeping and import machinery are noise in reports
+_ALLOC_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+]
+
+
+class TurnProfile:
+    """Where one profiled turn spent CPU time and memory."""
+
+    __slots__ = ("turn", "stats_path", "alloc_path", "cpu_s", "hot", "peak_bytes")
+
+    def __init__(
+        self,
+        turn: int,
+        stats_path: str,
+        alloc_path: str,
+        cpu_s: float,
+        hot: List[Tuple[str, int, float, float]],
+        peak_bytes: int,
+    ):
+        self.turn = turn
+        self.stats_path = stats_path
+        self.alloc_path = alloc_path
+        self.cpu_s = cpu_s
+        self.hot = hot  # (function, calls, own seconds, cumulative seconds)
+        self.peak_bytes = peak_bytes
+
+    def summary(self, limit: int = 5) -> str:
+        lines = [
+            f"Turn {self.turn}: {self.cpu_s:.3f}s CPU, "
+            f"peak {self.peak_bytes / 1e6:.1f} MB traced -> {self.stats_path}"
+        ]
+        for function, calls, own, cumulative in self.hot[:limit]:
+            lines.append(
+                f"  {own:8.3f}s own {cumulative:8.3f}s cum {calls:>8} calls  {function}"
+            )
+        return "\n".join(lines)
+
+
+def _label(key: Tuple[str, int, str]) -> str:
+    filename, line, name = key
+    if filename == "~":  # built-in
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class Profiler:
+    """Profiles agent turns with cProfile and tracemalloc.
+
+    Timings use the CPU clock of the profiled thread, so time spent waiting on
+    the LLM, the network or subprocesses is left out and what remains is the
+    agent's own work. Each turn writes `turn-NNN.pstats` (for `python -m pstats`
+    or snakeviz) and `turn-NNN-alloc.txt` (top allocation sites still alive at
+    the end of the turn) to `directory`.
+    """
+
+    def __init__(self, directory: Optional[str] = None, top: int = PROFILE_TOP):
+        self.directory = directory or os.path.join(
+            PROFILE_DIR, time.strftime("%Y%m%d-%H%M%S")
+        )
+        self.top = top
+        self.enabled = False
+        self.turns = 0
+        self._profile: Optional[cProfile.Profile] = None
+        self._started_tracemalloc = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+        self.end_turn()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def begin_turn(self):
+        if not self.enabled:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.clear_traces()  # also resets the peak
+        self._profile = cProfile.Profile(time.thread_time)
+
+    @contextmanager
+    def capture(self) -> Iterator[None]:
+        """Profile the current thread for the block, if a turn is being profiled.
+
+        cProfile only sees the thread that enabled it, so the thread running the
+        agent and the one rendering its output each wrap their part.
+        """
+        profile = self._profile
+        # A Profile can only be enabled on one thread at a time; other threads
+        # (and nested captures) run unprofiled
+        if profile is None or not self._lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+        finally:
+            self._lock.release()
+
+    def end_turn(self) -> Optional[TurnProfile]:
+        profile, self._profile = self._profile, None
+        if profile is None:
+            return None
+        self.turns += 1
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_ALLOC_FILTERS)
+
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, f"turn-{self.turns:03d}")
+        profile.dump_stats(stem + ".pstats")
+        stats = pstats.Stats(profile).stats
+        hot = sorted(
+            (
+                (_label(key), calls, own, cumulative)
+                for key, (_, calls, own, cumulative, _) in stats.items()
+            ),
+            key=lambda row: -row[2],
+        )[: self.top]
+
+        with open(stem + "-alloc.txt", "w") as f:
+            f.write(f"peak traced: {peak} bytes\n")
+            for stat in snapshot.statistics("lineno")[: self.top]:
+                f.write(f"{stat}\n")
+
+        return TurnProfile(
+            turn=self.turns,
+            stats_path=stem + ".pstats",
+            alloc_path=stem + "-alloc.txt",
+            cpu_s=sum(own for _, (_, _, own, _, _) in stats.items()),
+            hot=hot,
+            peak_bytes=peak,
+        )
@@ -0,0 +1,43 @@
+from typing import Any, Dict
+
+from .agent import get_current_agent
+from .constants import RECALL_MAX_RESULTS, RECALL_MAX_TOKENS
+from .tools import Tool
+
+
+class RecallTool(Tool):
+    name: str = "recall"
+    description: str = (
+        "Search earlier parts of this conversation that were compacted out of your "
+        "context: file contents you read, command and search output, your own "
+        "messages. Check here before repeating a read or search you may already "
+        "have done; returns the best-matching snippets."
+    )
+    parameters_schema: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Keywords, e.g. a file path, function name or error",
+            },
+            "max_tokens": {
+                "type": "integer",
+                "description": "Approximate size limit of the returned snippets",
+                "default": RECALL_MAX_TOKENS,
+            },
+        },
+        "required": ["query"],
+    }
+    read_only: bool = True
+
+    def execute(self, query: str, max_tokens: int = RECALL_MAX_TOKENS) -> str:
+        agent = get_current_agent()
+        if agent is None:
+            return "Error: recall is only available inside an agent session."
+        archive = agent.compaction_service.archive
+        if not len(archive):
+            return "Nothing has been compacted out of the conversation yet."
+        found = archive.recall(query, max(1, max_tokens), RECALL_MAX_RESULTS)
+        if found is None:
+            return f"No archived messages match {query!r}."
+        return found
@@ -0,0 +1,432 @@
+import hmac
+import json
+import socket
+import socketserver
+import struct
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cancellation import CancelToken, get_current_token, use_token
+from .constants import (
+    HTTP_CONNECT_TIMEOUT,
+    WORKER_CALL_TIMEOUT,
+    WORKER_COMPRESS_MIN,
+    WORKER_HELLO_MAX,
+    WORKER_MAX_FRAME,
+    WORKER_THREADS,
+)
+from .models import ToolResult
+from .tools import ToolRegistry
+from .utils import get_full_system_prompt
+
+# Frames are a header (payload length, flags) followed by a JSON payload.
+# Requests are {"id", "method", "params"}; responses {"id", "result" | "error"}
+# and may arrive in any order, so many requests can be in flight at once.
+PROTOCOL_VERSION = 1
+_HEADER = struct.Struct(">IB")
+_COMPRESSED = 1
+_ID_TYPES = (int, str, type(None))
+
+
+class WorkerError(Exception):
+    pass
+
+
+def write_frame(sock: socket.socket, message: Dict[str, Any]):
+    payload = json.dumps(message, separators=(",", ":")).encode()
+    flags = 0
+    if len(payload) >= WORKER_COMPRESS_MIN:
+        compressed = zlib.compress(payload, 1)
+        if len(compressed) < len(payload):
+            payload, flags = compressed, _COMPRESSED
+    sock.sendall(_HEADER.pack(len(payload), flags) + payload)
+
+
+def read_frame(
+    reader: BinaryIO, max_size: int = WORKER_MAX_FRAME
+) -> Optional[Dict[str, Any]]:
+    """The next message, or None once the connection is closed. Frames whose
+    payload is over `max_size` bytes, before or after decompression, or is not
+    a well-formed message (see _well_formed), raise ValueError."""
+    header = reader.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    length, flags = _HEADER.unpack(header)
+    if length > max_size:
+        raise ValueError(f"Frame of {length} bytes exceeds the limit.")
+    payload = reader.read(length)
+    if len(payload) < length:
+        return None
+    if flags & _COMPRESSED:
+        decompressor = zlib.decompressobj()
+        payload = decompressor.decompress(payload, max_size)
+        if decompressor.unconsumed_tail:
+            raise ValueError(f"Frame decompresses to over {max_size} bytes.")
+    message = json.loads(payload)
+    if not _well_formed(message):
+        raise ValueError("Frame is not a well-formed message.")
+    return message
+
+
+def _well_formed(message: Any) -> bool:
+    """A JSON object whose ids, if any, are scalars and whose `params`, if
+    any, is an object."""
+    if not isinstance(message, dict):
+        return False
+    params = message.get("params", {})
+    return (
+        isinstance(params, dict)
+        and isinstance(message.get("id"), _ID_TYPES)
+        and isinstance(params.get("id"), _ID_TYPES)
+    )
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Worker address must be host:port, not {address!r}.")
+    return host.strip("[]"), int(port)
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    server: "WorkerServer"
+
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile("rb")
+        write_lock = threading.Lock()
+        tokens: Dict[Any, CancelToken] = {}
+
+        def send(message: Dict[str, Any]):
+            with write_lock:
+                write_frame(sock, message)
+
+        try:
+            hello = read_frame(reader, WORKER_HELLO_MAX)
+            if hello is None:
+                return
+            if hello.get("method") != "hello" or not self.server.authorized(
+                hello.get("params", {}).get("token")
+            ):
+                send({"id": hello.get("id"), "error": "Not authorized."})
+                return
+            send({"id": hello.get("id"), "result": self.server.hello()})
+
+            while True:
+                request = read_frame(reader)
+                if request is None:
+                    break
+                if request.get("method") == "cancel":
+                    token = tokens.get(request.get("params", {}).get("id"))
+                    if token:
+                        token.cancel()
+                    continue
+                token = tokens[request.get("id")] = CancelToken()
+                self.server.pool.submit(self._serve, request, token, tokens, send)
+        except (OSError, ValueError):
+            pass  # connection dropped or garbled
+        finally:
+            for token in list(tokens.values()):
+                token.cancel()  # nobody is waiting for these any more
+
+    def _serve(
+        self,
+        request: Dict[str, Any],
+        token: CancelToken,
+        tokens: Dict[Any, CancelToken],
+        send: Callable[[Dict[str, Any]], None],
+    ):
+        try:
+            with use_token(token):
+                reply = {
+                    "id": request.get("id"),
+                    "result": self.server.dispatch(
+                        request.get("method"), request.get("params") or {}
+                    ),
+                }
+        except Exception as e:
+            reply = {"id": request.get("id"), "error": f"{type(e).__name__}: {e}"}
+        finally:
+            tokens.pop(request.get("id"), None)
+        try:
+            send(reply)
+        except OSError:
+            pass
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    """Hosts a tool registry next to a workspace for agents on other machines
+    (`min-cc worker`). Each connection may pipeline any number of calls; up to
+    `threads` run at once. If `token` is set, clients must present it."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        registry: ToolRegistry,
+        root: Optional[str] = None,
+        token: Optional[str] = None,
+        threads: int = WORKER_THREADS,
+    ):
+        super().__init__(address, _WorkerHandler)
+        self.registry = registry
+        self.root = root
+        self.token = token
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix="min-cc-worker")
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def authorized(self, token: Optional[str]) -> bool:
+        if not self.token:
+            return True
+        return isinstance(token, str) and hmac.compare_digest(token, self.token)
+
+    def hello(self) -> Dict[str, Any]:
+        return {"version": PROTOCOL_VERSION}
+
+    def dispatch(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "tools":
+            return [
+                {**definition["function"], "read_only": self.registry.is_read_only(
+                    definition["function"]["name"]
+                )}
+                for definition in self.registry.get_tool_definitions()
+            ]
+        if method == "execute":
+            result = self.registry.execute(
+                params.get("tool_call_id", ""), params["name"], params.get("arguments")
+            )
+            return {"content": result.content, "is_error": result.is_error}
+        if method == "prompt":
+            return get_full_system_prompt(self.root)
+        if method == "ping":
+            return "pong"
+        raise ValueError(f"Unknown method {method!r}.")
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+class WorkerClient:
+    """One persistent connection to a worker, shared by all calls to it.
+
+    Calls are written as soon as they are made and matched to their responses
+    by id, so concurrent calls (speculative reads, sub-agents, several
+    sessions) are pipelined over the connection rather than queued. A dropped
+    connection fails the calls in flight and is reopened by the next call.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        token: Optional[str] = None,
+        timeout: float = WORKER_CALL_TIMEOUT,
+    ):
+        self.address = address
+        self.host, self.port = parse_address(address)
+        self.token = token
+        self.timeout = timeout
+        self._lock = threading.Lock()  # connection state and writes
+        self._sock: Optional[socket.socket] = None
+        self._pending: Dict[int, Future] = {}
+        self._next_id = 1
+
+    def _connect(self) -> socket.socket:
+        try:
+            sock = socket.create_connection(
+                (self.host, self.port), timeout=HTTP_CONNECT_TIMEOUT
+            )
+        except OSError as e:
+            raise WorkerError(f"cannot connect to {self.address}: {e}") from None
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile("rb")
+        try:
+            write_frame(sock, {"id": 0, "method": "hello", "params": {"token": self.token}})
+            reply = read_frame(reader)
+        except (OSError, ValueError) as e:
+            sock.close()
+            raise WorkerError(f"handshake with {self.address} failed: {e}") from None
+        if reply is None or "error" in reply:
+            sock.close()
+            error = reply.get("error") if reply else "connection closed"
+            raise WorkerError(f"{self.address} refused the connection: {error}")
+        sock.settimeout(None)
+        threading.Thread(
+            target=self._read_loop,
+            args=(sock, reader),
+            daemon=True,
+            name="min-cc-worker-client",
+        ).start()
+        return sock
+
+    def submit(self, method: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Future]:
+        future: Future = Future()
+        with self._lock:
+            if self._sock is None:
+                self._sock = self._connect()
+            request_id = self._next_id
+            self._next_id += 1
+            self._pending[request_id] = future
+            try:
+                write_frame(
+                    self._sock, {"id": request_id, "method": method, "params": params or {}}
+                )
+            except OSError as e:
+                self._fail(self._sock, f"connection to {self.address} lost: {e}")
+        return request_id, future
+
+    def wait(self, request_id: int, future: Future) -> Any:
+        """The result of a submitted call. On timeout the call is cancelled on
+        the worker and forgotten here."""
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            self.cancel(request_id)
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise WorkerError(f"no reply from {self.address} in {self.timeout}s") from None
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return self.wait(*self.submit(method, params))
+
+    def cancel(self, request_id: int):
+        """Ask the worker to cancel a call in flight (e.g. kill its command)."""
+        with self._lock:
+            if self._sock is None or request_id not in self._pending:
+                return
+            try:
+                write_frame(self._sock, {"method": "cancel", "params": {"id": request_id}})
+            except OSError:
+                pass
+
+    def _read_loop(self, sock: socket.socket, reader: BinaryIO):
+        error = "connection closed"
+        try:
+            while True:
+                message = read_frame(reader)
+                if message is None:
+                    break
+                with self._lock:
+                    future = self._pending.pop(message.get("id"), None)
+                if future is None:
+                    continue
+                if "error" in message:
+                    future.set_exception(WorkerError(message["error"]))
+                else:
+                    future.set_result(message.get("result"))
+        except (OSError, ValueError) as e:
+            error = str(e)
+        with self._lock:
+            self._fail(sock, f"connection to {self.address} lost: {error}")
+
+    def _fail(self, sock: socket.socket, error: str):
+        """Close `sock` and fail its calls in flight; the lock must be held."""
+        if self._sock is not sock:
+            return  # already replaced by a new connection
+        self._sock = None
+        try:
+            sock.close()
+        except OSError:
+            pass
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(WorkerError(error))
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._fail(self._sock, "client closed")
+
+
+class RemoteToolRegistry(ToolRegistry):
+    """A registry whose workspace tools run on a worker (see WorkerServer).
+
+    Tools registered locally, such as `task` and `recall` which need the agent
+    itself, run in-process as usual. Checkpoints only cover local files, so
+    edits made on the worker cannot be rewound.
+    """
+
+    def __init__(
+        self, client: WorkerClient, remote_tools: Optional[List[Dict[str, Any]]] = None
+    ):
+        super().__init__()
+        self.client = client
+        if remote_tools is None:
+            remote_tools = client.call("tools")
+        self._remote = {tool["name"]: tool for tool in remote_tools}
+
+    def system_prompt(self) -> str:
+        """The system prompt with the worker's Min-CC.md and repository map."""
+        return self.client.call("prompt")
+
+    def subset(self, names: Iterable[str]) -> "RemoteToolRegistry":
+        names = set(names)
+        registry = RemoteToolRegistry(
+            self.client, [t for n, t in self._remote.items() if n in names]
+        )
+        for name in names:
+            if name in self._tools:
+                registry.register_tool(self._tools[name])
+        return registry
+
+    def rooted(self, root: Optional[str]) -> "ToolRegistry":
+        raise ValueError("A remote workspace cannot be cloned; use /fork shared.")
+
+    def is_read_only(self, name: str) -> bool:
+        if name in self._tools:
+            return super().is_read_only(name)
+        tool = self._remote.get(name)
+        return tool is not None and bool(tool.get("read_only"))
+
+    def get_tool_definitions(self) -> List[Dict[str, Any]]:
+        remote = [
+            {
+                "type": "function",
+                "function": {
+                    "name": tool["name"],
+                    "description": tool.get("description", ""),
+                    "parameters": tool.get("parameters", {}),
+                },
+            }
+            for name, tool in self._remote.items()
+            if name not in self._tools
+        ]
+        return remote + super().get_tool_definitions()
+
+    def execute(
+        self,
+        tool_call_id: str,
+        name: str,
+        arguments: str,
+        on_write: Optional[Callable[[List[str]], None]] = None,
+    ) -> ToolResult:
+        if name in self._tools or name not in self._remote:
+            return super().execute(tool_call_id, name, arguments, on_write)
+        params = {"tool_call_id": tool_call_id, "name": name, "arguments": arguments}
+        cancel = get_current_token()
+        try:
+            request_id, future = self.client.submit("execute", params)
+            unregister = (
+                cancel.on_cancel(lambda: self.client.cancel(request_id))
+                if cancel
+                else None
+            )
+            try:
+                result = self.client.wait(request_id, future)
+            finally:
+                if unregister:
+                    unregister()
+            content, is_error = result["content"], result["is_error"]
+        except WorkerError as e:
+            content, is_error = f"Error: worker {self.client.address}: {e}", True
+        return ToolResult(tool_call_id=tool_call_id, content=content, is_error=is_error)
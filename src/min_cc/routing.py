@@ -0,0 +1,48 @@
+import os
+from typing import Callable, Dict, Optional
+
+from .utils import get_token_limit
+
+# Call types that are not the main agent loop and may go to a cheaper model
+AUX_CALL_TYPES = ("summarization", "subagent")
+
+
+class ModelRouter:
+    """Picks the model for each call type; unrouted types use the agent's model.
+
+    `routes` maps call types ("summarization", "subagent", ...) to model ids. Each
+    routed model's token limit comes from `token_limit_lookup` (the model
+    metadata by default), so a small fast model is never handed more context
+    than it can take.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, str]] = None,
+        token_limit_lookup: Callable[[str], int] = get_token_limit,
+    ):
+        self.routes = {k: v for k, v in (routes or {}).items() if v}
+        self.token_limit_lookup = token_limit_lookup
+        self._limits: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        """AUX_MODEL routes every auxiliary call type; SUMMARIZER_MODEL overrides
+        it for summarization."""
+        aux = os.getenv("AUX_MODEL")
+        routes = {call_type: aux for call_type in AUX_CALL_TYPES if aux}
+        if os.getenv("SUMMARIZER_MODEL"):
+            routes["summarization"] = os.environ["SUMMARIZER_MODEL"]
+        return cls(routes)
+
+    def model_for(self, call_type: str, default: str) -> str:
+        return self.routes.get(call_type, default)
+
+    def token_limit_for(self, call_type: str, default: Optional[int]) -> Optional[int]:
+        """Token limit of the model serving `call_type`, or `default` if unrouted."""
+        model = self.routes.get(call_type)
+        if model is None:
+            return default
+        if model not in self._limits:
+            self._limits[model] = self.token_limit_lookup(model)
+        return self._limits[model]
@@ -0,0 +1,436 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .agent import CodingAgent
+from .cancellation import CancelToken, Cancelled
+from .compaction import CompactionService
+from .constants import (
+    DEFAULT_MODEL,
+    SERVER_EVENT_BUFFER,
+    SERVER_IDLE_TIMEOUT,
+    SERVER_KEEPALIVE,
+    SERVER_MAX_SESSIONS,
+)
+from .events import (
+    Backpressure,
+    Compacted,
+    LLMRequest,
+    LLMResponse,
+    ToolFinished,
+    ToolStarted,
+    callback_handler,
+)
+from .recall import RecallTool
+from .remote import RemoteToolRegistry, WorkerClient, WorkerError
+from .routing import ModelRouter
+from .subagent import TaskTool
+from .testselect import RunTestsTool
+from .tools import ToolRegistry, get_default_registry
+from .utils import get_token_limit
+
+
+class SessionLimitReached(Exception):
+    pass
+
+
+class SessionBusy(Exception):
+    pass
+
+
+class Session:
+    def __init__(self, session_id: str, agent: CodingAgent, worker: Optional[str] = None):
+        self.id = session_id
+        self.agent = agent
+        # Name of the worker the session's tools run on, if not local
+        self.worker = worker
+        self.created = time.time()
+        self.last_active = time.time()
+        self.closed = False
+        # Held while a turn runs; sessions process one message at a time
+        self.turn_lock = threading.Lock()
+        # Token of the running turn, if any
+        self.cancel_token: Optional[CancelToken] = None
+        self._events: Deque[Tuple[int, str, Dict[str, Any]]] = deque(
+            maxlen=SERVER_EVENT_BUFFER
+        )
+        self._next_event_id = 1
+        self._cond = threading.Condition()
+        # The agent's LLM, tool and compaction events are relayed to clients;
+        # turn start and end are published by send() with the turn's content
+        self._relay = agent.events.subscribe(
+            callback_handler(self.publish),
+            types=(LLMRequest, LLMResponse, ToolStarted, ToolFinished, Compacted),
+            policy=Backpressure.BLOCK,
+        )
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        with self._cond:
+            self._events.append((self._next_event_id, event_type, data))
+            self._next_event_id += 1
+            self._cond.notify_all()
+
+    def wait_events(
+        self, after_id: int, timeout: float
+    ) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Events newer than `after_id`, blocking up to `timeout` if there are none."""
+        with self._cond:
+            if self._next_event_id - 1 <= after_id and not self.closed:
+                self._cond.wait(timeout)
+            return [e for e in self._events if e[0] > after_id]
+
+    def cancel(self) -> bool:
+        """Cancel the running turn; returns whether there was one."""
+        token = self.cancel_token
+        if token is None:
+            return False
+        token.cancel()
+        return True
+
+    def close(self):
+        self.cancel()
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self.agent.events.unsubscribe(self._relay)
+        self.agent.close()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "model": self.agent.model,
+            "root": self.agent.root,
+            "worker": self.worker,
+            "created": self.created,
+            "last_active": self.last_active,
+            "busy": self.turn_lock.locked(),
+            "messages": len(self.agent.state.messages),
+        }
+
+
+class SessionManager:
+    """Hosts many agent sessions sharing one LLM client, model metadata and
+    per-workspace tool registries. Sessions may instead run their tools on one
+    of `workers` (name -> WorkerClient), sharing its connection."""
+
+    def __init__(
+        self,
+        client,
+        workspace_base: str = ".",
+        model: str = DEFAULT_MODEL,
+        max_sessions: int = SERVER_MAX_SESSIONS,
+        idle_timeout: float = SERVER_IDLE_TIMEOUT,
+        token_limit: Optional[int] = None,
+        pricing_lookup: Optional[Callable[[str], Optional[Dict[str, float]]]] = None,
+        router: Optional[ModelRouter] = None,
+        workers: Optional[Dict[str, WorkerClient]] = None,
+    ):
+        self.client = client
+        self.workspace_base = os.path.realpath(workspace_base)
+        self.model = model
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.token_limit = token_limit
+        self.pricing_lookup = pricing_lookup
+        self.router = router
+        self.workers = workers or {}
+        self._sessions: Dict[str, Session] = {}
+        self._registries: Dict[str, ToolRegistry] = {}
+        self._remote_registries: Dict[str, RemoteToolRegistry] = {}
+        self._lock = threading.Lock()
+
+    def _resolve_root(self, root: Optional[str]) -> str:
+        path = os.path.realpath(os.path.join(self.workspace_base, root or "."))
+        if os.path.commonpath([path, self.workspace_base]) != self.workspace_base:
+            raise ValueError(f"Workspace {root} is outside {self.workspace_base}.")
+        if not os.path.isdir(path):
+            raise ValueError(f"Workspace {root} does not exist.")
+        return path
+
+    def _remote_registry(self, worker: str) -> RemoteToolRegistry:
+        # Called with the lock held
+        registry = self._remote_registries.get(worker)
+        if registry is None:
+            client = self.workers.get(worker)
+            if client is None:
+                raise ValueError(f"Unknown worker {worker!r}.")
+            registry = self._remote_registries[worker] = RemoteToolRegistry(client)
+            registry.register_tool(TaskTool())
+            registry.register_tool(RecallTool())
+        return registry
+
+    def create(
+        self,
+        root: Optional[str] = None,
+        model: Optional[str] = None,
+        worker: Optional[str] = None,
+    ) -> Session:
+        # A worker's tools work in the workspace it was started with
+        root = None if worker else self._resolve_root(root)
+        model = model or self.model
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                self._reap_locked(time.time())
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitReached(f"Session limit ({self.max_sessions}) reached.")
+            # Tools are stateless apart from their root, so sessions share registries
+            registry = (
+                self._remote_registry(worker) if worker else self._registries.get(root)
+            )
+            if registry is None:
+                registry = self._registries[root] = get_default_registry(root=root)
+                registry.register_tool(TaskTool(root=root))
+                registry.register_tool(RunTestsTool(root=root))
+                registry.register_tool(RecallTool())
+
+        agent = CodingAgent(
+            api_key="",
+            model=model,
+            client=self.client,
+            registry=registry,
+            root=root,
+            compaction_service=CompactionService(
+                token_limit=self.token_limit or get_token_limit(model)
+            ),
+            pricing_lookup=self.pricing_lookup,
+            router=self.router,
+        )
+        session = Session(uuid.uuid4().hex, agent, worker)
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def list(self) -> List[Session]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session:
+            session.close()
+        return session is not None
+
+    def reap_idle(self) -> int:
+        with self._lock:
+            return self._reap_locked(time.time())
+
+    def _reap_locked(self, now: float) -> int:
+        idle = [
+            s
+            for s in self._sessions.values()
+            if now - s.last_active > self.idle_timeout and not s.turn_lock.locked()
+        ]
+        for s in idle:
+            del self._sessions[s.id]
+            s.close()
+        return len(idle)
+
+    def send(self, session: Session, content: str) -> str:
+        if not session.turn_lock.acquire(blocking=False):
+            raise SessionBusy("Session is busy with another message.")
+        try:
+            session.last_active = time.time()
+            session.publish("turn_start", {"content": content})
+            session.cancel_token = CancelToken()
+            try:
+                try:
+                    response = session.agent.run(content, cancel=session.cancel_token)
+                finally:
+                    session.agent.events.flush()  # relay the turn's events first
+            except Cancelled:
+                session.publish("cancelled", {})
+                raise
+            except Exception as e:
+                session.publish("error", {"message": str(e)})
+                raise
+            session.publish("turn_end", {"response": response})
+            return response
+        finally:
+            session.cancel_token = None
+            session.last_active = time.time()
+            session.turn_lock.release()
+
+
+_ROUTES = [
+    ("GET", r"/health", "health"),
+    ("GET", r"/sessions", "list_sessions"),
+    ("POST", r"/sessions", "create_session"),
+    ("GET", r"/sessions/(\w+)", "get_session"),
+    ("DELETE", r"/sessions/(\w+)", "close_session"),
+    ("POST", r"/sessions/(\w+)/messages", "send_message"),
+    ("POST", r"/sessions/(\w+)/clear", "clear_session"),
+    ("POST", r"/sessions/(\w+)/cancel", "cancel_turn"),
+    ("GET", r"/sessions/(\w+)/events", "stream_events"),
+]
+
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    manager: SessionManager = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        path = self.path.split("?", 1)[0].rstrip("/") or "/"
+        for route_method, pattern, handler in _ROUTES:
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                try:
+                    getattr(self, handler)(*match.groups())
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                except Exception as e:
+                    self._send_json(500, {"error": str(e)})
+                return
+        self._send_json(404, {"error": f"No route for {method} {path}"})
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _send_json(self, status: int, payload: Any):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _session(self, session_id: str) -> Optional[Session]:
+        session = self.manager.get(session_id)
+        if session is None:
+            self._send_json(404, {"error": f"Session {session_id} not found."})
+        return session
+
+    def health(self):
+        self._send_json(200, {"status": "ok", "sessions": len(self.manager.list())})
+
+    def list_sessions(self):
+        self._send_json(200, {"sessions": [s.info() for s in self.manager.list()]})
+
+    def create_session(self):
+        body = self._read_json()
+        try:
+            session = self.manager.create(
+                root=body.get("root"), model=body.get("model"), worker=body.get("worker")
+            )
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except WorkerError as e:
+            self._send_json(502, {"error": f"Worker {body.get('worker')}: {e}"})
+            return
+        except SessionLimitReached as e:
+            self._send_json(503, {"error": str(e)})
+            return
+        self._send_json(201, session.info())
+
+    def get_session(self, session_id: str):
+        session = self._session(session_id)
+        if session:
+            self._send_json(200, session.info())
+
+    def close_session(self, session_id: str):
+        if self.manager.close(session_id):
+            self._send_json(200, {"closed": session_id})
+        else:
+            self._send_json(404, {"error": f"Session {session_id} not found."})
+
+    def send_message(self, session_id: str):
+        session = self._session(session_id)
+        if not session:
+            return
+        content = self._read_json().get("content")
+        if not content:
+            self._send_json(400, {"error": "Missing 'content'."})
+            return
+        try:
+            response = self.manager.send(session, content)
+        except SessionBusy as e:
+            self._send_json(409, {"error": str(e)})
+            return
+        except Cancelled as e:
+            self._send_json(409, {"error": str(e), "cancelled": True})
+            return
+        self._send_json(200, {"response": response})
+
+    def cancel_turn(self, session_id: str):
+        session = self._session(session_id)
+        if session:
+            self._send_json(200, {"cancelled": session.cancel()})
+
+    def clear_session(self, session_id: str):
+        session = self._session(session_id)
+        if not session:
+            return
+        with session.turn_lock:
+            session.agent.clear_history()
+        session.publish("cleared", {})
+        self._send_json(200, session.info())
+
+    def stream_events(self, session_id: str):
+        session = self._session(session_id)
+        if not session:
+            return
+        last_id = int(self.headers.get("Last-Event-ID") or 0)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        while not session.closed:
+            events = session.wait_events(last_id, timeout=SERVER_KEEPALIVE)
+            if not events:
+                self.wfile.write(b": keepalive\n\n")
+            for event_id, event_type, data in events:
+                self.wfile.write(
+                    f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n".encode()
+                )
+                last_id = event_id
+            self.wfile.flush()
+        self.wfile.write(b"event: closed\ndata: {}\n\n")
+
+
+def make_server(
+    manager: SessionManager, host: str = "127.0.0.1", port: int = 8765
+) -> ThreadingHTTPServer:
+    handler = type("Handler", (AgentRequestHandler,), {"manager": manager})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_reaper(manager: SessionManager, interval: float = 60.0) -> threading.Thread:
+    def reap():
+        while True:
+            time.sleep(interval)
+            manager.reap_idle()
+
+    thread = threading.Thread(target=reap, daemon=True)
+    thread.start()
+    return thread
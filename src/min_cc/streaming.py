@@ -0,0 +1,122 @@
+import contextvars
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .constants import SPECULATIVE_WORKERS
+from .models import ToolCall, ToolResult
+from .tools import ToolRegistry
+
+# Shared by all agents; speculative calls are short, read-only file operations
+_pool = ThreadPoolExecutor(
+    max_workers=SPECULATIVE_WORKERS, thread_name_prefix="min-cc-speculative"
+)
+
+
+class StreamedResponse:
+    """An assistant message assembled from `chat.completion.chunk` deltas."""
+
+    def __init__(self):
+        self.content_parts: List[str] = []
+        # Tool calls by stream index: {"id", "name", "arguments"}
+        self.calls: Dict[int, Dict[str, str]] = {}
+        self.usage: Any = None
+        self.ttft: Optional[float] = None
+
+    def add_chunk(self, chunk) -> bool:
+        """Fold one chunk in; returns whether it carried any generated tokens."""
+        if getattr(chunk, "usage", None):
+            self.usage = chunk.usage
+        generated = False
+        for choice in chunk.choices or []:
+            delta = choice.delta
+            if delta.content:
+                self.content_parts.append(delta.content)
+                generated = True
+            for tc in delta.tool_calls or []:
+                call = self.calls.setdefault(
+                    tc.index, {"id": None, "name": "", "arguments": ""}
+                )
+                if tc.id:
+                    call["id"] = tc.id
+                if tc.function:
+                    call["name"] += tc.function.name or ""
+                    call["arguments"] += tc.function.arguments or ""
+                generated = True
+        return generated
+
+    @property
+    def content(self) -> Optional[str]:
+        return "".join(self.content_parts) or None
+
+    def tool_calls(self) -> List[ToolCall]:
+        return [
+            ToolCall(id=call["id"], name=call["name"], arguments=call["arguments"])
+            for _, call in sorted(self.calls.items())
+        ]
+
+
+def _is_complete(arguments: str) -> bool:
+    if not arguments.rstrip().endswith("}"):  # cheap check before parsing
+        return False
+    try:
+        return isinstance(json.loads(arguments), dict)
+    except ValueError:
+        return False
+
+
+class Speculator:
+    """Starts read-only tool calls as soon as their arguments are complete, while
+    the rest of the response is still streaming.
+
+    Calls are only started while every earlier call in the message is read-only,
+    so nothing runs ahead of a side effect it could observe. Results are claimed
+    with `take` once the message is final; unclaimed ones are discarded.
+    """
+
+    def __init__(self, registry: ToolRegistry):
+        self.registry = registry
+        self._futures: Dict[str, Tuple[str, str, Future]] = {}
+        self._blocked = False
+        self.dispatched = 0
+
+    def update(self, response: StreamedResponse):
+        if self._blocked:
+            return
+        for _, call in sorted(response.calls.items()):
+            if call["id"] in self._futures:
+                continue
+            if not self.registry.is_read_only(call["name"]):
+                self._blocked = True
+                return
+            if not call["id"] or not _is_complete(call["arguments"]):
+                return
+            # In the caller's context, so tools see the current agent and token
+            future = _pool.submit(
+                contextvars.copy_context().run,
+                self._run,
+                call["id"],
+                call["name"],
+                call["arguments"],
+            )
+            self._futures[call["id"]] = (call["name"], call["arguments"], future)
+            self.dispatched += 1
+
+    def _run(self, tool_call_id: str, name: str, arguments: str) -> Tuple[ToolResult, float]:
+        start = time.perf_counter()
+        result = self.registry.execute(tool_call_id, name, arguments)
+        return result, time.perf_counter() - start
+
+    def take(self, tool_call: ToolCall) -> Optional[Future]:
+        """The speculative run of `tool_call`, if one was started with the same
+        name and arguments."""
+        entry = self._futures.pop(tool_call.id, None)
+        if entry and entry[:2] == (tool_call.name, tool_call.arguments):
+            return entry[2]
+        return None
+
+    def discard(self):
+        for _, _, future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
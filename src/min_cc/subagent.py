@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .agent import BudgetExceeded, CodingAgent, get_current_agent
+from .cancellation import CancelToken, Cancelled, get_current_token
+from .constants import (
+    SUBAGENT_MAX_PARALLEL,
+    SUBAGENT_PROMPT,
+    SUBAGENT_TOKEN_BUDGET,
+    SUBAGENT_TOOLS,
+)
+from .tools import Tool
+from .usage import merge_usage
+
+_usage_lock = threading.Lock()
+
+
+class TaskTool(Tool):
+    name: str = "task"
+    description: str = (
+        "Delegate independent investigations to sub-agents that run in parallel, each "
+        "with its own context and read-only tools (read_file, read_files, grep, glob, "
+        "find_symbol, list_symbols). Only their final answers are returned, so use "
+        "this for broad exploration such as 'find every caller of X and summarize how it is used' "
+        "instead of reading many files yourself."
+    )
+    parameters_schema: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "tasks": {
+                "type": "array",
+                "description": "Independent tasks to run concurrently",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "description": {
+                            "type": "string",
+                            "description": "Short (3-5 word) label for the task",
+                        },
+                        "prompt": {
+                            "type": "string",
+                            "description": "Complete, self-contained instructions",
+                        },
+                    },
+                    "required": ["description", "prompt"],
+                },
+            }
+        },
+        "required": ["tasks"],
+    }
+    max_parallel: int = SUBAGENT_MAX_PARALLEL
+    token_budget: int = SUBAGENT_TOKEN_BUDGET
+
+    def _run_one(
+        self, parent: CodingAgent, task: Dict[str, str], cancel: Optional[CancelToken]
+    ) -> str:
+        child = parent.spawn_subagent(
+            SUBAGENT_TOOLS, instructions=SUBAGENT_PROMPT, token_budget=self.token_budget
+        )
+        try:
+            answer = child.run(task["prompt"], cancel=cancel) or "(no answer)"
+        except Cancelled:
+            answer = "Error: sub-agent cancelled."
+        except BudgetExceeded:
+            answer = "Error: sub-agent stopped after exhausting its token budget."
+        except Exception as e:
+            answer = f"Error: sub-agent failed: {str(e)}"
+        finally:
+            with _usage_lock:
+                merge_usage(parent.state.metadata, child.state.metadata, "subagent")
+        return answer
+
+    def execute(self, tasks: List[Dict[str, str]]) -> str:
+        parent = get_current_agent()
+        if parent is None:
+            return "Error: task tool can only run inside an agent turn."
+        if not tasks:
+            return "Error: no tasks given."
+
+        # Children run on pool threads, so the parent's token is passed explicitly
+        cancel = get_current_token()
+        with ThreadPoolExecutor(max_workers=min(len(tasks), self.max_parallel)) as pool:
+            answers = list(pool.map(lambda t: self._run_one(parent, t, cancel), tasks))
+
+        return "\n\n".join(
+            f"[Task {i}: {task.get('description', '')}]\n{answer}"
+            for i, (task, answer) in enumerate(zip(tasks, answers), 1)
+        )
@@ -0,0 +1,296 @@
+import ast
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .constants import (
+    CHARS_PER_TOKEN,
+    SYMBOL_INDEX_FILE,
+    SYMBOL_MAX_FILE_BYTES,
+    SYMBOL_SKIP_DIRS,
+)
+
+INDEX_VERSION = 3
+
+
+class Symbol(NamedTuple):
+    name: str
+    kind: str  # "class" | "function" | "method" | "variable"
+    path: str  # relative to the index root
+    line: int
+    end_line: int
+    parent: Optional[str]  # enclosing class for methods and nested classes
+    signature: str
+
+    @property
+    def qualname(self) -> str:
+        return f"{self.parent}.{self.name}" if self.parent else self.name
+
+    def describe(self) -> str:
+        return f"{self.path}:{self.line}-{self.end_line} {self.kind} {self.signature}"
+
+
+def _signature(node: ast.AST) -> str:
+    if isinstance(node, ast.ClassDef):
+        return f"class {node.name}"
+    args = node.args
+    names = [a.arg for a in getattr(args, "posonlyargs", []) + args.args]
+    if args.vararg:
+        names.append(f"*{args.vararg.arg}")
+    elif args.kwonlyargs:
+        names.append("*")
+    names += [a.arg for a in args.kwonlyargs]
+    if args.kwarg:
+        names.append(f"**{args.kwarg.arg}")
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    return f"{prefix} {node.name}({', '.join(names)})"
+
+
+def _definitions(body: List[ast.stmt], parent: Optional[str] = None) -> Iterator[Tuple]:
+    """Module- and class-level definitions as Symbol fields (without the path)."""
+    for node in body:
+        end = getattr(node, "end_lineno", node.lineno)
+        if isinstance(node, ast.ClassDef):
+            yield (node.name, "class", node.lineno, end, parent, _signature(node))
+            yield from _definitions(node.body, node.name)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            kind = "method" if parent else "function"
+            yield (node.name, kind, node.lineno, end, parent, _signature(node))
+        elif parent is None and isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    yield (target.id, "variable", node.lineno, end, None, target.id)
+
+
+def _references(tree: ast.AST) -> Dict[str, List[int]]:
+    refs: Dict[str, List[int]] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            names = [node.id]
+        elif isinstance(node, ast.Attribute):
+            names = [node.attr]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = [alias.name.rsplit(".", 1)[-1] for alias in node.names]
+        else:
+            continue
+        for name in names:
+            refs.setdefault(name, []).append(node.lineno)
+    return refs
+
+
+def _imports(tree: ast.AST) -> List[Tuple[int, str, List[str]]]:
+    """(relative level, module, imported names) of every import statement."""
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports += [(0, alias.name, []) for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [alias.name for alias in node.names]
+            imports.append((node.level, node.module or "", names))
+    return imports
+
+
+def parse_file(path: str) -> Dict[str, Any]:
+    """Symbols, name references and imports of one Python file; unparsable files
+    are empty."""
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (SyntaxError, ValueError, OSError):
+        return {"symbols": [], "refs": {}, "imports": []}
+    return {
+        "symbols": list(_definitions(tree.body)),
+        "refs": _references(tree),
+        "imports": _imports(tree),
+    }
+
+
+class SymbolIndex:
+    """Definitions and references of every Python file under `root`, persisted to
+    disk and re-parsed only for files whose mtime or size changed.
+
+    `refresh()` builds a new mapping and swaps it in, so readers iterate a
+    consistent snapshot without taking the lock. References are the bulk of
+    the index and are stored one file per module next to it, written when that
+    module is re-parsed and loaded on first use.
+    """
+
+    def __init__(self, root: str = ".", cache_path: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.cache_path = cache_path or os.path.join(self.root, SYMBOL_INDEX_FILE)
+        self.refs_dir = os.path.splitext(self.cache_path)[0] + "-refs"
+        # relpath -> {"mtime_ns", "size", "symbols": [fields],
+        #             "imports": [(level, module, names)]}; never mutated once built
+        self._files: Dict[str, Dict[str, Any]] = {}
+        # relpath -> {name: [lines]}, for files whose references have been read
+        self._refs: Dict[str, Dict[str, List[int]]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _walk(self) -> Iterator[Tuple[str, os.stat_result]]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(
+                d for d in dirnames if not d.startswith(".") and d not in SYMBOL_SKIP_DIRS
+            )
+            for name in filenames:
+                if name.endswith(".py"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    if st.st_size <= SYMBOL_MAX_FILE_BYTES:
+                        yield path, st
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._files = data["files"]
+        except (OSError, ValueError, KeyError):
+            self._files = {}
+        self._loaded = True
+
+    def _save(self):
+        directory = os.path.dirname(self.cache_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": self._files}, f)
+        os.replace(tmp, self.cache_path)
+
+    def _refs_path(self, rel: str) -> str:
+        return os.path.join(self.refs_dir, hashlib.sha1(rel.encode()).hexdigest() + ".json")
+
+    def _save_refs(self, rel: str, refs: Dict[str, List[int]]):
+        os.makedirs(self.refs_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.refs_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(refs, f)
+        os.replace(tmp, self._refs_path(rel))
+
+    def _file_refs(self, rel: str) -> Dict[str, List[int]]:
+        refs = self._refs.get(rel)
+        if refs is None:
+            try:
+                with open(self._refs_path(rel), "r") as f:
+                    refs = json.load(f)
+            except (OSError, ValueError):
+                refs = parse_file(os.path.join(self.root, rel))["refs"]
+            self._refs[rel] = refs
+        return refs
+
+    def refresh(self) -> int:
+        """Bring the index up to date with the workspace; returns files re-parsed."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            files = dict(self._files)
+            seen = set()
+            parsed: Dict[str, Dict[str, List[int]]] = {}
+            for path, st in self._walk():
+                rel = os.path.relpath(path, self.root)
+                seen.add(rel)
+                entry = files.get(rel)
+                if entry and (entry["mtime_ns"], entry["size"]) == (
+                    st.st_mtime_ns,
+                    st.st_size,
+                ):
+                    continue
+                result = parse_file(path)
+                parsed[rel] = result.pop("refs")
+                files[rel] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, **result}
+            removed = set(files) - seen
+            for rel in removed:
+                del files[rel]
+            if not parsed and not removed:
+                return 0
+
+            self._refs.update(parsed)
+            for rel in removed:
+                self._refs.pop(rel, None)
+            self._files = files
+            try:
+                for rel, refs in parsed.items():
+                    self._save_refs(rel, refs)
+                for rel in removed:
+                    try:
+                        os.remove(self._refs_path(rel))
+                    except FileNotFoundError:
+                        pass
+                self._save()
+            except OSError:
+                pass  # read-only workspace: keep the index in memory only
+            return len(parsed)
+
+    def symbols(self, path_prefix: str = "") -> Iterator[Symbol]:
+        prefix = os.path.normpath(path_prefix) if path_prefix not in ("", ".") else ""
+        files = self._files
+        for rel in sorted(files):
+            if prefix and rel != prefix and not rel.startswith(prefix + os.sep):
+                continue
+            for fields in files[rel]["symbols"]:
+                name, kind, line, end_line, parent, signature = fields
+                yield Symbol(name, kind, rel, line, end_line, parent, signature)
+
+    def find(self, name: str, kind: Optional[str] = None) -> List[Symbol]:
+        """Definitions of `name`, which may be qualified as `Class.method`."""
+        return [
+            s
+            for s in self.symbols()
+            if name in (s.name, s.qualname) and (kind is None or s.kind == kind)
+        ]
+
+    def references(self, name: str) -> List[Tuple[str, int]]:
+        """(path, line) of every use of `name` (the last part of a dotted name)."""
+        name = name.rsplit(".", 1)[-1]
+        return [
+            (rel, line)
+            for rel in sorted(self._files)
+            for line in self._file_refs(rel).get(name, [])
+        ]
+
+    def imports(self) -> Dict[str, List[Tuple[int, str, List[str]]]]:
+        """The import statements of every indexed file, by relative path."""
+        return {rel: entry["imports"] for rel, entry in self._files.items()}
+
+    def repo_map(self, max_tokens: int) -> str:
+        """One line per module listing its top-level symbols, cut to fit `max_tokens`."""
+        budget = max_tokens * CHARS_PER_TOKEN
+        lines: List[str] = []
+        used = 0
+        snapshot = self._files
+        files = sorted(snapshot)
+        for i, rel in enumerate(files):
+            names = [
+                f"{name}()" if kind == "function" else name
+                for name, kind, _, _, parent, _ in snapshot[rel]["symbols"]
+                if parent is None
+            ]
+            line = f"{rel}: {', '.join(names)}" if names else rel
+            if used + len(line) + 1 > budget:
+                lines.append(f"... ({len(files) - i} more modules)")
+                break
+            lines.append(line)
+            used += len(line) + 1
+        return "\n".join(lines)
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root: Optional[str] = None) -> SymbolIndex:
+    """The refreshed, process-wide index for `root` (default: the current directory)."""
+    root = os.path.abspath(root or ".")
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = SymbolIndex(root)
+    index.refresh()
+    return index
@@ -0,0 +1,276 @@
+import importlib.util
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .agent import get_current_agent
+from .cancellation import get_current_token
+from .constants import TESTS_MAX_FAILURES, TESTS_TIMEOUT, TESTS_VENV_DIRS
+from .symbols import SymbolIndex, get_symbol_index
+from .tools import Tool, run_process
+
+
+def is_test_file(rel: str) -> bool:
+    name = os.path.basename(rel)
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+class ImportGraph:
+    """Which workspace modules import which, built from a SymbolIndex.
+
+    Module names follow pytest's rootdir-relative import rule: a file's package
+    is the chain of parent directories containing `__init__.py`, so
+    `src/pkg/mod.py` is `pkg.mod` and a test outside any package is just its
+    file name.
+    """
+
+    def __init__(self, index: SymbolIndex):
+        self.index = index
+        imports = index.imports()
+        self.modules: Dict[str, str] = {}  # dotted name -> relpath
+        names: Dict[str, str] = {}  # relpath -> dotted name
+        for rel in imports:
+            name = self._module_name(rel)
+            names[rel] = name
+            self.modules.setdefault(name, rel)
+        # relpath -> relpaths of the files that import it
+        self.importers: Dict[str, Set[str]] = {rel: set() for rel in imports}
+        for rel, statements in imports.items():
+            for target in self._resolve(names[rel], rel, statements):
+                if target != rel:
+                    self.importers[target].add(rel)
+
+    def _module_name(self, rel: str) -> str:
+        directory, filename = os.path.split(rel)
+        parts = [] if filename == "__init__.py" else [filename[:-3]]
+        while directory and os.path.isfile(
+            os.path.join(self.index.root, directory, "__init__.py")
+        ):
+            directory, package = os.path.split(directory)
+            parts.insert(0, package)
+        return ".".join(parts)
+
+    def _resolve(self, name: str, rel: str, statements) -> Iterable[str]:
+        package = name if rel.endswith("__init__.py") else name.rpartition(".")[0]
+        for level, module, imported in statements:
+            if level:
+                base = package.split(".") if package else []
+                base = base[: len(base) - (level - 1)] if level > 1 else base
+                module = ".".join(base + ([module] if module else []))
+            # Importing a.b.c also runs a/__init__.py and a/b/__init__.py, and
+            # `from a import b` may name the submodule a.b
+            parts = module.split(".") if module else []
+            candidates = [".".join(parts[:i]) for i in range(1, len(parts) + 1)]
+            candidates += [f"{module}.{n}" if module else n for n in imported]
+            for candidate in candidates:
+                target = self.modules.get(candidate)
+                if target is not None:
+                    yield target
+
+    def affected(self, changed: Iterable[str]) -> Set[str]:
+        """`changed` plus every file that transitively imports one of them."""
+        seen: Set[str] = set()
+        stack = [rel for rel in changed if rel in self.importers]
+        while stack:
+            rel = stack.pop()
+            if rel in seen:
+                continue
+            seen.add(rel)
+            stack.extend(self.importers[rel] - seen)
+        return seen
+
+    def select_tests(self, changed: Iterable[str]) -> List[str]:
+        """Test files that exercise `changed` (relpaths). A changed conftest.py
+        selects every test in its directory tree."""
+        changed = list(changed)
+        tests = {rel for rel in self.affected(changed) if is_test_file(rel)}
+        for rel in changed:
+            if os.path.basename(rel) == "conftest.py":
+                prefix = os.path.dirname(rel)
+                tests.update(
+                    t
+                    for t in self.importers
+                    if is_test_file(t) and (not prefix or t.startswith(prefix + os.sep))
+                )
+        return sorted(tests)
+
+
+def _digest(report_path: str) -> Optional[Tuple[Dict[str, int], List[str]]]:
+    """Outcome counts and one line per failing test from a JUnit XML report."""
+    try:
+        root = ET.parse(report_path).getroot()
+    except (OSError, ET.ParseError):
+        return None
+    counts = {"passed": 0, "failed": 0, "error": 0, "skipped": 0}
+    failures: List[str] = []
+    for case in root.iter("testcase"):
+        outcome = "passed"
+        for child in case:
+            if child.tag in ("failure", "error"):
+                outcome = "failed" if child.tag == "failure" else "error"
+                message = (child.get("message") or child.text or "").strip()
+                first_line = message.splitlines()[0][:200] if message else ""
+                test_id = f"{case.get('classname')}::{case.get('name')}"
+                failures.append(f"{outcome.upper()} {test_id}: {first_line}")
+                break
+            if child.tag == "skipped":
+                outcome = "skipped"
+        counts[outcome] += 1
+    return counts, failures
+
+
+def pytest_command(root: str) -> List[str]:
+    """How to run pytest for the workspace at `root`: the PYTEST_COMMAND
+    environment variable (e.g. "uv run pytest"), else the workspace's own
+    virtualenv, the active one, or `pytest` on PATH. min-cc's interpreter, which
+    usually lacks the workspace's dependencies, is the last resort."""
+    configured = os.getenv("PYTEST_COMMAND")
+    if configured:
+        return shlex.split(configured)
+    venvs = [os.path.join(root, name) for name in TESTS_VENV_DIRS]
+    if os.getenv("VIRTUAL_ENV"):
+        venvs.append(os.environ["VIRTUAL_ENV"])
+    for venv in venvs:
+        for python in ("bin/python", "Scripts/python.exe"):
+            path = os.path.join(venv, python)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return [path, "-m", "pytest"]
+    pytest = shutil.which("pytest")
+    if pytest:
+        return [pytest]
+    return [sys.executable, "-m", "pytest"]
+
+
+def run_pytest(
+    root: str,
+    test_files: List[str],
+    fail_fast: bool = False,
+    workers: int = 0,
+    timeout: float = TESTS_TIMEOUT,
+    command: Optional[List[str]] = None,
+) -> str:
+    """Run pytest on `test_files` and summarise the outcome in a few lines."""
+    notes = []
+    command = command or pytest_command(root)
+    with tempfile.TemporaryDirectory() as tmp:
+        report = os.path.join(tmp, "report.xml")
+        args = command + ["-q", "-p", "no:cacheprovider", f"--junitxml={report}"]
+        if fail_fast:
+            args.append("-x")
+        # Whether xdist is installed is only known here for our own interpreter;
+        # elsewhere try it and fall back to a serial run
+        parallel = workers > 1 and (
+            command[0] != sys.executable or importlib.util.find_spec("xdist")
+        )
+        if workers > 1 and not parallel:
+            notes.append("pytest-xdist is not installed, so tests ran serially.")
+        start = time.perf_counter()
+        try:
+            result = run_process(
+                args + (["-n", str(workers)] if parallel else []) + test_files,
+                timeout,
+                cwd=root,
+            )
+            if parallel and "unrecognized arguments: -n" in result.stderr:
+                notes.append("pytest-xdist is not installed, so tests ran serially.")
+                result = run_process(args + test_files, timeout, cwd=root)
+        except FileNotFoundError:
+            return f"Error: cannot run {shlex.join(command)}; set PYTEST_COMMAND."
+        except subprocess.TimeoutExpired:
+            return f"Error: tests timed out after {timeout}s."
+        elapsed = time.perf_counter() - start
+        cancel = get_current_token()
+        if cancel and cancel.cancelled:
+            return "Error: test run cancelled by the user."
+        digest = _digest(report)
+
+    if digest is None:
+        output = (result.stdout + result.stderr).strip().splitlines()
+        return "Error: pytest produced no report.\n" + "\n".join(output[-20:])
+    counts, failures = digest
+    summary = ", ".join(f"{n} {outcome}" for outcome, n in counts.items() if n)
+    lines = [f"{summary or 'no tests ran'} in {elapsed:.1f}s"]
+    lines += failures[:TESTS_MAX_FAILURES]
+    if len(failures) > TESTS_MAX_FAILURES:
+        lines.append(f"... {len(failures) - TESTS_MAX_FAILURES} more failures")
+    return "\n".join(lines + notes)
+
+
+class RunTestsTool(Tool):
+    name: str = "run_tests"
+    description: str = (
+        "Run only the pytest test files affected by the files you changed this "
+        "session (tests that import changed code, directly or transitively) and get "
+        "a short pass/fail digest. Much faster than running the whole suite through "
+        "bash; use it after every edit."
+    )
+    parameters_schema: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "paths": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Changed files to select tests for (default: files "
+                "edited by tools this session)",
+            },
+            "all_tests": {
+                "type": "boolean",
+                "description": "Run the whole suite instead",
+                "default": False,
+            },
+            "fail_fast": {
+                "type": "boolean",
+                "description": "Stop at the first failure (-x)",
+                "default": False,
+            },
+            "workers": {
+                "type": "integer",
+                "description": "Parallel workers (needs pytest-xdist)",
+                "default": 0,
+            },
+        },
+    }
+
+    def execute(
+        self,
+        paths: Optional[List[str]] = None,
+        all_tests: bool = False,
+        fail_fast: bool = False,
+        workers: int = 0,
+    ) -> str:
+        try:
+            root = os.path.abspath(self.root or ".")
+            if all_tests:
+                return run_pytest(root, [], fail_fast, workers)
+
+            if paths is None:
+                agent = get_current_agent()
+                changed = sorted(agent.changed_files) if agent else []
+            else:
+                changed = [os.path.abspath(self.resolve(p)) for p in paths]
+            changed = [
+                os.path.relpath(p, root)
+                for p in changed
+                if os.path.commonpath([p, root]) == root
+            ]
+            if not changed:
+                return (
+                    "No changed files to select tests for. Pass `paths`, or "
+                    "`all_tests` to run the whole suite."
+                )
+
+            tests = ImportGraph(get_symbol_index(root)).select_tests(changed)
+            if not tests:
+                return f"No test files import the {len(changed)} changed file(s)."
+            return (
+                f"{len(tests)} test file(s) affected by {len(changed)} changed "
+                f"file(s): {run_pytest(root, tests, fail_fast, workers)}"
+            )
+        except Exception as e:
+            return f"Error running tests: {str(e)}"
@@ -1,23 +1,98 @@
 import glob
+import json
 import os
 import re
 import shutil
+import signal
 import subprocess
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from pydantic import BaseModel
 
-from .constants import BASH_TIMEOUT, GREP_LINE_CHAR
+from .cancellation import get_current_token
+from .constants import (
+    BASH_TIMEOUT,
+    GREP_LINE_CHAR,
+    READ_FILES_MAX_BYTES,
+    READ_FILES_MAX_FILES,
+    READ_FILES_WORKERS,
+    SYMBOL_MAX_RESULTS,
+)
+from .models import ToolResult
+from .patch import PatchError, apply_patch, atomic_write, patch_paths
+from .symbols import get_symbol_index
+
+# Tools report failures as strings with one of these prefixes
+ERROR_PREFIXES = ("Error", "Safety block", "Command timed out")
 
 
 class Tool(BaseModel):
     name: str
     description: str
     parameters_schema: Dict[str, Any]
+    # Workspace directory relative paths resolve against; None means the process cwd
+    root: Optional[str] = None
+    # Side-effect free, so safe to run before the model has finished its response
+    read_only: bool = False
 
     def execute(self, **kwargs) -> str:
         raise NotImplementedError
 
+    def touched_paths(self, **kwargs) -> List[str]:
+        """Files a call with these arguments may modify (for checkpoints)."""
+        return []
+
+    def resolve(self, path: str) -> str:
+        if self.root is None or os.path.isabs(path):
+            return path
+        return os.path.join(self.root, path)
+
+    def display(self, path: str) -> str:
+        return os.path.relpath(path, self.root) if self.root else path
+
+
+def _kill_group(process: subprocess.Popen):
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass  # already exited
+
+
+def run_process(
+    args, timeout: float, cwd: Optional[str] = None, shell: bool = False
+) -> subprocess.CompletedProcess:
+    """Run a command to completion with captured text output.
+
+    The command gets its own process group, so a timeout (re-raised as
+    TimeoutExpired) or cancelling the current turn kills every process it
+    started, not just the direct child.
+    """
+    process = subprocess.Popen(
+        args,
+        shell=shell,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=cwd,
+        start_new_session=True,
+    )
+    cancel = get_current_token()
+    unregister = cancel.on_cancel(lambda: _kill_group(process)) if cancel else None
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except BaseException:
+        _kill_group(process)
+        process.communicate()
+        raise
+    finally:
+        if unregister:
+            unregister()
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
 
 class BashTool(Tool):
     name: str = "bash"
@@ -91,28 +166,26 @@ class BashTool(Tool):
             return f"Safety block: Unknown command '{first_word}'. Stick to safe dev tools like ls/cat/uv/pytest."
 
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=BASH_TIMEOUT,
-            )
-            output = result.stdout
-            if result.stderr:
-                output += f"\nErrors:\n{result.stderr}"
-            if result.returncode != 0:
-                output += f"\nExit code: {result.returncode}"
-            return output or "Command executed with no output."
+            result = run_process(command, BASH_TIMEOUT, cwd=self.root, shell=True)
         except subprocess.TimeoutExpired:
             return f"Command timed out after {BASH_TIMEOUT}s."
         except Exception as e:
             return f"Error executing command: {str(e)}"
+        cancel = get_current_token()
+        if cancel and cancel.cancelled:
+            return f"Error: command cancelled by the user.\n{result.stdout}"
+        output = result.stdout
+        if result.stderr:
+            output += f"\nErrors:\n{result.stderr}"
+        if result.returncode != 0:
+            output += f"\nExit code: {result.returncode}"
+        return output or "Command executed with no output."
 
 
 class ReadFileTool(Tool):
     name: str = "read_file"
     description: str = "Read the content of a file."
+    read_only: bool = True
     parameters_schema: Dict[str, Any] = {
         "type": "object",
         "properties": {"path": {"type": "string", "description": "Path to the file"}},
@@ -121,14 +194,155 @@ class ReadFileTool(Tool):
 
     def execute(self, path: str) -> str:
         try:
-            if not os.path.exists(path):
+            if not os.path.exists(self.resolve(path)):
                 return f"Error: File {path} not found."
-            with open(path, "r") as f:
+            with open(self.resolve(path), "r") as f:
                 return f.read()
         except Exception as e:
             return f"Error reading file: {str(e)}"
 
 
+def _read_range(
+    path: str, start_line: int, end_line: Optional[int], max_bytes: int
+) -> Optional[Tuple[str, int, bool]]:
+    """Lines `start_line`..`end_line` (1-based, inclusive) of a text file, cut at
+    `max_bytes`, as (text, last line read, truncated); None for binary files."""
+    with open(path, "rb") as f:
+        if b"\0" in f.read(8192):
+            return None
+        f.seek(0)
+        parts: List[bytes] = []
+        size = 0
+        number = 0
+        truncated = False
+        for number, line in enumerate(f, 1):
+            if end_line is not None and number > end_line:
+                number -= 1
+                break
+            if number < start_line:
+                continue
+            if size + len(line) > max_bytes:
+                parts.append(line[: max_bytes - size])
+                truncated = True
+                break
+            parts.append(line)
+            size += len(line)
+    return b"".join(parts).decode(errors="replace"), number, truncated
+
+
+class ReadFilesTool(Tool):
+    name: str = "read_files"
+    description: str = (
+        "Read many files in one call, optionally only a line range of each. Paths "
+        "may be globs (e.g. 'src/**/*.py'). Files are read concurrently and returned "
+        "in order, each under a '==> path <==' header; binary files are skipped and "
+        "output stops after `max_bytes` in total. Prefer this over several "
+        "read_file calls when exploring code."
+    )
+    read_only: bool = True
+    parameters_schema: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "files": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "path": {"type": "string", "description": "Path or glob"},
+                        "start_line": {"type": "integer", "description": "1-based"},
+                        "end_line": {"type": "integer", "description": "Inclusive"},
+                    },
+                    "required": ["path"],
+                },
+            },
+            "max_bytes": {
+                "type": "integer",
+                "description": "Budget for the returned contents, in bytes",
+                "default": READ_FILES_MAX_BYTES,
+            },
+        },
+        "required": ["files"],
+    }
+
+    def _expand(self, files: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """(path, spec) of each file to read, with globs expanded; a file named
+        more than once keeps its first spec."""
+        seen = set()
+        expanded = []
+        for spec in files:
+            path = self.resolve(spec["path"])
+            if any(c in path for c in "*?["):
+                matches = sorted(
+                    p for p in glob.glob(path, recursive=True) if os.path.isfile(p)
+                )
+            else:
+                matches = [path]
+            for match in matches:
+                if match not in seen:
+                    seen.add(match)
+                    expanded.append((match, spec))
+        return expanded
+
+    def _read(self, path: str, spec: Dict[str, Any], max_bytes: int):
+        try:
+            start = max(1, spec.get("start_line") or 1)
+            return _read_range(path, start, spec.get("end_line"), max_bytes)
+        except Exception as e:
+            return e
+
+    def execute(
+        self, files: List[Dict[str, Any]], max_bytes: int = READ_FILES_MAX_BYTES
+    ) -> str:
+        try:
+            expanded = self._expand(files)
+        except Exception as e:
+            return f"Error reading files: {str(e)}"
+        if not expanded:
+            return "Error: no files matched."
+        skipped = expanded[READ_FILES_MAX_FILES:]
+        expanded = expanded[:READ_FILES_MAX_FILES]
+
+        # Every file is read up to the whole budget, which is then spent in order
+        with ThreadPoolExecutor(max_workers=READ_FILES_WORKERS) as pool:
+            results = list(
+                pool.map(lambda item: self._read(*item, max_bytes), expanded)
+            )
+
+        sections = []
+        budget = max_bytes
+        for (path, spec), result in zip(expanded, results):
+            label = self.display(path)
+            if isinstance(result, FileNotFoundError):
+                sections.append(f"==> {label}: not found <==")
+            elif isinstance(result, Exception):
+                sections.append(f"==> {label}: error: {result} <==")
+            elif result is None:
+                sections.append(f"==> {label}: skipped (binary) <==")
+            elif budget <= 0:
+                sections.append(f"==> {label}: omitted (max_bytes reached) <==")
+            else:
+                text, last_line, truncated = result
+                if spec.get("start_line") or spec.get("end_line"):
+                    first_line = max(1, spec.get("start_line") or 1)
+                    if last_line < first_line:
+                        label += f" [only {last_line} lines]"
+                    else:
+                        label += f" [lines {first_line}-{last_line}]"
+                data = text.encode()
+                if len(data) > budget:
+                    text = data[:budget].decode(errors="ignore")
+                    truncated = True
+                budget -= min(len(data), budget)
+                if truncated:
+                    label += " (truncated)"
+                sections.append(f"==> {label} <==\n{text}")
+        if skipped:
+            sections.append(
+                f"... {len(skipped)} more files not read (limit {READ_FILES_MAX_FILES})"
+            )
+        return "\n".join(sections)
+
+
 class ReplaceFileContentTool(Tool):
     name: str = "replace_file_content"
     description: str = "Replace a section of a file with new content."
@@ -145,19 +359,21 @@ class ReplaceFileContentTool(Tool):
         "required": ["path", "old_content", "new_content"],
     }
 
+    def touched_paths(self, path: str, **kwargs) -> List[str]:
+        return [self.resolve(path)]
+
     def execute(self, path: str, old_content: str, new_content: str) -> str:
         try:
-            if not os.path.exists(path):
+            if not os.path.exists(self.resolve(path)):
                 return f"Error: File {path} not found."
-            with open(path, "r") as f:
+            with open(self.resolve(path), "r") as f:
                 content = f.read()
 
             if old_content not in content:
                 return "Error: old_content not found in file."
 
             new_total_content = content.replace(old_content, new_content, 1)
-            with open(path, "w") as f:
-                f.write(new_total_content)
+            atomic_write(self.resolve(path), new_total_content)
             return f"Successfully updated {path}."
         except Exception as e:
             return f"Error replacing content: {str(e)}"
@@ -180,18 +396,56 @@ class WriteFileTool(Tool):
         "required": ["path", "content"],
     }
 
+    def touched_paths(self, path: str, **kwargs) -> List[str]:
+        return [self.resolve(path)]
+
     def execute(self, path: str, content: str) -> str:
         try:
-            with open(path, "w") as f:
-                f.write(content)
+            atomic_write(self.resolve(path), content)
             return f"Successfully wrote to {path}."
         except Exception as e:
             return f"Error writing file: {str(e)}"
 
 
+class ApplyPatchTool(Tool):
+    name: str = "apply_patch"
+    description: str = (
+        "Edit files by applying a unified diff (as produced by `diff -u` or "
+        "`git diff`), which may span several files. Use '--- /dev/null' to create "
+        "and '+++ /dev/null' to delete a file. Only changed lines and a little "
+        "context are needed; line numbers may be approximate. All hunks are "
+        "checked before any file is written, so the patch applies completely or "
+        "not at all. Prefer this over write_file for edits to existing files."
+    )
+    parameters_schema: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "patch": {"type": "string", "description": "The unified diff to apply"}
+        },
+        "required": ["patch"],
+    }
+
+    def touched_paths(self, patch: str) -> List[str]:
+        return patch_paths(patch, resolve=self.resolve)
+
+    def execute(self, patch: str) -> str:
+        try:
+            summary = apply_patch(patch, resolve=self.resolve)
+        except PatchError as e:
+            return f"Error: patch not applied, no files were changed. {str(e)}"
+        except Exception as e:
+            return f"Error applying patch: {str(e)}"
+        lines = [
+            f"{status} {path} (+{added} -{removed})"
+            for status, path, added, removed in summary
+        ]
+        return "Patch applied:\n" + "\n".join(lines)
+
+
 class GrepTool(Tool):
     name: str = "grep"
     description: str = "Search for a pattern in files within a directory."
+    read_only: bool = True
     parameters_schema: Dict[str, Any] = {
         "type": "object",
         "properties": {
@@ -235,15 +489,18 @@ class GrepTool(Tool):
                             line_display = line.rstrip()
                             if len(line_display) > GREP_LINE_CHAR:
                                 line_display = line_display[:GREP_LINE_CHAR] + "..."
-                            results.append(f"{file_path}:{i}:{line_display}")
+                            results.append(
+                                f"{self.display(file_path)}:{i}:{line_display}"
+                            )
             except Exception:
                 pass
 
-        if os.path.isfile(directory):
-            search_file(directory)
+        search_dir = self.resolve(directory)
+        if os.path.isfile(search_dir):
+            search_file(search_dir)
 
-        elif os.path.isdir(directory):
-            for root, dirs, files in os.walk(directory):
+        elif os.path.isdir(search_dir):
+            for root, dirs, files in os.walk(search_dir):
                 # Skip if dirs match exclude_dir_patterns]
                 dirs[:] = [d for d in dirs if not exclude_dir_regex.search(d)]
 
@@ -258,6 +515,7 @@ class GrepTool(Tool):
 class GlobTool(Tool):
     name: str = "glob"
     description: str = "List files matching a glob pattern (e.g., '**/*.py')."
+    read_only: bool = True
     parameters_schema: Dict[str, Any] = {
         "type": "object",
         "properties": {
@@ -273,14 +531,92 @@ class GlobTool(Tool):
 
     def execute(self, pattern: str, recursive: bool = True) -> str:
         try:
-            files = glob.glob(pattern, recursive=recursive)
+            files = glob.glob(self.resolve(pattern), recursive=recursive)
             if not files:
                 return "No files matched the pattern."
-            return "\n".join(files)
+            return "\n".join(self.display(f) for f in files)
         except Exception as e:
             return f"Error running glob: {str(e)}"
 
 
+class FindSymbolTool(Tool):
+    name: str = "find_symbol"
+    description: str = (
+        "Find where a Python class, function, method or module-level variable is "
+        "defined (file, line range, signature), optionally with every reference to "
+        "it. Faster than grep for navigating Python code."
+    )
+    parameters_schema: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "name": {
+                "type": "string",
+                "description": "Symbol name, optionally qualified as Class.method",
+            },
+            "include_references": {
+                "type": "boolean",
+                "description": "Also list the lines where the name is used",
+                "default": False,
+            },
+        },
+        "required": ["name"],
+    }
+    read_only: bool = True
+
+    def execute(self, name: str, include_references: bool = False) -> str:
+        try:
+            index = get_symbol_index(self.root)
+            lines = [s.describe() for s in index.find(name)]
+            if not lines:
+                lines.append(f"No definition of {name} found.")
+            if include_references:
+                refs = index.references(name)
+                lines.append(f"References ({len(refs)}):")
+                lines += [f"{path}:{line}" for path, line in refs[:SYMBOL_MAX_RESULTS]]
+                if len(refs) > SYMBOL_MAX_RESULTS:
+                    lines.append(f"... {len(refs) - SYMBOL_MAX_RESULTS} more")
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Error finding symbol: {str(e)}"
+
+
+class ListSymbolsTool(Tool):
+    name: str = "list_symbols"
+    description: str = (
+        "List the classes, functions, methods and module-level variables defined in "
+        "a Python file or directory, with line ranges and signatures."
+    )
+    parameters_schema: Dict[str, Any] = {
+        "type": "object",
+        "properties": {
+            "path": {
+                "type": "string",
+                "description": "File or directory relative to the workspace",
+                "default": ".",
+            }
+        },
+        "required": [],
+    }
+    read_only: bool = True
+
+    def execute(self, path: str = ".") -> str:
+        try:
+            index = get_symbol_index(self.root)
+            prefix = os.path.relpath(os.path.abspath(self.resolve(path)), index.root)
+            symbols = list(index.symbols(prefix))
+            if not symbols:
+                return f"No Python symbols found under {path}."
+            lines = []
+            for s in symbols[: SYMBOL_MAX_RESULTS * 4]:
+                indent = "  " if s.parent else ""
+                lines.append(f"{s.path}:{s.line} {indent}{s.signature}")
+            if len(symbols) > SYMBOL_MAX_RESULTS * 4:
+                lines.append(f"... {len(symbols) - SYMBOL_MAX_RESULTS * 4} more")
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Error listing symbols: {str(e)}"
+
+
 class ToolRegistry:
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
@@ -288,6 +624,25 @@ class ToolRegistry:
     def register_tool(self, tool: Tool):
         self._tools[tool.name] = tool
 
+    def subset(self, names) -> "ToolRegistry":
+        """A registry sharing this one's tool instances, restricted to `names`."""
+        registry = ToolRegistry()
+        for name in names:
+            if name in self._tools:
+                registry.register_tool(self._tools[name])
+        return registry
+
+    def rooted(self, root: Optional[str]) -> "ToolRegistry":
+        """A registry with a copy of each tool that works in `root` instead."""
+        registry = ToolRegistry()
+        for tool in self._tools.values():
+            registry.register_tool(tool.model_copy(update={"root": root}))
+        return registry
+
+    def is_read_only(self, name: str) -> bool:
+        tool = self._tools.get(name)
+        return tool is not None and tool.read_only
+
     def get_tool_definitions(self) -> List[Dict[str, Any]]:
         return [
             {
@@ -306,14 +661,53 @@ class ToolRegistry:
             return f"Error: Tool {name} not found."
         return self._tools[name].execute(**arguments)
 
+    def execute(
+        self,
+        tool_call_id: str,
+        name: str,
+        arguments: str,
+        on_write: Optional[Callable[[List[str]], None]] = None,
+    ) -> ToolResult:
+        """Run a tool call with raw JSON arguments, capturing failures as error results.
+        `on_write` is called with the files the call may modify before it runs."""
+        try:
+            args = json.loads(arguments or "{}")
+        except json.JSONDecodeError as e:
+            return ToolResult(
+                tool_call_id=tool_call_id,
+                content=f"Error: Invalid JSON arguments for {name}: {str(e)}",
+                is_error=True,
+            )
+        tool = self._tools.get(name)
+        if on_write and tool is not None and not tool.read_only:
+            try:
+                paths = tool.touched_paths(**args)
+            except TypeError:
+                paths = []  # bad arguments; the call itself reports the error
+            if paths:
+                on_write(paths)
+        try:
+            content = self.call_tool(name, args)
+        except Exception as e:
+            content = f"Error executing {name}: {str(e)}"
+        return ToolResult(
+            tool_call_id=tool_call_id,
+            content=content,
+            is_error=content.startswith(ERROR_PREFIXES),
+        )
+
 
-def get_default_registry() -> ToolRegistry:
+def get_default_registry(root: Optional[str] = None) -> ToolRegistry:
     registry = ToolRegistry()
     if shutil.which("bash"):
-        registry.register_tool(BashTool())
-    registry.register_tool(ReadFileTool())
-    registry.register_tool(WriteFileTool())
-    registry.register_tool(ReplaceFileContentTool())
-    registry.register_tool(GrepTool())
-    registry.register_tool(GlobTool())
+        registry.register_tool(BashTool(root=root))
+    registry.register_tool(ReadFileTool(root=root))
+    registry.register_tool(ReadFilesTool(root=root))
+    registry.register_tool(WriteFileTool(root=root))
+    registry.register_tool(ReplaceFileContentTool(root=root))
+    registry.register_tool(ApplyPatchTool(root=root))
+    registry.register_tool(GrepTool(root=root))
+    registry.register_tool(GlobTool(root=root))
+    registry.register_tool(FindSymbolTool(root=root))
+    registry.register_tool(ListSymbolsTool(root=root))
     return registry
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from .constants import TRACE_STATS_WINDOW
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.is_error = False
+        self._start = time.perf_counter()
+        self._duration: Optional[float] = None
+        self.set_attributes(**(attributes or {}))
+
+    def set_attributes(self, **attributes):
+        for key, value in attributes.items():
+            # Keep only OTel-representable primitives
+            if isinstance(value, (str, bool, int, float)):
+                self.attributes[key] = value
+
+    def end(self):
+        self._duration = time.perf_counter() - self._start
+        self.end_ns = self.start_ns + int(self._duration * 1e9)
+
+    @property
+    def duration(self) -> float:
+        if self._duration is None:
+            return time.perf_counter() - self._start
+        return self._duration
+
+    def to_otel(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [
+                {"key": k, "value": _otel_value(v)} for k, v in self.attributes.items()
+            ],
+            "status": {
+                "code": "STATUS_CODE_ERROR" if self.is_error else "STATUS_CODE_OK"
+            },
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otel_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Tracer:
+    """Collects nested spans, keeps per-name durations for session statistics, and
+    optionally appends each finished span to a JSONL file in OTLP/JSON shape."""
+
+    def __init__(self, export_path: Optional[str] = None, service_name: str = "min-cc"):
+        self.export_path = export_path
+        self.service_name = service_name
+        self.durations: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=TRACE_STATS_WINDOW)
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @property
+    def current_span(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        parent = self.current_span
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.is_error = True
+            span.set_attributes(**{"exception.type": type(e).__name__})
+            raise
+        finally:
+            stack.pop()
+            span.end()
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self.durations[span.name].append(span.duration)
+            if self.export_path:
+                self._export(span)
+
+    def _export(self, span: Span):
+        if self._file is None:
+            directory = os.path.dirname(self.export_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.export_path, "a", buffering=1)
+        record = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": "min_cc"}, "spans": [span.to_otel()]}
+                    ],
+                }
+            ]
+        }
+        self._file.write(json.dumps(record) + "\n")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Count, p50 and p95 (seconds) per span name for this session."""
+        with self._lock:
+            snapshot = {name: sorted(values) for name, values in self.durations.items()}
+        return {
+            name: {
+                "count": len(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+            }
+            for name, values in snapshot.items()
+            if values
+        }
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
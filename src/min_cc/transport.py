@@ -0,0 +1,360 @@
+import email.utils
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import httpx
+from pydantic import BaseModel
+
+from .cancellation import CancelToken, Cancelled, get_current_token
+from .constants import (
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_BREAKER_RESET,
+    HTTP_BREAKER_THRESHOLD,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_RETRIES,
+    HTTP_READ_TIMEOUT,
+)
+
+try:  # HTTP/2 needs the optional `h2` package (pip install min-cc[http2])
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Chat completions are not idempotent: only retry when the provider cannot have
+# started on the request, i.e. it was never sent or was refused/overloaded.
+RETRY_STATUSES = {429, 502, 503, 504}
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitOpen(httpx.TransportError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `reset_timeout` seconds a
+    single trial request is let through (half-open) to decide whether to close."""
+
+    def __init__(
+        self,
+        threshold: int = HTTP_BREAKER_THRESHOLD,
+        reset_timeout: float = HTTP_BREAKER_RESET,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_request(self, host: str = ""):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half_open" and self._trial_in_flight):
+                raise CircuitOpen(
+                    f"Circuit open for {host or 'provider'} after {self.failures} consecutive failures."
+                )
+            if state == "half_open":
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give up a trial request that ended without a verdict (e.g. it was
+        cancelled), so the next request can be the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.threshold:
+                self.opened_at = self.clock()
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Delay requested by the server via `retry-after-ms` or `Retry-After`."""
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, OverflowError):
+        return None  # neither seconds nor a date; use the default backoff
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+def _close_abandoned(future: Future):
+    if future.exception() is None:
+        abort_response(future.result())
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Retries transient failures with jittered exponential backoff (honouring
+    Retry-After) and trips a per-host circuit breaker on repeated failures.
+
+    Requests made under a CancelToken (see `use_token`) raise Cancelled as soon
+    as it is cancelled: backoff waits on the token, and the wait for response
+    headers happens on a helper thread so it can be abandoned. An abandoned
+    response is closed once it arrives.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_base: float = HTTP_BACKOFF_BASE,
+        backoff_max: float = HTTP_BACKOFF_MAX,
+        breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker,
+        sleep: Optional[Callable[[float], None]] = None,
+    ):
+        self._transport = transport
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_factory = breaker_factory
+        self.sleep = sleep  # None: wait on the request's cancel token
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self.breakers:
+                self.breakers[host] = self.breaker_factory()
+            return self.breakers[host]
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        requested = retry_after_seconds(response) if response is not None else None
+        if requested is not None:
+            return min(requested, self.backoff_max)
+        # Full jitter: uniform over [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _wait(self, delay: float, cancel: Optional[CancelToken]):
+        if self.sleep is not None:
+            self.sleep(delay)
+        elif cancel is not None:
+            cancel.wait(delay)
+        else:
+            time.sleep(delay)
+        if cancel is not None:
+            cancel.check()
+
+    def _send(self, request: httpx.Request, cancel: Optional[CancelToken]) -> httpx.Response:
+        if cancel is None:
+            return self._transport.handle_request(request)
+        cancel.check()
+        future: Future = Future()
+
+        def send():
+            try:
+                future.set_result(self._transport.handle_request(request))
+            except BaseException as e:
+                future.set_exception(e)
+
+        done = threading.Event()
+        future.add_done_callback(lambda _: done.set())
+        unregister = cancel.on_cancel(done.set)
+        threading.Thread(target=send, daemon=True, name="min-cc-http").start()
+        try:
+            done.wait()
+        finally:
+            unregister()
+        if cancel.cancelled:
+            future.add_done_callback(_close_abandoned)
+            raise Cancelled("Turn cancelled.")
+        return future.result()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        breaker = self.breaker(request.url.host)
+        cancel = get_current_token()
+        attempt = 0
+        while True:
+            breaker.before_request(request.url.host)
+            try:
+                response = self._send(request, cancel)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                if not isinstance(e, RETRY_EXCEPTIONS) or attempt >= self.max_retries:
+                    raise
+                self._wait(self.backoff(attempt), cancel)
+                attempt += 1
+                continue
+            except BaseException:
+                breaker.release_trial()  # Cancelled, KeyboardInterrupt, ...
+                raise
+
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self.backoff(attempt, response)
+                response.close()
+                self._wait(delay, cancel)
+                attempt += 1
+                continue
+            return response
+
+    def close(self):
+        self._transport.close()
+
+
+def abort_response(response: httpx.Response):
+    """Close `response` from any thread, unblocking a read in progress.
+
+    Closing alone does not wake a thread blocked reading the socket, so the
+    HTTP/1.1 connection is shut down first; it is discarded rather than reused.
+    HTTP/2 connections are shared between requests and are left open.
+    """
+    network_stream = response.extensions.get("network_stream")
+    sock = network_stream.get_extra_info("socket") if network_stream else None
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+class StreamWrapper:
+    """Iterates `chunks`, a generator over an SDK `stream`, while exposing the
+    stream's `response` and `close()`, so that a cancelling thread can abort
+    the HTTP read of a wrapped stream just like a bare one. `on_close` runs
+    once, when iteration ends or the stream is closed."""
+
+    def __init__(
+        self,
+        stream: Any,
+        chunks: Iterator[Any],
+        on_close: Optional[Callable[[], None]] = None,
+    ):
+        self.stream = stream
+        self._chunks = chunks
+        self._on_close = on_close
+        self._lock = threading.Lock()
+
+    @property
+    def response(self) -> Optional[httpx.Response]:
+        return getattr(self.stream, "response", None)
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            yield from self._chunks
+        finally:
+            self._finish()
+
+    def _finish(self):
+        with self._lock:
+            on_close, self._on_close = self._on_close, None
+        if on_close:
+            on_close()
+
+    def close(self):
+        close = getattr(self.stream, "close", None)
+        try:
+            if close:
+                close()
+        finally:
+            self._finish()
+
+
+class TransportConfig(BaseModel):
+    connect_timeout: float = HTTP_CONNECT_TIMEOUT
+    read_timeout: float = HTTP_READ_TIMEOUT
+    max_retries: int = HTTP_MAX_RETRIES
+    max_connections: int = HTTP_MAX_CONNECTIONS
+    keepalive_connections: int = HTTP_KEEPALIVE_CONNECTIONS
+    http2: bool = HTTP2_AVAILABLE
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        return cls(
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", HTTP_CONNECT_TIMEOUT)),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", HTTP_READ_TIMEOUT)),
+            max_retries=int(os.getenv("HTTP_MAX_RETRIES", HTTP_MAX_RETRIES)),
+        )
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+
+def build_http_client(config: Optional[TransportConfig] = None) -> httpx.Client:
+    config = config or TransportConfig.from_env()
+    transport = httpx.HTTPTransport(
+        http2=config.http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.keepalive_connections,
+        ),
+    )
+    return httpx.Client(
+        transport=RetryTransport(transport, max_retries=config.max_retries),
+        timeout=config.timeout,
+    )
+
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """The process-wide pooled client shared by all LLM and metadata requests."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = build_http_client()
+        return _http_client
+
+
+def llm_client_kwargs() -> Dict[str, Any]:
+    """Keyword arguments that point an `OpenAI` client at the shared transport.
+    SDK retries are disabled since RetryTransport handles them."""
+    client = get_http_client()
+    return {"http_client": client, "max_retries": 0, "timeout": client.timeout}
+
+
+def warm_connection(url: str) -> bool:
+    """Open a pooled connection to `url`'s host ahead of the first real request,
+    so that request skips DNS, TCP and TLS setup. Returns whether it connected."""
+    try:
+        get_http_client().head(url, timeout=HTTP_CONNECT_TIMEOUT).close()
+        return True
+    except httpx.HTTPError:
+        return False
@@ -0,0 +1,130 @@
+from typing import Any, Dict, Optional
+
+from .constants import CHARS_PER_TOKEN
+
+# Layout of AgentState.metadata["usage"]:
+#   by_call_type: {"main" | "summarization" | ...: totals}
+#   turns:        [{"turn": n, **totals}]
+#   tools:        {tool_name: {"calls": n, "result_tokens": estimated tokens}}
+#   dedup:        {"results": n, "tokens_saved": estimated tokens}
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+def _int(value: Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def usage_to_dict(usage: Any) -> Dict[str, int]:
+    """Normalize an OpenAI `usage` object (or None) to plain token counts."""
+    if usage is None:
+        return {field: 0 for field in TOKEN_FIELDS}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": _int(getattr(usage, "prompt_tokens", 0)),
+        "completion_tokens": _int(getattr(usage, "completion_tokens", 0)),
+        "cached_tokens": _int(getattr(details, "cached_tokens", 0)),
+    }
+
+
+def estimate_cost(tokens: Dict[str, int], pricing: Optional[Dict[str, float]]) -> float:
+    if not pricing:
+        return 0.0
+    cached = tokens["cached_tokens"]
+    cache_price = pricing.get("input_cache_read") or pricing.get("prompt", 0.0)
+    return (
+        (tokens["prompt_tokens"] - cached) * pricing.get("prompt", 0.0)
+        + cached * cache_price
+        + tokens["completion_tokens"] * pricing.get("completion", 0.0)
+    )
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"calls": 0, **{field: 0 for field in TOKEN_FIELDS}, "cost": 0.0}
+
+
+def _add(totals: Dict[str, Any], tokens: Dict[str, int], cost: float):
+    totals["calls"] += 1
+    for field in TOKEN_FIELDS:
+        totals[field] += tokens[field]
+    totals["cost"] += cost
+
+
+def _usage(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return metadata.setdefault("usage", {"by_call_type": {}, "turns": [], "tools": {}})
+
+
+def start_turn(metadata: Dict[str, Any]):
+    turns = _usage(metadata)["turns"]
+    turns.append({"turn": len(turns), **_empty_totals()})
+
+
+def record_usage(
+    metadata: Dict[str, Any],
+    call_type: str,
+    usage: Any,
+    pricing: Optional[Dict[str, float]] = None,
+    model: Optional[str] = None,
+) -> Dict[str, int]:
+    """Add one API call's usage to the per-call-type and current-turn totals."""
+    data = _usage(metadata)
+    tokens = usage_to_dict(usage)
+    cost = estimate_cost(tokens, pricing)
+
+    by_type = data["by_call_type"].setdefault(call_type, _empty_totals())
+    _add(by_type, tokens, cost)
+    if model:
+        by_type.setdefault("models", {})
+        by_type["models"][model] = by_type["models"].get(model, 0) + 1
+    if data["turns"]:
+        _add(data["turns"][-1], tokens, cost)
+    return tokens
+
+
+def merge_usage(metadata: Dict[str, Any], child_metadata: Dict[str, Any], call_type: str):
+    """Fold a child agent's API usage into this session under `call_type`."""
+    data = _usage(metadata)
+    by_type = data["by_call_type"].setdefault(call_type, _empty_totals())
+    for totals in _usage(child_metadata)["by_call_type"].values():
+        targets = [by_type] + data["turns"][-1:]
+        for target in targets:
+            target["calls"] += totals["calls"]
+            for field in TOKEN_FIELDS:
+                target[field] += totals[field]
+            target["cost"] += totals["cost"]
+        for model, calls in totals.get("models", {}).items():
+            models = by_type.setdefault("models", {})
+            models[model] = models.get(model, 0) + calls
+
+
+def record_tool_result(metadata: Dict[str, Any], tool_name: str, content: str):
+    """Attribute the (estimated) prompt tokens a tool result adds to the history."""
+    tools = _usage(metadata)["tools"]
+    entry = tools.setdefault(tool_name, {"calls": 0, "result_tokens": 0})
+    entry["calls"] += 1
+    entry["result_tokens"] += len(content) // CHARS_PER_TOKEN
+
+
+def record_dedup(metadata: Dict[str, Any], results: int, chars_saved: int):
+    """Count tool results replaced by back-references and the tokens that saves
+    on every later request."""
+    dedup = _usage(metadata).setdefault("dedup", {"results": 0, "tokens_saved": 0})
+    dedup["results"] += results
+    dedup["tokens_saved"] += chars_saved // CHARS_PER_TOKEN
+
+
+def usage_summary(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Session totals plus the per-call-type and per-tool breakdowns."""
+    data = _usage(metadata)
+    total = _empty_totals()
+    for totals in data["by_call_type"].values():
+        total["calls"] += totals["calls"]
+        for field in TOKEN_FIELDS:
+            total[field] += totals[field]
+        total["cost"] += totals["cost"]
+    return {
+        "total": total,
+        "by_call_type": data["by_call_type"],
+        "tools": data["tools"],
+        "dedup": data.get("dedup", {"results": 0, "tokens_saved": 0}),
+        "turns": len(data["turns"]),
+    }
@@ -1,30 +1,69 @@
 import os
-from typing import Any, Dict, Union
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
 
-import requests
+from .constants import (
+    OPENROUTER_MODELS_URL,
+    REPO_MAP_TOKENS,
+    SYSTEM_PROMPT,
+    TOKEN_LIMIT_FALLBACK,
+    TOKEN_LIMIT_PERCENTAGE,
+    TRIM_TOOL_CALL_ARGS,
+)
+from .symbols import get_symbol_index
+from .transport import get_http_client
 
-from .constants import SYSTEM_PROMPT, TRIM_TOOL_CALL_ARGS
+
+@lru_cache(maxsize=1)
+def get_model_catalogue() -> List[Dict[str, Any]]:
+    """
+    Fetches (once per process) the OpenRouter model catalogue.
+    """
+    response = get_http_client().get(OPENROUTER_MODELS_URL)
+    response.raise_for_status()
+    return response.json().get("data", [])
+
+
+def get_model_info(model_id: str) -> Optional[Dict[str, Any]]:
+    for model in get_model_catalogue():
+        if model.get("id") == model_id:
+            return model
+    return None
 
 
 def get_model_context_length(model_id: str) -> Union[int, str]:
     """
     Retrieves the context length for a specific model from the OpenRouter API.
     """
-    url = "https://openrouter.ai/api/v1/models"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        for model in data.get("data", []):
-            if model.get("id") == model_id:
-                return model.get("context_length", 0)
+        model = get_model_info(model_id)
+        if model is not None:
+            return model.get("context_length", 0)
 
         return f"Model '{model_id}' not found."
     except Exception as e:
         return f"An error occurred: {e}"
 
 
+def get_model_pricing(model_id: str) -> Optional[Dict[str, float]]:
+    """
+    Per-token USD prices (prompt, completion, input_cache_read) from the cached catalogue.
+    """
+    try:
+        model = get_model_info(model_id)
+    except Exception:
+        return None
+    if not model or not model.get("pricing"):
+        return None
+    pricing = {}
+    for key in ("prompt", "completion", "input_cache_read"):
+        try:
+            pricing[key] = float(model["pricing"].get(key) or 0)
+        except (TypeError, ValueError):
+            pricing[key] = 0.0
+    return pricing
+
+
 def trim_tool_call_args(args: Dict[str, Any]):
     return {
         k: (
@@ -45,14 +84,28 @@ def format_number(n: int) -> str:
     return str(n)
 
 
-def get_full_system_prompt() -> str:
+def get_token_limit(model_id: str) -> int:
+    """Compaction threshold for a model: a fraction of its context window."""
+    context_window = get_model_context_length(model_id)
+    if isinstance(context_window, int) and context_window > 0:
+        return int(context_window * TOKEN_LIMIT_PERCENTAGE)
+    return TOKEN_LIMIT_FALLBACK
+
+
+def get_full_system_prompt(root: Optional[str] = None) -> str:
     full_prompt = SYSTEM_PROMPT
-    if os.path.exists("Min-CC.md"):
+    context_file = os.path.join(root or ".", "Min-CC.md")
+    if os.path.exists(context_file):
         try:
-            with open("Min-CC.md", "r") as f:
+            with open(context_file, "r") as f:
                 content = f.read()
                 content = content.replace("Min-CC.md\n", "").strip()
                 full_prompt += f"\n\n<codebase_context>\n{content}</codebase_context>"
         except Exception:
             pass
+    map_tokens = int(os.getenv("REPO_MAP_TOKENS", REPO_MAP_TOKENS))
+    if map_tokens > 0:
+        repo_map = get_symbol_index(root).repo_map(map_tokens)
+        if repo_map:
+            full_prompt += f"\n\n<repo_map>\n{repo_map}\n</repo_map>"
     return full_prompt
@@ -0,0 +1,73 @@
+import json
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.archive import HistoryArchive, tokenize
+from min_cc.compaction import CompactionService
+from min_cc.constants import TRUNCATE_KEEP_COUNT
+from min_cc.models import Message, ToolCall
+from min_cc.recall import RecallTool
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("parse_file(HTTPServer)") == [
+        "parse_file", "parse", "file", "httpserver", "http", "server"
+    ]
+
+
+def test_archive_ranks_and_labels_tool_results():
+    archive = HistoryArchive(chunk_chars=200)
+    call = ToolCall(id="1", name="read_file", arguments=json.dumps({"path": "db.py"}))
+    source = "class ConnectionPool:\n    size = 4\n" * 20
+    archive.add(
+        [
+            Message(role="system", content="not archived"),
+            Message(role="user", content="fix the connection pool"),
+            Message(role="assistant", content=None, tool_calls=[call]),
+            Message(role="tool", content=source, tool_call_id="1"),
+            Message(role="assistant", content="The pool size is hardcoded."),
+        ]
+    )
+    assert archive.messages == 4 and len(archive) > 4  # the result is chunked
+
+    best, _ = archive.search("ConnectionPool size")[0]
+    assert archive.labels[best] == "result of read_file(path='db.py')"
+    found = archive.recall("db.py pool", max_tokens=60)
+    assert "[result of read_file(path='db.py')]" in found and len(found) < 400
+    assert archive.recall("nonexistent") is None
+
+    fork = archive.fork()
+    assert fork.postings["pool"] is archive.postings["pool"]  # shared until written
+    fork.add([Message(role="user", content="only in the fork, pool")])
+    archive.add([Message(role="user", content="only in the original, pool")])
+    assert archive.recall("fork") is None and fork.recall("fork")
+    assert fork.recall("original") is None and archive.recall("original")
+    assert fork.postings["pool"] is not archive.postings["pool"]
+    assert fork.postings["connectionpool"] is archive.postings["connectionpool"]
+
+
+def test_truncation_archives_dropped_messages_for_recall():
+    def responder(body):
+        last = body["messages"][-1]
+        if last["role"] == "user":
+            args = json.dumps({"query": "marker"})
+            return {"tool_calls": [{"name": "recall", "arguments": args}]}
+        return {"content": "ok"}
+
+    with StubLLMServer(responder=responder) as server:
+        agent = CodingAgent(
+            api_key="stub",
+            model="stub",
+            base_url=server.base_url,
+            compaction_service=CompactionService(token_limit=200),
+        )
+        agent.registry.register_tool(RecallTool())
+        agent.add_message("user", "the secret marker is 42")
+        for i in range(TRUNCATE_KEEP_COUNT):
+            agent.add_message("assistant", f"filler {i} " * 20)
+        agent.run("what was the marker?")
+
+    contents = [m.content or "" for m in agent.state.messages]
+    assert "the secret marker is 42" not in contents
+    result = next(m for m in agent.state.messages if m.role == "tool")
+    assert "[user message]\nthe secret marker is 42" in result.content
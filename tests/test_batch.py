@@ -0,0 +1,104 @@
+import threading
+import time
+
+from openai import OpenAI
+
+from benchmarks.stub_server import ScriptedSession, StubLLMServer
+from min_cc.batch import BatchTask, GovernedClient, LLMGovernor, run_batch
+
+
+def test_tasks_run_in_their_own_workspace(tmp_path):
+    roots = []
+    for i in range(3):
+        root = tmp_path / f"repo{i}"
+        root.mkdir()
+        (root / "README.md").write_text(f"repo number {i}")
+        roots.append(root)
+
+    tasks = [
+        BatchTask(id=f"t{i}", prompt="read the readme", cwd=str(root), model="stub")
+        for i, root in enumerate(roots)
+    ]
+    tasks.append(BatchTask(id="missing", prompt="x", cwd=str(tmp_path / "nope")))
+
+    streamed = []
+    with StubLLMServer(responder=ScriptedSession(calls_per_round=1)) as server:
+        client = OpenAI(api_key="stub", base_url=server.base_url)
+        results = run_batch(
+            tasks,
+            client,
+            workers=4,
+            governor=LLMGovernor(max_concurrent=2),
+            on_result=streamed.append,
+            token_limit=100_000,
+            pricing_lookup=None,
+        )
+        tool_results = [
+            m["content"]
+            for body in server.requests
+            for m in body["messages"]
+            if m["role"] == "tool"
+        ]
+
+    assert [r.id for r in results] == ["t0", "t1", "t2", "missing"]
+    assert len(streamed) == 4
+    assert [r.status for r in results] == ["ok", "ok", "ok", "error"]
+    assert results[0].metrics["llm_calls"] == 2
+    assert results[0].metrics["tool_calls"] == 1
+    assert sorted(set(tool_results)) == [f"repo number {i}" for i in range(3)]
+
+
+def test_budget_stops_task(tmp_path):
+    (tmp_path / "README.md").write_text("hello")
+    task = BatchTask(prompt="go", cwd=str(tmp_path), model="stub", budget=1)
+    with StubLLMServer(responder=ScriptedSession(rounds=5)) as server:
+        client = OpenAI(api_key="stub", base_url=server.base_url)
+        [result] = run_batch([task], client, token_limit=100_000, pricing_lookup=None)
+
+    assert result.status == "budget_exceeded"
+    assert result.metrics["llm_calls"] == 1
+
+
+def test_governor_caps_concurrency():
+    governor = LLMGovernor(max_concurrent=2)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def call():
+        with governor.slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+
+
+def test_governor_spaces_requests():
+    governor = LLMGovernor(max_concurrent=4, requests_per_minute=1200)  # 50ms apart
+    start = time.monotonic()
+    for _ in range(3):
+        with governor.slot():
+            pass
+    assert time.monotonic() - start >= 0.09
+
+
+def test_governed_stream_releases_its_slot_when_closed():
+    governor = LLMGovernor(max_concurrent=1)
+    with StubLLMServer() as server:
+        client = GovernedClient(OpenAI(api_key="stub", base_url=server.base_url), governor)
+        request = dict(
+            model="stub", messages=[{"role": "user", "content": "hi"}], stream=True
+        )
+        client.chat.completions.create(**request).close()  # never iterated
+        stream = client.chat.completions.create(**request)
+        assert stream.response is not None  # cancellation can abort the read
+        assert list(stream)
+        assert governor._semaphore.acquire(timeout=1)
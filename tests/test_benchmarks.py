@@ -0,0 +1,98 @@
+import json
+
+from openai import OpenAI
+
+from benchmarks import bench_compaction
+from benchmarks.bench_agent import METRICS, run_benchmark
+from benchmarks.stub_server import ScriptedSession, StubLLMServer
+
+
+def test_stub_server_tool_call_and_final_answer():
+    with StubLLMServer(responder=ScriptedSession(rounds=1, calls_per_round=2)) as server:
+        client = OpenAI(api_key="stub", base_url=server.base_url)
+        tools = [{"type": "function", "function": {"name": "read_file", "parameters": {}}}]
+
+        first = client.chat.completions.create(
+            model="stub-model", messages=[{"role": "user", "content": "hi"}], tools=tools
+        )
+        calls = first.choices[0].message.tool_calls
+        assert len(calls) == 2
+        assert json.loads(calls[0].function.arguments) == {"path": "README.md"}
+
+        second = client.chat.completions.create(
+            model="stub-model",
+            messages=[
+                {"role": "user", "content": "hi"},
+                {"role": "assistant", "tool_calls": [c.model_dump() for c in calls]},
+            ],
+            tools=tools,
+        )
+        assert second.choices[0].message.content == "Done."
+
+
+def test_stub_server_keeps_only_recent_requests():
+    with StubLLMServer(responder=ScriptedSession(rounds=0), record=2) as server:
+        client = OpenAI(api_key="stub", base_url=server.base_url)
+        for i in range(5):
+            client.chat.completions.create(
+                model="stub-model", messages=[{"role": "user", "content": str(i)}]
+            )
+    assert server.request_count == 5
+    assert [r["messages"][0]["content"] for r in server.requests] == ["3", "4"]
+
+
+def test_stub_server_streaming():
+    with StubLLMServer(responder=ScriptedSession(rounds=1, calls_per_round=1)) as server:
+        client = OpenAI(api_key="stub", base_url=server.base_url)
+        stream = client.chat.completions.create(
+            model="stub-model",
+            messages=[{"role": "user", "content": "hi"}],
+            tools=[{"type": "function", "function": {"name": "read_file", "parameters": {}}}],
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        args = ""
+        usage = None
+        for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            for choice in chunk.choices:
+                for tc in choice.delta.tool_calls or []:
+                    args += tc.function.arguments or ""
+        assert json.loads(args) == {"path": "README.md"}
+        assert usage.total_tokens > 0
+
+
+def test_run_benchmark_reports_all_metrics():
+    result = run_benchmark(turns=2, history=30, tool_calls=2, payload_chars=100)
+
+    assert len(result["turns"]) == 2
+    assert result["turns"][0]["messages"] > 30
+    assert set(METRICS) <= set(result["summary"])
+    assert result["turns"][0]["tools"] > 0
+    row = result["turns"][0]
+    parts = ["llm", "tools", "compaction", "serialization", "python_overhead"]
+    assert abs(sum(row[name] for name in parts) - row["total"]) < 1e-9
+
+
+def test_compaction_benchmark_compares_configurations():
+    messages, probes = bench_compaction.synthetic_session(turns=20, payload_chars=400)
+    configs = bench_compaction.configurations(
+        ["truncate", "summarize"], [5, 10], [3], [0.2]
+    )
+    result = bench_compaction.run_benchmark(
+        configs, messages, probes, context_window=4000
+    )
+
+    rows = result["rows"]
+    assert [(r["strategy"], r["keep_count"]) for r in rows] == [
+        ("truncate", 5),
+        ("truncate", 10),
+        ("summarize", 10),
+    ]
+    for row in rows:
+        assert row["fires"] > 0 and row["tokens_after"] < row["tokens_before"]
+        assert 0 <= row["fidelity"] <= row["recall"] <= 1
+    # Keeping 5 messages cuts turns (user, call, result, answer) mid-pair
+    assert rows[0]["broken_pairs"] > 0 and rows[1]["broken_pairs"] == 0
+    assert rows[2]["summary_tokens"] > 0 and rows[1]["summary_tokens"] == 0
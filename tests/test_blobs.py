@@ -0,0 +1,70 @@
+import gc
+import os
+from unittest.mock import MagicMock
+
+from min_cc.agent import CodingAgent
+from min_cc.blobs import BlobStore
+from min_cc.models import Message, ToolCall
+
+
+def test_identical_texts_are_stored_once_and_released_with_last_ref():
+    store = BlobStore()
+    text = "x = 1\n" * 1000
+    first, second = store.put(text), store.put(text)
+
+    assert first.key == second.key
+    stats = store.stats()
+    assert stats["blobs"] == 1 and stats["references"] == 2
+    assert stats["stored_bytes"] < len(text) // 10  # compressed
+
+    del first
+    gc.collect()
+    assert store.stats()["blobs"] == 1
+    del second
+    gc.collect()
+    assert store.stats() == {
+        "blobs": 0,
+        "references": 0,
+        "stored_bytes": 0,
+        "cached_chars": 0,
+    }
+
+
+def test_blobs_spill_to_disk_and_survive_cache_eviction(tmp_path):
+    store = BlobStore(directory=str(tmp_path), cache_bytes=10)
+    refs = [store.put(f"blob {i} " * 100) for i in range(3)]
+
+    assert len(os.listdir(tmp_path)) == 3
+    assert [r.read() for r in refs] == [f"blob {i} " * 100 for i in range(3)]
+
+    del refs
+    gc.collect()
+    assert os.listdir(tmp_path) == []
+
+
+def test_message_content_resolves_blob_refs():
+    store = BlobStore()
+    message = Message(role="tool", content=store.put("output " * 500), tool_call_id="c1")
+
+    assert message.blob is not None
+    assert message.content == "output " * 500
+    assert message.content_length == len("output " * 500)
+    assert message == Message(role="tool", content="output " * 500, tool_call_id="c1")
+
+    call = ToolCall(id="c1", name="read_file", arguments="{}")
+    assert call.model_dump() == {"id": "c1", "name": "read_file", "arguments": "{}"}
+    data = Message(role="assistant", tool_calls=[call]).model_dump()
+    assert Message.model_validate(data).tool_calls == [call]
+
+
+def test_large_tool_results_are_stored_as_blobs():
+    agent = CodingAgent(api_key="fake", client=MagicMock())
+    agent.add_message("tool", "small", tool_call_id="a")
+    agent.add_message("tool", "large " * 1000, tool_call_id="b")
+
+    small, large = agent.state.messages[-2:]
+    assert small.blob is None
+    assert large.blob is not None
+    assert agent._prepare_messages()[-1]["content"] == "large " * 1000
+    assert agent._serialized[1][-1]["content"] is large.blob  # not kept decoded
+    assert agent._prepare_messages()[-1]["content"] == "large " * 1000
@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+
+import pytest
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.agent import CANCELLED_RESULT, CodingAgent
+from min_cc.cancellation import CancelToken, Cancelled, use_token
+from min_cc.llm_cache import CachedClient
+from min_cc.tools import BashTool
+
+SLEEP = 'python -c "import subprocess; subprocess.run([\'sleep\', \'30\'])"'
+
+
+def cancel_after(token: CancelToken, delay: float):
+    timer = threading.Timer(delay, token.cancel)
+    timer.start()
+    return timer
+
+
+def test_on_cancel_callbacks():
+    token = CancelToken()
+    calls = []
+    unregister = token.on_cancel(lambda: calls.append("a"))
+    token.on_cancel(lambda: calls.append("b"))
+    unregister()
+    token.cancel()
+    token.cancel()
+    assert calls == ["b"]
+    token.on_cancel(lambda: calls.append("late"))  # already cancelled: runs now
+    assert calls == ["b", "late"]
+    with pytest.raises(Cancelled):
+        token.check()
+
+
+def test_bash_cancel_kills_process_group(tmp_path):
+    token = CancelToken()
+    cancel_after(token, 0.3)
+    start = time.perf_counter()
+    with use_token(token):
+        result = BashTool(root=str(tmp_path)).execute(command=SLEEP)
+    # communicate() only returns once the grandchild `sleep` has released the pipes
+    assert time.perf_counter() - start < 5
+    assert result.startswith("Error: command cancelled")
+
+
+def test_cancel_during_tool_calls_repairs_history(tmp_path):
+    def responder(body):
+        if body["messages"][-1]["role"] == "user":
+            return {
+                "tool_calls": [
+                    {"name": "bash", "arguments": json.dumps({"command": SLEEP})},
+                    {"name": "read_file", "arguments": json.dumps({"path": "a.txt"})},
+                ]
+            }
+        return {"content": "done"}
+
+    with StubLLMServer(responder=responder) as server:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        token = CancelToken()
+        cancel_after(token, 0.5)
+        with pytest.raises(Cancelled):
+            agent.run("go", cancel=token)
+
+    assistant = agent.state.messages[-3]
+    bash_result, read_result = agent.state.messages[-2:]
+    assert [tc.id for tc in assistant.tool_calls] == [
+        bash_result.tool_call_id,
+        read_result.tool_call_id,
+    ]
+    assert bash_result.content.startswith("Error: command cancelled")
+    assert read_result.content == CANCELLED_RESULT
+    assert len(server.requests) == 1
+
+
+def test_cancel_aborts_llm_stream(tmp_path):
+    with StubLLMServer(latency=10) as server:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        token = CancelToken()
+        cancel_after(token, 0.3)
+        start = time.perf_counter()
+        with pytest.raises(Cancelled):
+            agent.run("go", cancel=token)
+        assert time.perf_counter() - start < 5
+    assert agent.state.messages[-1].role == "user"
+
+
+def test_cancel_aborts_llm_request_waiting_for_headers(tmp_path):
+    def slow_headers(body):
+        time.sleep(10)
+        return {"content": "too late"}
+
+    with StubLLMServer(responder=slow_headers) as server:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        token = CancelToken()
+        cancel_after(token, 0.3)
+        start = time.perf_counter()
+        with pytest.raises(Cancelled):
+            agent.run("go", cancel=token)
+        assert time.perf_counter() - start < 5
+
+
+def test_cancel_aborts_wrapped_llm_stream(tmp_path):
+    with StubLLMServer(latency=10) as server:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        agent.client = CachedClient(agent.client, cache_dir=str(tmp_path / "cache"))
+        token = CancelToken()
+        cancel_after(token, 0.3)
+        start = time.perf_counter()
+        with pytest.raises(Cancelled):
+            agent.run("go", cancel=token)
+        assert time.perf_counter() - start < 5
+    assert not (tmp_path / "cache").exists()  # incomplete streams are not stored
@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.checkpoints import CheckpointStore
+
+
+def responder(body):
+    """The user message is the JSON list of tool calls to make."""
+    last = body["messages"][-1]
+    if last["role"] == "user":
+        return {"tool_calls": json.loads(last["content"])}
+    return {"content": "ok"}
+
+
+def call(name, **args):
+    return {"name": name, "arguments": json.dumps(args)}
+
+
+def test_rewind_restores_files_and_history(tmp_path):
+    (tmp_path / "a.py").write_text("original\n")
+    patch = "--- a/a.py\n+++ b/a.py\n@@ -1 +1 @@\n-first\n+second\n"
+
+    with StubLLMServer(responder=responder) as server:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        start = len(agent.state.messages)
+        writes = [
+            call("write_file", path="a.py", content="first\n"),
+            call("write_file", path="b.py", content="new\n"),
+        ]
+        agent.run(json.dumps(writes))
+        after_first = list(agent.state.messages)
+        agent.run(json.dumps([call("apply_patch", patch=patch)]))
+        assert (tmp_path / "a.py").read_text() == "second\n"
+
+    assert agent.rewind(1) == [("restored", str(tmp_path / "a.py"))]
+    assert (tmp_path / "a.py").read_text() == "first\n"
+    assert agent.state.messages == after_first
+
+    assert sorted(agent.rewind(1)) == [
+        ("deleted", str(tmp_path / "b.py")),
+        ("restored", str(tmp_path / "a.py")),
+    ]
+    assert (tmp_path / "a.py").read_text() == "original\n"
+    assert not (tmp_path / "b.py").exists()
+    assert len(agent.state.messages) == start
+
+    with pytest.raises(ValueError):
+        agent.rewind(1)
+    agent.close()
+    assert not os.path.exists(agent.checkpoints.directory)
+
+
+def test_snapshots_hard_link_instead_of_copying(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_text("x" * 100_000)
+    inode = os.stat(path).st_ino
+
+    store = CheckpointStore(str(tmp_path))
+    store.begin_turn([])
+    store.snapshot([str(path)])
+    [key] = store.checkpoints[-1].files.values()
+    assert os.stat(os.path.join(store.directory, key)).st_ino == inode
+
+    # Snapshot objects are verified against their hash before restoring
+    with open(path, "a") as f:  # in-place append also changes the linked object
+        f.write("y")
+    assert store.rewind(1)[1] == [("failed", str(path))]
@@ -0,0 +1,86 @@
+import json
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.dedup import ResultIndex, dedupe_latest_result
+from min_cc.history import MessageLog
+from min_cc.models import Message, ToolCall
+from min_cc.usage import usage_summary
+
+BODY = "def f():\n    return 1\n" * 20
+
+
+def tool_round(call_id, name, args, content):
+    return [
+        Message(
+            role="assistant",
+            tool_calls=[ToolCall(id=call_id, name=name, arguments=json.dumps(args))],
+        ),
+        Message(role="tool", content=content, tool_call_id=call_id),
+    ]
+
+
+def test_identical_results_keep_only_the_latest_copy():
+    messages = [Message(role="user", content="go")]
+    messages += tool_round("g1", "grep", {"pattern": "f"}, BODY)
+    messages += tool_round("b1", "bash", {"command": "cat a.py"}, BODY)
+
+    assert dedupe_latest_result(messages)[0] == 1
+    assert messages[2].tool_call_id == "g1"
+    assert messages[2].content.startswith("[Same output as the later bash call b1")
+    assert messages[4].content == BODY
+
+
+def test_newer_read_of_a_file_supersedes_older_reads():
+    messages = tool_round("r1", "read_file", {"path": "./a.py"}, BODY)
+    messages += tool_round("w1", "write_file", {"path": "a.py", "content": "x"}, "ok")
+    messages += tool_round("r2", "read_file", {"path": "a.py"}, BODY + "# edited\n")
+
+    replaced, saved = dedupe_latest_result(messages)
+    assert replaced == 1 and saved > 0
+    assert messages[1].content.startswith("[Outdated read of a.py")
+    # Different files and short results are left alone
+    messages += tool_round("r3", "read_file", {"path": "b.py"}, BODY)
+    assert dedupe_latest_result(messages) == (0, 0)
+
+
+def test_agent_sends_repeated_reads_once(tmp_path):
+    (tmp_path / "a.py").write_text(BODY)
+
+    def responder(body):
+        reads = sum(1 for m in body["messages"] if m["role"] == "tool")
+        if reads >= 3:
+            return {"content": "done"}
+        args = json.dumps({"path": "a.py"})
+        return {"tool_calls": [{"name": "read_file", "arguments": args}]}
+
+    with StubLLMServer(responder=responder) as server:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        assert agent.run("read a.py a few times") == "done"
+        last_request = server.requests[-1]
+
+    contents = [m["content"] for m in last_request["messages"] if m["role"] == "tool"]
+    assert contents.count(BODY) == 1 and contents[-1] == BODY
+    assert usage_summary(agent.state.metadata)["dedup"]["results"] == 2
+
+
+def test_index_follows_appends_and_rebuilds_after_edits():
+    index = ResultIndex()
+    messages = MessageLog(tool_round("r1", "read_file", {"path": "a.py"}, BODY))
+    assert dedupe_latest_result(messages, index) == (0, 0)
+    for i in range(2, 5):
+        messages.extend(tool_round(f"g{i}", "grep", {"pattern": str(i)}, f"{i}\n" * 200))
+        assert dedupe_latest_result(messages, index) == (0, 0)
+    assert index._indexed == len(messages)
+
+    messages.extend(tool_round("r5", "read_file", {"path": "a.py"}, BODY + "#\n"))
+    assert dedupe_latest_result(messages, index)[0] == 1
+    assert messages[1].content.startswith("[Outdated read of a.py")
+
+    # A history rewritten behind the index's back is re-indexed, not trusted
+    del messages[:2]
+    messages.extend(tool_round("b6", "bash", {"command": "x"}, "4\n" * 200))
+    assert dedupe_latest_result(messages, index)[0] == 1
+    assert messages[5].content.startswith("[Same output as the later bash call b6")
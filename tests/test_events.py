@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.constants import EVENT_WORKERS
+from min_cc.events import (
+    Backpressure,
+    EventBus,
+    LLMRequest,
+    ToolFinished,
+    ToolStarted,
+    TurnEnded,
+)
+
+
+def blocked_subscriber(bus, policy, maxsize=2):
+    """A subscriber stuck in its handler until `release` is set."""
+    release = threading.Event()
+    received = []
+
+    def handler(event):
+        release.wait()
+        received.append(event)
+
+    subscription = bus.subscribe(handler, policy=policy, maxsize=maxsize)
+    bus.publish(LLMRequest("m", 0, 0))  # taken by the handler, which then blocks
+    time.sleep(0.05)
+    return subscription, release, received
+
+
+def test_slow_subscribers_do_not_block_publish():
+    bus = EventBus()
+    seen = []
+    bus.subscribe(lambda event: (time.sleep(0.01), seen.append(event)))
+    start = time.perf_counter()
+    for i in range(20):
+        bus.publish(LLMRequest("m", i, 0))
+    assert time.perf_counter() - start < 0.1
+    assert bus.flush(timeout=5)
+    assert [event.messages for event in seen] == list(range(20))
+    bus.close()
+
+
+def test_backpressure_policies():
+    bus = EventBus()
+    drop, release, received = blocked_subscriber(bus, Backpressure.DROP)
+    for i in range(1, 5):
+        bus.publish(LLMRequest("m", i, 0))
+    release.set()
+    drop.flush()
+    assert [e.messages for e in received] == [0, 1, 2] and drop.dropped == 2
+    bus.unsubscribe(drop)
+
+    coalesce, release, received = blocked_subscriber(bus, Backpressure.COALESCE)
+    bus.publish(ToolStarted("1", "grep", "{}"))
+    for i in range(1, 4):
+        bus.publish(LLMRequest("m", i, 0))
+    release.set()
+    coalesce.flush()
+    kinds = [type(e).__name__ for e in received]
+    assert kinds == ["LLMRequest", "ToolStarted", "LLMRequest"]
+    assert received[-1].messages == 3 and coalesce.dropped == 2
+    bus.unsubscribe(coalesce)
+
+    block, release, received = blocked_subscriber(bus, Backpressure.BLOCK, maxsize=1)
+    bus.publish(LLMRequest("m", 1, 0))
+    publisher = threading.Thread(target=bus.publish, args=(LLMRequest("m", 2, 0),))
+    publisher.start()
+    publisher.join(0.1)
+    assert publisher.is_alive()  # waiting for room in the queue
+    release.set()
+    publisher.join(5)
+    block.flush()
+    assert [e.messages for e in received] == [0, 1, 2] and block.dropped == 0
+    bus.close()
+
+
+def test_agent_publishes_typed_events(tmp_path):
+    def responder(body):
+        if body["messages"][-1]["role"] == "user":
+            args = json.dumps({"path": "."})
+            return {"tool_calls": [{"name": "list_files", "arguments": args}]}
+        return {"content": "done"}
+
+    with StubLLMServer(responder=responder) as server:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        events = []
+        agent.events.subscribe(events.append)
+        callbacks = []
+        agent.run("go", on_event=lambda kind, data: callbacks.append((kind, data)))
+        agent.events.flush()
+
+    assert [event.type for event in events] == [
+        "turn_start",
+        "llm_request",
+        "llm_response",
+        "tool_call",
+        "tool_result",
+        "llm_request",
+        "llm_response",
+        "turn_end",
+    ]
+    finished = next(e for e in events if isinstance(e, ToolFinished))
+    assert finished.name == "list_files" and finished.duration_s >= 0
+    assert events[-1] == TurnEnded("done", 2, 1, events[-1].duration_s)
+    assert [kind for kind, _ in callbacks] == [event.type for event in events]
+    assert callbacks[3][1]["name"] == "list_files"
+
+
+def test_subscribers_share_a_small_pool_of_threads():
+    def event_threads():
+        return [t for t in threading.enumerate() if t.name == "min-cc-events"]
+
+    buses = [EventBus() for _ in range(50)]
+    seen = [[] for _ in buses]
+    for bus, received in zip(buses, seen):
+        bus.subscribe(received.append)
+    for i in range(3):
+        for bus in buses:
+            bus.publish(LLMRequest("m", i, 0))
+    for bus in buses:
+        assert bus.flush(timeout=5)
+        bus.close()
+    assert all([e.messages for e in received] == [0, 1, 2] for received in seen)
+    assert len(event_threads()) <= EVENT_WORKERS
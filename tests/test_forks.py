@@ -0,0 +1,167 @@
+import json
+import os
+import subprocess
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.events import ToolStarted
+from min_cc.forks import ForkManager
+
+
+def responder(body):
+    """The user message is the JSON list of tool calls to make."""
+    last = body["messages"][-1]
+    if last["role"] == "user":
+        return {"tool_calls": json.loads(last["content"])}
+    return {"content": "ok"}
+
+
+def write(path, content):
+    arguments = json.dumps({"path": path, "content": content})
+    return json.dumps([{"name": "write_file", "arguments": arguments}])
+
+
+def test_fork_shares_history_and_diverges(tmp_path):
+    agent = CodingAgent(api_key="stub", model="stub", root=str(tmp_path))
+    for i in range(50):
+        agent.add_message("user", f"message {i}")
+    fork = agent.fork()
+    assert fork.state.messages._vector is agent.state.messages._vector
+
+    fork.add_message("user", "only in the fork")
+    assert len(fork.state.messages) == len(agent.state.messages) + 1
+    assert agent.state.messages[-1].content == "message 49"
+    assert fork.state.metadata == {} and fork.registry is agent.registry
+
+
+def test_forks_run_concurrently_in_isolated_workspaces(tmp_path):
+    root = tmp_path / "workspace"
+    root.mkdir()
+    (root / "a.py").write_text("original\n")
+    (root / "gone.py").write_text("delete me\n")
+    (root / ".min-cc").mkdir()
+    (root / ".min-cc" / "state.json").write_text("{}")
+
+    with StubLLMServer(responder=responder) as server:
+        main = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(root)
+        )
+        forks = ForkManager(main, fork_dir=str(tmp_path / "forks"))
+        one = forks.fork("one")
+        two = forks.fork("two")
+        assert os.path.commonpath([one.agent.root, str(root)]) != str(root)
+        assert os.path.dirname(one.workspace) == forks.fork_dir
+        assert not os.path.exists(os.path.join(one.agent.root, ".min-cc"))
+
+        prompts = {"one": write("a.py", "one\n"), "two": write("b.py", "two\n")}
+        answers = forks.run(prompts)
+        assert answers == {"one": "ok", "two": "ok"}
+
+    assert (root / "a.py").read_text() == "original\n"
+    assert not (root / "b.py").exists()
+    os.unlink(os.path.join(two.agent.root, "gone.py"))
+    assert forks.changes("one") == [("M", "a.py")]
+    assert forks.changes("two") == [("A", "b.py"), ("D", "gone.py")]
+
+    assert forks.merge("two") == [("A", "b.py"), ("D", "gone.py")]
+    assert (root / "b.py").read_text() == "two\n"
+    assert not (root / "gone.py").exists()
+    assert "Merged file changes from fork two" in main.state.messages[-1].content
+
+    (root / "a.py").write_text("edited in main\n")
+    assert forks.merge("one") == [("conflict", "a.py")]
+    assert (root / "a.py").read_text() == "edited in main\n"
+
+    forks.discard("one")
+    assert not os.path.exists(one.workspace)
+    assert set(forks.forks) == {"main", "two"} and two.agent.root != one.agent.root
+    forks.close()
+
+
+def git(cwd, *args):
+    command = ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args]
+    return subprocess.run(
+        command, cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def test_fork_of_a_git_workspace_is_a_worktree(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "pkg").mkdir(parents=True)
+    (repo / "top.txt").write_text("top\n")
+    (repo / "pkg" / "a.py").write_text("committed\n")
+    git(repo, "init", "-q")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "init")
+    (repo / "pkg" / "a.py").write_text("uncommitted\n")
+    head = git(repo, "rev-parse", "HEAD")
+
+    main = CodingAgent(api_key="stub", model="stub", root=str(repo / "pkg"))
+    forks = ForkManager(main, fork_dir=str(tmp_path / "forks"))
+    fork = forks.fork("one")
+    assert fork.agent.root == os.path.join(fork.workspace, "pkg")
+    assert (tmp_path / "forks").samefile(os.path.dirname(forks.fork_dir))
+
+    # git in the fork works on the fork: same commit and uncommitted changes
+    assert git(fork.agent.root, "rev-parse", "--show-toplevel").strip() == fork.workspace
+    assert git(fork.agent.root, "status", "--porcelain") == " M pkg/a.py\n"
+    git(fork.agent.root, "commit", "-q", "-am", "in the fork")
+    assert git(repo, "rev-parse", "HEAD") == head
+    assert git(repo, "status", "--porcelain") == " M pkg/a.py\n"
+
+    forks.discard("one")
+    assert not os.path.exists(fork.workspace)
+    assert str(fork.workspace) not in git(repo, "worktree", "list")
+    forks.close()
+
+
+def test_concurrent_forks_publish_to_their_own_subscribers(tmp_path):
+    (tmp_path / "a.py").write_text("a\n")
+    with StubLLMServer(responder=responder, latency=0.1) as server:
+        main = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        seen = {}
+        forks = ForkManager(
+            main,
+            fork_dir=str(tmp_path / "forks"),
+            on_fork=lambda agent: agent.events.subscribe(
+                seen.setdefault(id(agent), []).append, types=(ToolStarted,)
+            ),
+        )
+        one = forks.fork("one", isolate=False)
+        two = forks.fork("two", isolate=False)
+        assert one.agent.events is not two.agent.events is not main.events
+
+        forks.run({"one": write("one.py", "1\n"), "two": write("two.py", "2\n")})
+        for fork in (one, two):
+            fork.agent.events.flush()
+
+    def paths(fork):
+        return [json.loads(e.arguments)["path"] for e in seen[id(fork.agent)]]
+
+    assert paths(one) == ["one.py"] and paths(two) == ["two.py"]
+    forks.close()
+
+
+def test_merge_can_be_rewound_and_touched_files_are_unchanged(tmp_path):
+    root = tmp_path / "workspace"
+    root.mkdir()
+    (root / "a.py").write_text("original\n")
+    (root / "b.py").write_text("untouched\n")
+    main = CodingAgent(api_key="stub", model="stub", root=str(root))
+    forks = ForkManager(main, fork_dir=str(tmp_path / "forks"))
+    fork = forks.fork("one")
+    assert fork.baseline["a.py"] == (os.stat(root / "a.py").st_mtime_ns, 9)
+
+    with open(os.path.join(fork.agent.root, "a.py"), "w") as f:
+        f.write("changed\n")
+    os.utime(os.path.join(fork.agent.root, "b.py"))  # same content, new mtime
+    assert forks.changes("one") == [("M", "a.py")]
+
+    assert forks.merge("one") == [("M", "a.py")]
+    assert (root / "a.py").read_text() == "changed\n"
+    assert main.rewind() == [("restored", str(root / "a.py"))]
+    assert (root / "a.py").read_text() == "original\n"
+    assert "Merged" not in main.state.messages[-1].content
+    forks.close()
@@ -0,0 +1,41 @@
+from min_cc.history import MessageLog, PersistentVector
+
+
+def test_persistent_vector_matches_list_across_levels():
+    n = 32 * 32 + 32 + 5  # needs a second trie level
+    vector = PersistentVector()
+    versions = []
+    for i in range(n):
+        vector = vector.append(i)
+        if i in (0, 31, 32, 1055, n - 1):
+            versions.append((i + 1, vector))
+
+    assert list(vector) == list(range(n))
+    assert [vector.get(i) for i in range(n)] == list(range(n))
+    for length, old in versions:  # earlier versions are unchanged
+        assert list(old) == list(range(length))
+
+    edited = vector.set(7, "x").set(n - 1, "y")
+    assert edited.get(7) == "x" and edited.get(n - 1) == "y"
+    assert vector.get(7) == 7 and vector.get(n - 1) == n - 1
+    # Only the path to the edited leaf is copied
+    assert edited._root[1] is vector._root[1]
+
+
+def test_message_log_forks_share_and_diverge():
+    log = MessageLog(range(100))
+    fork = log.fork()
+    assert fork._vector is log._vector
+
+    fork.append(100)
+    fork[0] = "first"
+    log.append("other")
+    assert fork[-1] == 100 and fork[0] == "first"
+    assert log[-1] == "other" and log[0] == 0
+    assert len(log) == len(fork) == 101
+
+    assert log[:3] == [0, 1, 2]
+    del log[1:99]
+    assert log == [0, 99, "other"]
+    log.insert(0, "start")
+    assert log == ["start", 0, 99, "other"] and log + ["x"] == [*log, "x"]
@@ -0,0 +1,106 @@
+from unittest.mock import MagicMock
+
+import pytest
+from openai import OpenAI
+from openai.types.chat import ChatCompletion
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.llm_cache import CacheMiss, CacheMode, CachedClient
+
+
+def make_completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test-model",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+        }
+    )
+
+
+def make_client():
+    client = MagicMock()
+    client.base_url = "http://stub/v1"
+    client.chat.completions.create.side_effect = lambda **kw: make_completion(
+        kw["messages"][-1]["content"].upper()
+    )
+    return client
+
+
+REQUEST = {"model": "test-model", "messages": [{"role": "user", "content": "hi"}]}
+
+
+def test_record_then_replay_hits_disk(tmp_path):
+    inner = make_client()
+    CachedClient(inner, cache_dir=str(tmp_path)).chat.completions.create(**REQUEST)
+
+    replay = CachedClient(inner, cache_dir=str(tmp_path), mode=CacheMode.REPLAY)
+    response = replay.chat.completions.create(**REQUEST)
+
+    assert response.choices[0].message.content == "HI"
+    assert replay.hits == 1
+    assert inner.chat.completions.create.call_count == 1
+
+
+def test_replay_miss_raises(tmp_path):
+    replay = CachedClient(make_client(), cache_dir=str(tmp_path), mode=CacheMode.REPLAY)
+    with pytest.raises(CacheMiss):
+        replay.chat.completions.create(**REQUEST)
+
+
+def test_fingerprint_is_canonical(tmp_path):
+    cache = CachedClient(make_client(), cache_dir=str(tmp_path))
+    a = cache.fingerprint({"model": "m", "messages": [], "tool_choice": "auto"})
+    b = cache.fingerprint({"tool_choice": "auto", "messages": [], "model": "m"})
+    c = cache.fingerprint({"model": "other", "messages": [], "tool_choice": "auto"})
+    assert a == b
+    assert a != c
+
+
+def test_passthrough_never_touches_disk(tmp_path):
+    inner = make_client()
+    cache = CachedClient(inner, cache_dir=str(tmp_path), mode=CacheMode.PASSTHROUGH)
+    cache.chat.completions.create(**REQUEST)
+    cache.chat.completions.create(**REQUEST)
+
+    assert inner.chat.completions.create.call_count == 2
+    assert not list(tmp_path.iterdir())
+
+
+def test_eviction_keeps_store_bounded(tmp_path):
+    cache = CachedClient(make_client(), cache_dir=str(tmp_path), max_bytes=2000)
+    for i in range(20):
+        cache.chat.completions.create(
+            model="test-model", messages=[{"role": "user", "content": f"msg {i}"}]
+        )
+
+    total = sum(p.stat().st_size for p in tmp_path.rglob("*.json"))
+    assert 0 < total <= 2000
+
+
+def test_streams_are_recorded_and_replayed(tmp_path):
+    with StubLLMServer(responder=lambda body: {"content": "streamed answer"}) as server:
+        inner = OpenAI(api_key="stub", base_url=server.base_url)
+        request = {**REQUEST, "stream": True, "stream_options": {"include_usage": True}}
+
+        recorded = list(
+            CachedClient(inner, cache_dir=str(tmp_path)).chat.completions.create(**request)
+        )
+        replay = CachedClient(inner, cache_dir=str(tmp_path), mode=CacheMode.REPLAY)
+        replayed = list(replay.chat.completions.create(**request))
+
+        assert len(server.requests) == 1
+
+    assert replay.hits == 1
+    assert [c.model_dump() for c in replayed] == [c.model_dump() for c in recorded]
+    assert "".join(
+        c.choices[0].delta.content or "" for c in replayed if c.choices
+    ) == "streamed answer"
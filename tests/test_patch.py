@@ -0,0 +1,94 @@
+import difflib
+
+import pytest
+
+from min_cc import patch as patch_module
+from min_cc.patch import PatchError, apply_hunks, apply_patch, parse_patch
+from min_cc.tools import ApplyPatchTool
+
+ORIGINAL = "".join(f"line {i}\n" for i in range(1, 41))
+
+
+def unified(old: str, new: str, path: str) -> str:
+    return "".join(
+        difflib.unified_diff(
+            old.splitlines(True), new.splitlines(True), f"a/{path}", f"b/{path}"
+        )
+    )
+
+
+def test_roundtrip_of_generated_diff():
+    new = ORIGINAL.replace("line 5\n", "five\n").replace("line 30\n", "")
+    new += "line 41\n"
+    [file_patch] = parse_patch(unified(ORIGINAL, new, "x.py"))
+    assert apply_hunks(ORIGINAL, file_patch.hunks) == new
+
+
+def test_removed_and_added_lines_that_look_like_file_headers():
+    old = "a\n-- x\nb\n"
+    new = "a\n++ y\nb\n"
+    [file_patch] = parse_patch(unified(old, new, "sql.txt"))
+    assert file_patch.path == "b/sql.txt"
+    assert apply_hunks(old, file_patch.hunks) == new
+
+
+def test_hunks_apply_despite_drifted_line_numbers_and_whitespace():
+    drifted = "# header\n" * 7 + ORIGINAL.replace("line 21\n", "line 21   \n")
+    diff = (
+        "--- a/x.py\n+++ b/x.py\n"
+        "@@ -19,5 +19,5 @@\n line 19\n line 20\n line 21\n-line 22\n+twenty-two\n line 23\n"
+    )
+    result = apply_hunks(drifted, parse_patch(diff)[0].hunks)
+    assert "line 21   \ntwenty-two\nline 23\n" in result
+    assert result.count("\n") == drifted.count("\n")
+
+
+def test_multi_file_patch_creates_modifies_and_deletes(tmp_path):
+    (tmp_path / "a.py").write_text(ORIGINAL)
+    (tmp_path / "old.py").write_text("gone\n")
+    diff = (
+        unified(ORIGINAL, ORIGINAL.replace("line 2\n", "two\n"), "a.py")
+        + "--- /dev/null\n+++ b/new.py\n@@ -0,0 +1,2 @@\n+print('hi')\n+x = 1\n"
+        + "--- a/old.py\n+++ /dev/null\n@@ -1 +0,0 @@\n-gone\n"
+    )
+
+    result = ApplyPatchTool(root=str(tmp_path)).execute(diff)
+
+    assert result.splitlines()[1:] == ["M a.py (+1 -1)", "A new.py (+2 -0)", "D old.py (+0 -1)"]
+    assert (tmp_path / "a.py").read_text() == ORIGINAL.replace("line 2\n", "two\n")
+    assert (tmp_path / "new.py").read_text() == "print('hi')\nx = 1\n"
+    assert not (tmp_path / "old.py").exists()
+
+
+def test_nothing_is_written_when_any_hunk_fails(tmp_path):
+    (tmp_path / "a.py").write_text(ORIGINAL)
+    (tmp_path / "b.py").write_text("alpha\nbeta\n")
+    diff = unified(ORIGINAL, ORIGINAL.replace("line 2\n", "two\n"), "a.py") + (
+        "--- a/b.py\n+++ b/b.py\n@@ -1,2 +1,2 @@\n alpha\n-gamma\n+delta\n"
+    )
+
+    result = ApplyPatchTool(root=str(tmp_path)).execute(diff)
+
+    assert result.startswith("Error: patch not applied")
+    assert "b.py: hunk 1 of 1" in result
+    assert (tmp_path / "a.py").read_text() == ORIGINAL
+
+
+def test_failed_write_rolls_back_earlier_files(tmp_path, monkeypatch):
+    (tmp_path / "a.py").write_text("a\n")
+    (tmp_path / "b.py").write_text("b\n")
+    diff = unified("a\n", "A\n", "a.py") + unified("b\n", "B\n", "b.py")
+
+    real_write = patch_module.atomic_write
+
+    def failing_write(path, content):
+        if path.endswith("b.py") and content == "B\n":
+            raise OSError(28, "No space left on device", path)
+        real_write(path, content)
+
+    monkeypatch.setattr(patch_module, "atomic_write", failing_write)
+    with pytest.raises(PatchError, match="rolled back"):
+        apply_patch(diff, resolve=lambda p: str(tmp_path / p))
+
+    assert (tmp_path / "a.py").read_text() == "a\n"
+    assert (tmp_path / "b.py").read_text() == "b\n"
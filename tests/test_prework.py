@@ -0,0 +1,86 @@
+import time
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.cancellation import CancelToken
+from min_cc.compaction import CompactionService, CompactionStrategy
+from min_cc.models import Message
+from min_cc.prework import IdleScheduler
+
+
+def test_serialization_reuses_unchanged_prefix(tmp_path):
+    agent = CodingAgent(api_key="stub", model="stub", root=str(tmp_path))
+    agent.add_message("user", "one")
+    first = agent._prepare_messages()
+    agent.add_message("assistant", "two")
+    second = agent._prepare_messages()
+    assert second[0] is first[0] and second[1] is first[1]
+    assert second[2] == {"role": "assistant", "content": "two"}
+
+    agent.state.messages[1] = Message(role="user", content="edited")
+    third = agent._prepare_messages()
+    assert third[0] is first[0] and third[1] == {"role": "user", "content": "edited"}
+
+
+def test_idle_scheduler_prepares_the_next_turn(tmp_path):
+    with StubLLMServer(responder=lambda body: {"content": "summary"}) as server:
+        agent = CodingAgent(
+            api_key="stub",
+            model="stub",
+            base_url=server.base_url,
+            root=str(tmp_path),
+            compaction_service=CompactionService(
+                token_limit=100, strategy=CompactionStrategy.SUMMARIZE
+            ),
+        )
+        for i in range(10):
+            agent.add_message("user", f"message {i} " * 20)
+        scheduler = IdleScheduler()
+        scheduler._run(agent, CancelToken())
+
+        assert scheduler.done == ["connection", "index", "history"]
+        assert len(server.requests) == 1  # the summarization
+        assert "[CONVERSATION SUMMARY]" in agent.state.messages[1].content
+        assert agent._serialized[0] == list(agent.state.messages)
+        assert agent.state.metadata["usage"]["by_call_type"]["summarization"]
+
+
+def test_idle_scheduler_skips_work_once_input_is_submitted(tmp_path):
+    agent = CodingAgent(
+        api_key="stub",
+        model="stub",
+        root=str(tmp_path),
+        compaction_service=CompactionService(token_limit=10),
+    )
+    agent.add_message("user", "long " * 100)
+    scheduler = IdleScheduler()
+    token = CancelToken()
+    token.cancel()
+    scheduler._run(agent, token)
+    assert len(agent.state.messages) == 2 and scheduler.done == []
+
+
+def test_stop_aborts_a_summarization_in_progress(tmp_path):
+    with StubLLMServer(responder=lambda body: {"content": "summary"}, latency=30) as server:
+        agent = CodingAgent(
+            api_key="stub",
+            model="stub",
+            base_url=server.base_url,
+            root=str(tmp_path),
+            compaction_service=CompactionService(
+                token_limit=100, strategy=CompactionStrategy.SUMMARIZE
+            ),
+        )
+        for i in range(10):
+            agent.add_message("user", f"message {i} " * 20)
+        history = list(agent.state.messages)
+        scheduler = IdleScheduler()
+        scheduler.start(agent)
+        while server.request_count == 0:
+            time.sleep(0.01)
+
+        start = time.perf_counter()
+        scheduler.stop()
+        assert time.perf_counter() - start < 5
+        assert list(agent.state.messages) == history  # not truncated instead
+        assert "history" not in scheduler.done
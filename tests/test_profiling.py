@@ -0,0 +1,51 @@
+import pstats
+import threading
+import time
+
+from min_cc.profiling import Profiler
+
+
+def busy_work():
+    return sum(len(str(i)) for i in range(200_000))
+
+
+def allocate():
+    return [str(i) * 10 for i in range(20_000)]
+
+
+def test_profiles_turn_across_threads_without_io_waits(tmp_path):
+    profiler = Profiler(directory=str(tmp_path))
+    profiler.start()
+    profiler.begin_turn()
+
+    kept = []
+
+    def worker():
+        with profiler.capture():
+            busy_work()
+            time.sleep(0.5)  # waiting, not work
+            kept.append(allocate())
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    report = profiler.end_turn()
+    profiler.stop()
+
+    assert report.turn == 1
+    stats = pstats.Stats(report.stats_path).stats
+    [sleep] = [v for (_, _, name), v in stats.items() if "sleep" in name]
+    assert sleep[2] < 0.1  # the 0.5s sleep costs no CPU time
+    assert any("genexpr" in function for function, *_ in report.hot)
+    assert "test_profiling.py" in open(report.alloc_path).read()
+    assert report.peak_bytes > 0
+    assert "Turn 1" in report.summary()
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    profiler = Profiler(directory=str(tmp_path))
+    profiler.begin_turn()
+    with profiler.capture():
+        busy_work()
+    assert profiler.end_turn() is None
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,198 @@
+import argparse
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.stub_server import ScriptedSession, StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.cli import worker as worker_cli
+from min_cc.cancellation import CancelToken, use_token
+from min_cc import remote as remote_module
+from min_cc.remote import (
+    RemoteToolRegistry,
+    WorkerClient,
+    WorkerError,
+    WorkerServer,
+    read_frame,
+    write_frame,
+)
+from min_cc.tools import get_default_registry
+
+
+@pytest.fixture
+def worker(tmp_path):
+    (tmp_path / "README.md").write_text("remote workspace")
+    root = str(tmp_path)
+    server = WorkerServer(
+        ("127.0.0.1", 0), get_default_registry(root=root), root=root, token="secret"
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_frames_are_compressed_when_large():
+    a, b = socket.socketpair()
+    with a, b:
+        message = {"id": 1, "result": "x" * 100_000}
+        write_frame(a, message)
+        header = b.recv(5, socket.MSG_PEEK)
+        assert header[4] == 1  # compressed
+        assert int.from_bytes(header[:4], "big") < 10_000
+        assert read_frame(b.makefile("rb")) == message
+
+        write_frame(a, {"id": 2, "result": "small"})
+        assert read_frame(b.makefile("rb")) == {"id": 2, "result": "small"}
+
+
+def test_remote_registry_runs_tools_on_worker(worker, tmp_path):
+    registry = RemoteToolRegistry(WorkerClient(worker.address, token="secret"))
+    names = {d["function"]["name"] for d in registry.get_tool_definitions()}
+    assert {"read_file", "write_file", "bash"} <= names
+    assert registry.is_read_only("read_file")
+    assert not registry.is_read_only("write_file")
+
+    written = []
+    result = registry.execute(
+        "1",
+        "write_file",
+        json.dumps({"path": "new.txt", "content": "hello"}),
+        on_write=written.append,
+    )
+    assert not result.is_error
+    assert (tmp_path / "new.txt").read_text() == "hello"
+    assert written == []  # remote files are not checkpointed
+
+    result = registry.execute("2", "read_file", json.dumps({"path": "README.md"}))
+    assert result.content == "remote workspace"
+    assert registry.execute("3", "read_file", '{"path": "missing"}').is_error
+
+    big = "line\n" * 50_000
+    (tmp_path / "big.txt").write_text(big)
+    assert registry.execute("4", "read_file", '{"path": "big.txt"}').content == big
+    registry.client.close()
+
+
+def test_concurrent_calls_are_pipelined(worker):
+    registry = RemoteToolRegistry(WorkerClient(worker.address, token="secret"))
+    args = json.dumps({"command": 'python -c "import time; time.sleep(0.5); print(1 + 1)"'})
+    start = time.perf_counter()
+    with ThreadPoolExecutor(4) as pool:
+        results = list(
+            pool.map(lambda i: registry.execute(str(i), "bash", args), range(4))
+        )
+    assert time.perf_counter() - start < 1.5  # not 4 x 0.5s one after another
+    assert [r.content.strip() for r in results] == ["2"] * 4
+    registry.client.close()
+
+
+def test_cancel_stops_remote_command(worker):
+    registry = RemoteToolRegistry(WorkerClient(worker.address, token="secret"))
+    token = CancelToken()
+    threading.Timer(0.3, token.cancel).start()
+    start = time.perf_counter()
+    with use_token(token):
+        result = registry.execute(
+            "1", "bash", json.dumps({"command": 'python -c "import time; time.sleep(30)"'})
+        )
+    assert time.perf_counter() - start < 5
+    assert result.is_error
+    assert registry.client.call("ping") == "pong"
+    registry.client.close()
+
+
+def test_bad_token_is_rejected(worker):
+    with pytest.raises(WorkerError):
+        WorkerClient(worker.address, token="wrong").call("ping")
+    with pytest.raises(ValueError):
+        WorkerClient("no-port")
+
+
+def test_lost_worker_becomes_tool_error(worker):
+    registry = RemoteToolRegistry(WorkerClient(worker.address, token="secret"))
+    worker.shutdown()
+    worker.server_close()
+    registry.client.close()
+    result = registry.execute("1", "read_file", '{"path": "README.md"}')
+    assert result.is_error and "worker" in result.content
+
+
+def test_agent_uses_worker_workspace(worker, tmp_path, monkeypatch):
+    local = tmp_path / "local"
+    local.mkdir()
+    (local / "README.md").write_text("local workspace")
+    monkeypatch.chdir(local)
+
+    registry = RemoteToolRegistry(WorkerClient(worker.address, token="secret"))
+    with StubLLMServer(responder=ScriptedSession(calls_per_round=1)) as llm:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=llm.base_url, registry=registry
+        )
+        assert agent.run("read the readme") == "Done."
+        tool_msgs = [m for m in llm.requests[-1]["messages"] if m["role"] == "tool"]
+
+    assert tool_msgs[-1]["content"] == "remote workspace"
+    with pytest.raises(ValueError):
+        agent.fork(root=str(tmp_path / "copy"))
+    registry.client.close()
+
+
+def test_frames_are_limited_after_decompression():
+    a, b = socket.socketpair()
+    with a, b:
+        write_frame(a, {"result": "x" * 100_000})  # compresses to a few hundred bytes
+        with pytest.raises(ValueError):
+            read_frame(b.makefile("rb"), max_size=10_000)
+
+
+def test_oversized_hello_is_refused_before_authorization(worker):
+    sock = socket.create_connection(worker.server_address)
+    with sock:
+        write_frame(sock, {"id": 0, "method": "hello", "params": {"token": "x" * 10_000}})
+        assert read_frame(sock.makefile("rb")) is None  # dropped unanswered
+
+
+def test_timed_out_call_is_cancelled_on_worker(worker, monkeypatch):
+    client = WorkerClient(worker.address, token="secret", timeout=0.3)
+    cancelled = []
+    cancel = client.cancel
+    monkeypatch.setattr(
+        client, "cancel", lambda request_id: (cancelled.append(request_id), cancel(request_id))
+    )
+    args = json.dumps({"command": 'python -c "import time; time.sleep(30)"'})
+    result = RemoteToolRegistry(client, [{"name": "bash"}]).execute("1", "bash", args)
+    assert result.is_error and "no reply" in result.content
+    assert cancelled == [1] and client._pending == {}
+    assert client.call("ping") == "pong"
+    client.close()
+
+
+def test_worker_refuses_public_host_without_token(monkeypatch):
+    monkeypatch.delenv("WORKER_TOKEN", raising=False)
+    monkeypatch.setattr(worker_cli, "load_dotenv", lambda: None)
+    args = argparse.Namespace(
+        host="0.0.0.0", port=0, root=".", threads=1, token=None
+    )
+    with pytest.raises(SystemExit):
+        worker_cli.run(args)
+    assert worker_cli.is_loopback("127.0.0.1") and worker_cli.is_loopback("::1")
+    assert worker_cli.is_loopback("localhost") and not worker_cli.is_loopback("build-box")
+
+
+@pytest.mark.parametrize(
+    "garbled", [[], "x", 1, {"id": [1]}, {"id": 1, "method": "hello", "params": []}]
+)
+def test_garbled_messages_close_the_connection(worker, garbled, capsys):
+    sock = socket.create_connection(worker.server_address)
+    with sock:
+        sock.sendall(remote_module._HEADER.pack(len(json.dumps(garbled)), 0))
+        sock.sendall(json.dumps(garbled).encode())
+        assert read_frame(sock.makefile("rb")) is None  # dropped unanswered
+    time.sleep(0.1)
+    assert "Traceback" not in capsys.readouterr().err
+    assert WorkerClient(worker.address, token="secret").call("ping") == "pong"
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+
+from min_cc.agent import CodingAgent
+from min_cc.compaction import CompactionService, CompactionStrategy
+from min_cc.models import Message
+from min_cc.routing import ModelRouter
+from min_cc.usage import merge_usage, record_usage, usage_summary
+
+
+def test_from_env_precedence(monkeypatch):
+    monkeypatch.delenv("AUX_MODEL", raising=False)
+    monkeypatch.delenv("SUMMARIZER_MODEL", raising=False)
+    assert ModelRouter.from_env().routes == {}
+
+    monkeypatch.setenv("AUX_MODEL", "small")
+    monkeypatch.setenv("SUMMARIZER_MODEL", "tiny")
+    router = ModelRouter.from_env()
+    assert router.model_for("summarization", "big") == "tiny"
+    assert router.model_for("subagent", "big") == "small"
+    assert router.model_for("main", "big") == "big"
+
+
+def test_token_limit_is_looked_up_once_per_model():
+    lookup = MagicMock(return_value=1234)
+    router = ModelRouter({"summarization": "small", "subagent": "small"}, lookup)
+    assert router.token_limit_for("summarization", default=None) == 1234
+    assert router.token_limit_for("subagent", default=9) == 1234
+    assert router.token_limit_for("main", default=9) == 9
+    lookup.assert_called_once_with("small")
+
+
+def test_summarization_uses_routed_model_and_clips_history():
+    service = CompactionService(token_limit=1, strategy=CompactionStrategy.SUMMARIZE)
+    client = MagicMock()
+    client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="Summary"))]
+    )
+    messages = [Message(role="system", content="s")] + [
+        Message(role="user", content="x" * 1000) for _ in range(10)
+    ]
+
+    service.compact(messages, client, model="small", summary_token_limit=100)
+
+    kwargs = client.chat.completions.create.call_args.kwargs
+    assert kwargs["model"] == "small"
+    assert len(kwargs["messages"][1]["content"]) <= 400
+
+
+def test_subagent_uses_aux_model_and_its_limit():
+    router = ModelRouter({"subagent": "small"}, token_limit_lookup=lambda model: 1234)
+    agent = CodingAgent(api_key="fake", model="big", client=MagicMock(), router=router)
+
+    child = agent.spawn_subagent(["read_file"])
+
+    assert child.model == "small"
+    assert child.compaction_service.token_limit == 1234
+    assert child.router is router
+
+
+def test_subagent_usage_is_recorded_under_the_aux_model():
+    parent, child = {}, {}
+    record_usage(child, "main", None, model="small")
+    merge_usage(parent, child, "subagent")
+    assert usage_summary(parent)["by_call_type"]["subagent"]["models"] == {"small": 1}
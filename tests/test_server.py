@@ -0,0 +1,105 @@
+import json
+import threading
+
+import httpx
+import pytest
+
+from benchmarks.stub_server import ScriptedSession, StubLLMServer
+from min_cc.server import SessionManager, make_server
+
+
+@pytest.fixture
+def api(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "README.md").write_text(f"workspace {name}")
+
+    with StubLLMServer(responder=ScriptedSession(calls_per_round=1)) as llm:
+        from openai import OpenAI
+
+        manager = SessionManager(
+            OpenAI(api_key="stub", base_url=llm.base_url),
+            workspace_base=str(tmp_path),
+            model="stub-model",
+            max_sessions=2,
+            token_limit=100_000,
+        )
+        server = make_server(manager, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        with httpx.Client(base_url=f"http://{host}:{port}", timeout=10) as client:
+            yield client, manager, llm
+        server.shutdown()
+        server.server_close()
+
+
+def test_session_lifecycle(api):
+    client, manager, llm = api
+    a = client.post("/sessions", json={"root": "a"}).json()
+    b = client.post("/sessions", json={"root": "b"}).json()
+
+    reply = client.post(f"/sessions/{a['id']}/messages", json={"content": "read it"})
+    assert reply.status_code == 200
+    assert reply.json()["response"] == "Done."
+    tool_msgs = [m for m in llm.requests[-1]["messages"] if m["role"] == "tool"]
+    assert tool_msgs[-1]["content"] == "workspace a"
+
+    # Sessions for the same root share a registry; different roots do not
+    assert manager.get(a["id"]).agent.registry is not manager.get(b["id"]).agent.registry
+
+    # Limit reached: no idle sessions to reap
+    assert client.post("/sessions", json={"root": "a"}).status_code == 503
+
+    cleared = client.post(f"/sessions/{a['id']}/clear").json()
+    assert cleared["messages"] == 1
+
+    assert client.delete(f"/sessions/{a['id']}").status_code == 200
+    assert client.get(f"/sessions/{a['id']}").status_code == 404
+    assert len(client.get("/sessions").json()["sessions"]) == 1
+
+
+def test_rejects_workspace_outside_base(api):
+    client, _, _ = api
+    response = client.post("/sessions", json={"root": "../.."})
+    assert response.status_code == 400
+
+
+def test_events_stream_replays_turn(api):
+    client, manager, _ = api
+    session = client.post("/sessions", json={"root": "b"}).json()
+    client.post(f"/sessions/{session['id']}/messages", json={"content": "go"})
+
+    events = []
+    with client.stream("GET", f"/sessions/{session['id']}/events") as stream:
+        for line in stream.iter_lines():
+            if line.startswith("event: "):
+                events.append(line[len("event: ") :])
+            if events and events[-1] == "turn_end":
+                break
+
+    assert events == [
+        "turn_start",
+        "llm_request",
+        "llm_response",
+        "tool_call",
+        "tool_result",
+        "llm_request",
+        "llm_response",
+        "turn_end",
+    ]
+
+
+def test_idle_sessions_are_reaped(api):
+    client, manager, _ = api
+    manager.idle_timeout = 0
+    client.post("/sessions", json={"root": "a"})
+    client.post("/sessions", json={"root": "b"})
+    assert manager.reap_idle() == 2
+    assert client.get("/health").json()["sessions"] == 0
+
+
+def test_unknown_worker_is_rejected(api):
+    client, manager, llm = api
+    reply = client.post("/sessions", json={"worker": "gpu-box"})
+    assert reply.status_code == 400
+    assert not manager.list()
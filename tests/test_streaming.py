@@ -0,0 +1,123 @@
+import json
+import time
+
+from openai.types.chat import ChatCompletionChunk
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.models import ToolCall
+from min_cc.streaming import Speculator, StreamedResponse
+from min_cc.tools import ReadFileTool, ToolRegistry, WriteFileTool
+
+
+def chunk(index, id=None, name=None, arguments=""):
+    function = {"arguments": arguments}
+    if name:
+        function["name"] = name
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "c",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "m",
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {
+                        "tool_calls": [{"index": index, "id": id, "function": function}]
+                    },
+                }
+            ],
+        }
+    )
+
+
+class RecordingReadTool(ReadFileTool):
+    started: list = []
+
+    def execute(self, path: str) -> str:
+        self.started.append((path, time.perf_counter()))
+        return super().execute(path)
+
+
+def test_read_only_calls_start_before_the_stream_ends(tmp_path):
+    for name in "abc":
+        (tmp_path / f"{name}.py").write_text(f"content of {name}")
+
+    def responder(body):
+        if body["messages"][-1]["role"] == "tool":
+            return {"content": "done"}
+        return {
+            "tool_calls": [
+                {"name": "read_file", "arguments": json.dumps({"path": f"{name}.py"})}
+                for name in "abc"
+            ]
+        }
+
+    tool = RecordingReadTool(root=str(tmp_path), started=[])
+    with StubLLMServer(responder=responder, chunk_latency=0.02) as server:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        agent.registry.register_tool(tool)
+
+        stream_ends = []
+        call_llm = agent._call_llm
+
+        def timed_call_llm(*args, **kwargs):
+            response = call_llm(*args, **kwargs)
+            stream_ends.append(time.perf_counter())
+            return response
+
+        agent._call_llm = timed_call_llm
+        assert agent.run("read them") == "done"
+
+    # The first two calls were complete (and ran) while later ones still streamed
+    assert [path for path, _ in tool.started] == ["a.py", "b.py", "c.py"]
+    assert tool.started[1][1] < stream_ends[0]
+    results = [m.content for m in agent.state.messages if m.role == "tool"]
+    assert results == ["content of a", "content of b", "content of c"]
+
+
+def test_speculation_stops_at_first_side_effect(tmp_path):
+    registry = ToolRegistry()
+    registry.register_tool(ReadFileTool(root=str(tmp_path)))
+    registry.register_tool(WriteFileTool(root=str(tmp_path)))
+    speculator = Speculator(registry)
+    response = StreamedResponse()
+
+    read = json.dumps({"path": "x.py"})
+    write = json.dumps({"path": "x.py", "content": "new"})
+    for c in [
+        chunk(0, "r1", "read_file", read),
+        chunk(1, "w1", "write_file", write),
+        chunk(2, "r2", "read_file", read),
+    ]:
+        response.add_chunk(c)
+        speculator.update(response)
+
+    assert speculator.dispatched == 1
+    assert not (tmp_path / "x.py").exists()  # the write never ran early
+    [first, second, third] = response.tool_calls()
+    assert speculator.take(first).result()[0].is_error  # file did not exist yet
+    assert speculator.take(second) is None and speculator.take(third) is None
+
+
+def test_partial_arguments_are_not_dispatched(tmp_path):
+    registry = ToolRegistry()
+    registry.register_tool(ReadFileTool(root=str(tmp_path)))
+    speculator = Speculator(registry)
+    response = StreamedResponse()
+
+    response.add_chunk(chunk(0, "r1", "read_file", '{"path": "a'))
+    speculator.update(response)
+    assert speculator.dispatched == 0
+
+    response.add_chunk(chunk(0, arguments='.py"}'))
+    speculator.update(response)
+    assert speculator.dispatched == 1
+
+    # A call whose final form differs from what ran is not reused
+    changed = ToolCall(id="r1", name="read_file", arguments='{"path": "b.py"}')
+    assert speculator.take(changed) is None
+    speculator.discard()
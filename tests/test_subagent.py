@@ -0,0 +1,70 @@
+import json
+
+from benchmarks.stub_server import StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.subagent import TaskTool
+from min_cc.usage import usage_summary
+
+
+def responder(body):
+    tool_names = {t["function"]["name"] for t in body.get("tools", [])}
+    messages = body["messages"]
+    last = messages[-1]
+
+    if "task" in tool_names:  # parent
+        if last["role"] == "user":
+            tasks = [
+                {"description": "find a", "prompt": "read a.py"},
+                {"description": "find b", "prompt": "read b.py"},
+            ]
+            return {"tool_calls": [{"name": "task", "arguments": json.dumps({"tasks": tasks})}]}
+        return {"content": "parent done"}
+
+    # child: read the requested file, then report its content
+    if last["role"] == "user":
+        path = last["content"].split()[-1]
+        return {"tool_calls": [{"name": "read_file", "arguments": json.dumps({"path": path})}]}
+    return {"content": f"found: {last['content']}"}
+
+
+def test_task_tool_runs_children_with_isolated_context(tmp_path):
+    (tmp_path / "a.py").write_text("A" * 5000)
+    (tmp_path / "b.py").write_text("bee")
+
+    with StubLLMServer(responder=responder) as server:
+        agent = CodingAgent(
+            api_key="stub", model="stub", base_url=server.base_url, root=str(tmp_path)
+        )
+        agent.registry.register_tool(TaskTool(root=str(tmp_path)))
+        assert agent.run("investigate") == "parent done"
+
+        child_requests = [
+            r for r in server.requests if "task" not in {t["function"]["name"] for t in r["tools"]}
+        ]
+
+    # Children only get read-only tools and the sub-agent instructions
+    assert {t["function"]["name"] for t in child_requests[0]["tools"]} == {
+        "read_file",
+        "read_files",
+        "grep",
+        "glob",
+        "find_symbol",
+        "list_symbols",
+    }
+    assert "sub-agent" in child_requests[0]["messages"][0]["content"]
+
+    [tool_result] = [m for m in agent.state.messages if m.role == "tool"]
+    assert "[Task 1: find a]\nfound: " + "A" * 5000 in tool_result.content
+    assert "[Task 2: find b]\nfound: bee" in tool_result.content
+    # The raw read_file results never enter the parent history
+    assert len(agent.state.messages) == 5
+
+    by_type = usage_summary(agent.state.metadata)["by_call_type"]
+    assert by_type["subagent"]["calls"] == 4
+    assert by_type["main"]["calls"] == 2
+
+
+def test_task_tool_outside_agent_turn():
+    assert TaskTool().execute(tasks=[{"description": "x", "prompt": "y"}]).startswith(
+        "Error"
+    )
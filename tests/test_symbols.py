@@ -0,0 +1,132 @@
+import os
+import threading
+
+from min_cc.symbols import SymbolIndex
+from min_cc.tools import FindSymbolTool, ListSymbolsTool
+from min_cc.utils import get_full_system_prompt
+
+SOURCE = '''
+LIMIT = 10
+
+
+class Store:
+    def get(self, key, *, default=None):
+        return helper(key)
+
+
+async def helper(key, *args, **kwargs):
+    return Store()
+'''
+
+
+def make_workspace(tmp_path):
+    pkg = tmp_path / "pkg"
+    pkg.mkdir()
+    (pkg / "store.py").write_text(SOURCE)
+    (pkg / "use.py").write_text("from pkg.store import Store\n\nStore().get('a')\n")
+    (pkg / "broken.py").write_text("def oops(:\n")
+    return pkg
+
+
+def test_index_finds_definitions_and_references(tmp_path):
+    make_workspace(tmp_path)
+    index = SymbolIndex(str(tmp_path))
+    assert index.refresh() == 3
+
+    [store] = index.find("Store")
+    assert (store.path, store.line, store.kind) == (os.path.join("pkg", "store.py"), 5, "class")
+    [get] = index.find("Store.get")
+    assert get.signature == "def get(self, key, *, default)"
+    [helper] = index.find("helper")
+    assert helper.signature == "async def helper(key, *args, **kwargs)"
+    assert index.find("LIMIT")[0].kind == "variable"
+
+    refs = index.references("Store")
+    assert (os.path.join("pkg", "use.py"), 1) in refs
+    assert (os.path.join("pkg", "use.py"), 3) in refs
+
+
+def test_index_is_persisted_and_refreshed_by_mtime(tmp_path):
+    pkg = make_workspace(tmp_path)
+    SymbolIndex(str(tmp_path)).refresh()
+    assert os.path.exists(tmp_path / ".min-cc" / "symbols.json")
+
+    index = SymbolIndex(str(tmp_path))
+    assert index.refresh() == 0  # everything loaded from disk
+
+    (pkg / "use.py").write_text("def added():\n    pass\n")
+    os.remove(pkg / "broken.py")
+    assert index.refresh() == 1
+    assert index.find("added") and not index.find("oops")
+
+
+def test_references_are_stored_per_file(tmp_path):
+    pkg = make_workspace(tmp_path)
+    SymbolIndex(str(tmp_path)).refresh()
+    refs_dir = tmp_path / ".min-cc" / "symbols-refs"
+    shards = {p.name: p.stat().st_mtime_ns for p in refs_dir.iterdir()}
+    assert len(shards) == 3
+    assert "refs" not in (tmp_path / ".min-cc" / "symbols.json").read_text()
+
+    (pkg / "use.py").write_text("Store = None\n")
+    os.remove(pkg / "broken.py")
+    index = SymbolIndex(str(tmp_path))
+    assert index.refresh() == 1
+    changed = {p.name: p.stat().st_mtime_ns for p in refs_dir.iterdir()}
+    assert len(changed) == 2
+    assert sum(changed[name] != shards[name] for name in changed) == 1
+    assert index.references("Store") == [
+        (os.path.join("pkg", "store.py"), 11),
+        (os.path.join("pkg", "use.py"), 1),
+    ]
+
+
+def test_readers_see_a_consistent_snapshot_during_refresh(tmp_path):
+    pkg = make_workspace(tmp_path)
+    index = SymbolIndex(str(tmp_path))
+    index.refresh()
+    for i in range(200):
+        (pkg / f"gen_{i}.py").write_text(f"def f{i}():\n    pass\n")
+
+    errors = []
+
+    def read():
+        try:
+            for _ in range(50):
+                index.find("Store")
+                index.references("Store")
+                index.repo_map(100)
+        except RuntimeError as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    index.refresh()
+    reader.join()
+    assert not errors
+    assert index.find("f199")
+
+
+def test_symbol_tools(tmp_path):
+    make_workspace(tmp_path)
+    find = FindSymbolTool(root=str(tmp_path))
+    result = find.execute("helper", include_references=True)
+    assert "store.py:10-11 function async def helper" in result
+    assert "References (1):\npkg/store.py:7" in result
+
+    listing = ListSymbolsTool(root=str(tmp_path)).execute("pkg/store.py")
+    assert listing.splitlines()[1:3] == [
+        f"{os.path.join('pkg', 'store.py')}:5 class Store",
+        f"{os.path.join('pkg', 'store.py')}:6   def get(self, key, *, default)",
+    ]
+
+
+def test_repo_map_respects_token_budget(tmp_path, monkeypatch):
+    make_workspace(tmp_path)
+    index = SymbolIndex(str(tmp_path))
+    index.refresh()
+    assert f"{os.path.join('pkg', 'store.py')}: LIMIT, Store, helper()" in index.repo_map(1000)
+    assert index.repo_map(5).endswith("more modules)")
+
+    monkeypatch.setenv("REPO_MAP_TOKENS", "1000")
+    assert "<repo_map>" in get_full_system_prompt(str(tmp_path))
@@ -0,0 +1,105 @@
+import shlex
+import sys
+from unittest.mock import MagicMock
+
+from min_cc.agent import CodingAgent
+from min_cc.models import ToolCall
+from min_cc.symbols import SymbolIndex
+from min_cc.testselect import ImportGraph, RunTestsTool, pytest_command
+
+
+def write(root, files):
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+WORKSPACE = {
+    "pkg/__init__.py": "",
+    "pkg/core.py": "def add(a, b):\n    return a + b\n",
+    "pkg/util.py": "from .core import add\n\ndef double(x):\n    return add(x, x)\n",
+    "pkg/sub/__init__.py": "from .. import util\n",
+    "tests/test_core.py": "from pkg.core import add\n\ndef test_add():\n    assert add(1, 2) == 3\n",
+    "tests/test_util.py": (
+        "from pkg import util\n\n"
+        "def test_double():\n    assert util.double(2) == 4\n\n"
+        "def test_wrong():\n    assert util.double(2) == 5\n"
+    ),
+    "tests/test_sub.py": "import pkg.sub\n\ndef test_sub():\n    pass\n",
+    "tests/test_other.py": "def test_other():\n    pass\n",
+}
+
+
+def graph_for(tmp_path):
+    write(tmp_path, WORKSPACE)
+    index = SymbolIndex(str(tmp_path))
+    index.refresh()
+    return ImportGraph(index)
+
+
+def test_selects_tests_that_transitively_import_changed_files(tmp_path):
+    graph = graph_for(tmp_path)
+    assert graph.modules["pkg.sub"] == "pkg/sub/__init__.py"
+    assert graph.select_tests(["pkg/core.py"]) == [
+        "tests/test_core.py",
+        "tests/test_sub.py",
+        "tests/test_util.py",
+    ]
+    assert graph.select_tests(["pkg/util.py"]) == [
+        "tests/test_sub.py",
+        "tests/test_util.py",
+    ]
+    assert graph.select_tests(["tests/test_other.py"]) == ["tests/test_other.py"]
+    assert graph.select_tests(["README.md"]) == []
+
+
+def test_changed_conftest_selects_its_directory(tmp_path):
+    write(tmp_path, {**WORKSPACE, "tests/conftest.py": ""})
+    index = SymbolIndex(str(tmp_path))
+    index.refresh()
+    assert len(ImportGraph(index).select_tests(["tests/conftest.py"])) == 4
+
+
+def test_run_tests_returns_digest(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYTEST_COMMAND", f"{shlex.quote(sys.executable)} -m pytest")
+    write(tmp_path, WORKSPACE)
+    tool = RunTestsTool(root=str(tmp_path))
+
+    result = tool.execute(paths=["pkg/util.py"])
+
+    summary, failure = result.splitlines()
+    assert summary.startswith(
+        "2 test file(s) affected by 1 changed file(s): 2 passed, 1 failed in "
+    )
+    assert failure == "FAILED tests.test_util::test_wrong: assert 4 == 5"
+
+
+def test_pytest_runs_in_the_workspace_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv("PYTEST_COMMAND", raising=False)
+    monkeypatch.delenv("VIRTUAL_ENV", raising=False)
+    python = tmp_path / ".venv" / "bin" / "python"
+    python.parent.mkdir(parents=True)
+    python.write_text("#!/bin/sh\n")
+    python.chmod(0o755)
+    assert pytest_command(str(tmp_path)) == [str(python), "-m", "pytest"]
+
+    monkeypatch.setenv("PYTEST_COMMAND", "uv run pytest")
+    assert pytest_command(str(tmp_path)) == ["uv", "run", "pytest"]
+
+    monkeypatch.delenv("PYTEST_COMMAND")
+    monkeypatch.setenv("PATH", "")
+    assert pytest_command(str(tmp_path / "elsewhere")) == [sys.executable, "-m", "pytest"]
+
+
+def test_run_tests_without_changes(tmp_path):
+    assert RunTestsTool(root=str(tmp_path)).execute().startswith("No changed files")
+
+
+def test_agent_tracks_files_changed_by_write_tools(tmp_path):
+    agent = CodingAgent(api_key="fake", client=MagicMock(), root=str(tmp_path))
+    agent._execute_tool_call(
+        ToolCall(id="1", name="write_file", arguments='{"path": "a.py", "content": "x"}')
+    )
+    agent._execute_tool_call(ToolCall(id="2", name="read_file", arguments='{"path": "a.py"}'))
+    assert agent.changed_files == {str(tmp_path / "a.py")}
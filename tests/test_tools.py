@@ -5,6 +5,7 @@ from min_cc.tools import (
     GlobTool,
     GrepTool,
     ReadFileTool,
+    ReadFilesTool,
     ReplaceFileContentTool,
     ToolRegistry,
     WriteFileTool,
@@ -46,6 +47,36 @@ def test_read_file_tool(tmp_path):
     assert result == "content"
 
 
+def test_read_files_tool(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("a1\na2\na3\n")
+    (tmp_path / "pkg" / "b.py").write_text("b" * 100)
+    (tmp_path / "blob.bin").write_bytes(b"\x00\x01")
+
+    tool = ReadFilesTool(root=str(tmp_path))
+    result = tool.execute(
+        files=[
+            {"path": "pkg/a.py", "start_line": 2, "end_line": 3},
+            {"path": "pkg/*.py"},
+            {"path": "blob.bin"},
+            {"path": "missing.py"},
+        ],
+        max_bytes=50,
+    )
+
+    assert result.split("\n") == [
+        "==> pkg/a.py [lines 2-3] <==",
+        "a2",
+        "a3",
+        "",
+        "==> pkg/b.py (truncated) <==",
+        "b" * 44,
+        "==> blob.bin: skipped (binary) <==",
+        "==> missing.py: not found <==",
+    ]
+    assert tool.execute(files=[{"path": "*.txt"}]).startswith("Error")
+
+
 def test_replace_file_content_tool(tmp_path):
     p = tmp_path / "hello.py"
     p.write_text("print('hello')")
@@ -153,3 +184,16 @@ def test_bash_tool_edge_cases():
     result = tool.execute(command="ls nonexistent_dir_123")
     assert "Safety block" not in result
     assert "No such file" in result or "exit code" in result.lower()
+
+
+def test_tools_resolve_paths_against_root(tmp_path, chdir_tmp):
+    root = tmp_path / "workspace"
+    root.mkdir()
+    (root / "a.py").write_text("needle = 1")
+
+    assert ReadFileTool(root=str(root)).execute(path="a.py") == "needle = 1"
+    assert GlobTool(root=str(root)).execute(pattern="*.py") == "a.py"
+    assert GrepTool(root=str(root)).execute(pattern="needle") == "a.py:1:needle = 1"
+    WriteFileTool(root=str(root)).execute(path="b.txt", content="hi")
+    assert (root / "b.txt").read_text() == "hi"
+    assert "a.py" in BashTool(root=str(root)).execute(command="ls")
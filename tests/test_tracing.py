@@ -0,0 +1,58 @@
+import json
+
+from benchmarks.stub_server import ScriptedSession, StubLLMServer
+from min_cc.agent import CodingAgent
+from min_cc.tools import ReadFileTool, ToolRegistry
+from min_cc.tracing import Tracer
+
+
+def test_spans_nest_and_export_otlp_json(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer(export_path=str(path))
+    with tracer.span("outer") as outer:
+        with tracer.span("inner", tool="grep", payload={"dropped": True}) as inner:
+            pass
+    tracer.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    spans = [l["resourceSpans"][0]["scopeSpans"][0]["spans"][0] for l in lines]
+    assert [s["name"] for s in spans] == ["inner", "outer"]
+    assert spans[0]["parentSpanId"] == outer.span_id
+    assert spans[0]["traceId"] == spans[1]["traceId"]
+    assert spans[0]["attributes"] == [{"key": "tool", "value": {"stringValue": "grep"}}]
+    assert inner.end_ns >= inner.start_ns
+
+
+def test_span_marks_errors():
+    tracer = Tracer()
+    try:
+        with tracer.span("boom") as span:
+            raise ValueError("x")
+    except ValueError:
+        pass
+    assert span.is_error
+    assert tracer.stats()["boom"]["count"] == 1
+
+
+def test_registry_execute_flags_errors():
+    registry = ToolRegistry()
+    registry.register_tool(ReadFileTool())
+
+    assert registry.execute("1", "read_file", "{not json").is_error
+    assert registry.execute("2", "missing", "{}").is_error
+    result = registry.execute("3", "read_file", '{"path": "/nonexistent/file"}')
+    assert result.is_error and result.tool_call_id == "3"
+
+
+def test_agent_turn_records_phase_spans(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "README.md").write_text("hello")
+    with StubLLMServer(responder=ScriptedSession(calls_per_round=2)) as server:
+        agent = CodingAgent(api_key="stub", model="stub-model", base_url=server.base_url)
+        agent.run("read the readme")
+
+    stats = agent.tracer.stats()
+    assert stats["agent.turn"]["count"] == 1
+    assert stats["llm.call"]["count"] == 2
+    assert stats["tool.execute"]["count"] == 2
+    assert {"agent.compaction", "agent.serialize"} <= set(stats)
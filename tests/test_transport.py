@@ -0,0 +1,162 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from min_cc.cancellation import CancelToken, Cancelled, use_token
+from min_cc.transport import CircuitBreaker, CircuitOpen, RetryTransport, retry_after_seconds
+
+
+def make_client(responses, sleeps, **kwargs):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        item = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    transport = RetryTransport(
+        httpx.MockTransport(handler), sleep=sleeps.append, **kwargs
+    )
+    return httpx.Client(transport=transport), calls
+
+
+def test_retries_429_honouring_retry_after():
+    sleeps = []
+    client, calls = make_client(
+        [
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(503, headers={"retry-after-ms": "250"}),
+            httpx.Response(200, json={"ok": True}),
+        ],
+        sleeps,
+    )
+    response = client.post("https://llm.test/v1/chat/completions", json={"a": 1})
+
+    assert response.json() == {"ok": True}
+    assert len(calls) == 3
+    assert calls[2].content == b'{"a":1}'
+    assert sleeps == [2.0, 0.25]
+
+
+def test_gives_up_after_max_retries():
+    sleeps = []
+    client, calls = make_client([httpx.Response(503)], sleeps, max_retries=2)
+    response = client.get("https://llm.test/")
+
+    assert response.status_code == 503
+    assert len(calls) == 3
+    assert all(0 <= s <= 2 for s in sleeps)
+
+
+def test_retries_connection_errors():
+    sleeps = []
+    client, calls = make_client(
+        [httpx.ConnectError("refused"), httpx.Response(200)], sleeps
+    )
+    assert client.get("https://llm.test/").status_code == 200
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize(
+    "failure",
+    [
+        httpx.Response(500),
+        httpx.Response(408),
+        httpx.Response(409),
+        httpx.ReadTimeout("slow"),
+        httpx.RemoteProtocolError("reset mid-response"),
+    ],
+)
+def test_does_not_retry_once_the_request_may_have_run(failure):
+    client, calls = make_client([failure, httpx.Response(200)], [])
+    if isinstance(failure, Exception):
+        with pytest.raises(type(failure)):
+            client.post("https://llm.test/v1/chat/completions", json={})
+    else:
+        assert client.post("https://llm.test/v1/chat/completions", json={}) is not None
+    assert len(calls) == 1
+
+
+def test_circuit_opens_and_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=2, reset_timeout=10, clock=lambda: now[0])
+    client, calls = make_client(
+        [httpx.Response(502)],
+        [],
+        max_retries=0,
+        breaker_factory=lambda: breaker,
+    )
+
+    client.get("https://llm.test/")
+    client.get("https://llm.test/")
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        client.get("https://llm.test/")
+    assert len(calls) == 2
+
+    now[0] = 11.0
+    assert breaker.state == "half_open"
+    client.get("https://llm.test/")  # trial request fails: open again
+    assert breaker.state == "open"
+
+
+def test_retry_after_http_date():
+    response = httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert retry_after_seconds(response) == 0.0
+
+
+def test_malformed_retry_after_falls_back_to_backoff():
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "soon"})) is None
+    sleeps = []
+    client, calls = make_client(
+        [httpx.Response(429, headers={"Retry-After": "soon"}), httpx.Response(200)],
+        sleeps,
+    )
+    assert client.get("https://llm.test/").status_code == 200
+    assert len(calls) == 2 and 0 <= sleeps[0] <= 1
+
+
+def test_cancel_interrupts_backoff_and_header_wait():
+    def handler(request):
+        if request.url.path == "/slow":
+            time.sleep(10)
+            return httpx.Response(200)
+        return httpx.Response(429, headers={"Retry-After": "5"})
+
+    client = httpx.Client(transport=RetryTransport(httpx.MockTransport(handler)))
+    for path in ("/limited", "/slow"):
+        token = CancelToken()
+        threading.Timer(0.3, token.cancel).start()
+        start = time.perf_counter()
+        with use_token(token), pytest.raises(Cancelled):
+            client.get(f"https://llm.test{path}")
+        assert time.perf_counter() - start < 2
+
+
+def test_cancelled_half_open_trial_frees_the_trial_slot():
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10, clock=lambda: now[0])
+    release = threading.Event()
+
+    def handler(request):
+        if request.url.path == "/slow":
+            release.wait(10)
+        return httpx.Response(200)
+
+    client = httpx.Client(
+        transport=RetryTransport(httpx.MockTransport(handler), breaker_factory=lambda: breaker)
+    )
+    breaker.record_failure()
+    now[0] = 11.0
+    token = CancelToken()
+    threading.Timer(0.2, token.cancel).start()
+    with use_token(token), pytest.raises(Cancelled):
+        client.get("https://llm.test/slow")  # the half-open trial
+    release.set()
+
+    assert client.get("https://llm.test/").status_code == 200
+    assert breaker.state == "closed"
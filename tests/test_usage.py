@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock
+
+from openai.types.chat import ChatCompletionChunk
+from openai.types.completion_usage import CompletionUsage
+
+from min_cc.agent import CodingAgent
+from min_cc.compaction import CompactionService, CompactionStrategy
+from min_cc.models import Message
+from min_cc.usage import estimate_cost, record_usage, start_turn, usage_summary
+
+PRICING = {"prompt": 1e-6, "completion": 2e-6, "input_cache_read": 1e-7}
+
+
+def make_usage(prompt=100, completion=10, cached=0):
+    return CompletionUsage.model_validate(
+        {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+    )
+
+
+def test_estimate_cost_discounts_cached_tokens():
+    tokens = {"prompt_tokens": 1000, "completion_tokens": 100, "cached_tokens": 400}
+    assert estimate_cost(tokens, PRICING) == 600 * 1e-6 + 400 * 1e-7 + 100 * 2e-6
+    assert estimate_cost(tokens, None) == 0.0
+
+
+def test_record_usage_by_turn_and_call_type():
+    metadata = {}
+    start_turn(metadata)
+    record_usage(metadata, "main", make_usage(), PRICING, model="m")
+    record_usage(metadata, "summarization", make_usage(50, 5), PRICING)
+    start_turn(metadata)
+    record_usage(metadata, "main", make_usage(cached=80), PRICING)
+    record_usage(metadata, "main", MagicMock())  # unparseable usage counts as zero
+
+    summary = usage_summary(metadata)
+    assert summary["turns"] == 2
+    assert summary["by_call_type"]["main"]["calls"] == 3
+    assert summary["by_call_type"]["main"]["cached_tokens"] == 80
+    assert summary["total"]["prompt_tokens"] == 250
+    assert metadata["usage"]["turns"][0]["completion_tokens"] == 15
+
+
+def test_agent_records_main_and_summarization_usage():
+    service = CompactionService(token_limit=1, strategy=CompactionStrategy.SUMMARIZE)
+    agent = CodingAgent(
+        api_key="fake",
+        compaction_service=service,
+        client=MagicMock(),
+        pricing_lookup=lambda model: PRICING,
+    )
+    summary = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="Summary"))], usage=make_usage()
+    )
+    chunk = ChatCompletionChunk.model_validate(
+        {
+            "id": "c",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "m",
+            "choices": [{"index": 0, "delta": {"content": "Hello"}}],
+            "usage": make_usage().model_dump(),
+        }
+    )
+    agent.client.chat.completions.create.side_effect = lambda **kw: (
+        iter([chunk]) if kw.get("stream") else summary
+    )
+    agent.state.messages += [Message(role="user", content=f"m{i}") for i in range(5)]
+
+    assert agent.run("Hi") == "Hello"
+
+    by_type = usage_summary(agent.state.metadata)["by_call_type"]
+    assert by_type["main"]["prompt_tokens"] == 100
+    assert by_type["summarization"]["calls"] == 1
+    assert by_type["main"]["cost"] > 0